@@ -34,7 +34,7 @@ routecam_unified = None
 
 if _IN_BLENDER:
     from . import gui
-    from .route.fetch_operator import BLOSM_OT_FetchRouteMap, BLOSM_OT_ExtendCityArea
+    from .route.fetch_operator import BLOSM_OT_FetchRouteMap, BLOSM_OT_ExtendCityArea, BLOSM_OT_CancelRouteImport
     from .osm.import_operator import BLOSM_OT_ImportData
     from .app import blender as blenderApp
     from .setup import render_settings # Import render settings module
@@ -54,6 +54,7 @@ if _IN_BLENDER:
         BLOSM_OT_ImportData,
         BLOSM_OT_FetchRouteMap,
         BLOSM_OT_ExtendCityArea,
+        BLOSM_OT_CancelRouteImport,
         render_settings.BLOSM_OT_ApplyRenderSettings, # Register Apply Render Settings operator
     )
 
@@ -24,6 +24,7 @@ class BaseApp:
     
     def __init__(self):
         self.projection = None
+        self.osmTileStream = None
     
     def initOsm(self):
         self.baseInit()
@@ -83,8 +84,14 @@ class BaseApp:
             else:
                 break
         self.osmFilepath = osmFilepath
+        # a generator of OSM element batches if the tiles are parsed while being downloaded
+        self.osmTileStream = None
         route_fetcher = getattr(self, "route_fetcher", None)
-        if route_fetcher:
+        if route_fetcher and getattr(route_fetcher, "pipelined", False):
+            # the download starts when the stream is consumed by <Osm.parseStream(..)>;
+            # <osmFilepath> is complete once the stream is exhausted
+            self.osmTileStream = route_fetcher.iter_write(osmFilepath, minLat, minLon, maxLat, maxLon)
+        elif route_fetcher:
             route_fetcher.write(osmFilepath, minLat, minLon, maxLat, maxLon)
         else:
             self.download(
@@ -100,6 +107,10 @@ class BaseApp:
         )
     
     def loadMissingWays(self, osm):
+        if not self.missingWays:
+            # the members of all incomplete relations were found later in the OSM file
+            self.loadMissingMembers = False
+            return
         filepath = BaseApp.osmFileExtraName % self.osmFilepath[:-4]
         if not os.path.isfile(filepath):
             print("Downloading data for incomplete OSM relations")
@@ -14,6 +14,10 @@ if "bpy" in sys.modules:
     # Terrain import moved to lazy-load in terrain-specific methods (setTerrain, initTerrain)
     # This prevents import errors for route import which doesn't need terrain
     from ..util.blender import makeActive, appendNodeGroupFromFile, addGeometryNodesModifier
+    from ..util.transverse_mercator import projectBatch
+    from ..util.trace import getTracer
+    
+    tracer = getTracer("app")
 
 
 _setAssetsDirStr = "Please set a directory with assets (building_materials.blend, vegetation.blend) in the addon preferences!"
@@ -434,9 +438,8 @@ class BlenderApp(BaseApp):
             if not (p.startswith("__") or p in ("bl_rna", "rna_type", "int", "string")):
                 value = getattr(addon, p)
                 setattr(self, p, value)
-                # Add debug print for key properties
-                if p in ("buildings", "highways", "water", "osmFilepath", "osmSource", "relativeToInitialImport"):
-                    print(f"[DEBUG] setAttributes: {p} = {value}")
+                if tracer.level and p in ("buildings", "highways", "water", "osmFilepath", "osmSource", "relativeToInitialImport"):
+                    tracer.log("setAttributes: %s = %s", p, value)
     
     def setDataDir(self, context, basePath, addonName):
         """
@@ -479,9 +482,11 @@ class BlenderApp(BaseApp):
     def createLayers(self, osm):
         self.layerKwargs = dict(swOffset=self.swOffsetDp) if self.mode is BaseApp.realistic else {}
         super().createLayers(osm)
-        # Add debug print for layers
-        for layer in self.layers:
-            print(f"[DEBUG] createLayers: Created layer {layer.id}, manager={getattr(layer, 'm', 'None')}, renderer={getattr(layer, 'rr', 'None')}")
+        if tracer.level:
+            for layer in self.layers:
+                tracer.log("createLayers: layer %s, manager=%s, renderer=%s",
+                    layer.id, getattr(layer, 'm', None), getattr(layer, 'rr', None)
+                )
     
     def clean(self):
         self.meshes = None
@@ -612,6 +617,9 @@ class BlenderApp(BaseApp):
                 
                 filepath = os.path.join(self.terrainDir, Terrain.getHgtFileName(_lat, _lon))
                 
+                # longitudes of the samples in a row, the same for all rows
+                rowLons = [_lon + x/size for x in range(x1, x2+1)]
+                
                 with gzip.open(filepath, "rb") as f:
                     for y in range(y2, y1-1, -1):
                         # set the file object position at y, x1
@@ -619,10 +627,11 @@ class BlenderApp(BaseApp):
                         # Vertex reduction: use hard_size and decimate divider
                         f.seek( 2*((hard_size-y*decimate)*(hard_size+1) + x1*decimate) )
                         
+                        # project the whole row of samples in one call
+                        rowX, rowY = projectBatch(self.projection, [_lat + y/size]*len(rowLons), rowLons)
+                        
                         for x in range(x1, x2+1):
-                            lat = _lat + y/size
-                            lon = _lon + x/size
-                            xy = self.projection.fromGeographic(lat, lon)
+                            xy = (rowX[x-x1], rowY[x-x1])
                             # read two bytes and convert them
                             buf = f.read(2)
                             # Vertex reduction : read more bytes for next loop
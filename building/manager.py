@@ -2,9 +2,13 @@ from ..manager import Manager
 from .. import parse
 from ..parse.osm import Osm
 from ..util import zAxis
+from ..util.trace import getTracer
 from . import Building
 
 
+tracer = getTracer("building")
+
+
 class BaseBuildingManager:
     
     def __init__(self, data, app, buildingParts, layerClass):
@@ -46,7 +50,7 @@ class BaseBuildingManager:
         self.createBuilding(element)
     
     def createBuilding(self, element):
-        print(f"[DEBUG] createBuilding: Creating building for element ID: {getattr(element, 'id', 'N/A')}, tags: {getattr(element, 'tags', 'N/A').keys() if getattr(element, 'tags', None) else 'N/A'}")
+        if tracer.level: tracer.sample("building", "building for the element %s", element.tags.get("id") if element.tags else None)
         # create a wrapper for the OSM way <element>
         building = Building(element, self.buildingCounter, self.data)
         # store the related wrapper in the attribute <b>
@@ -16,6 +16,9 @@ from .panels import (
 from .operators import (
     BLOSM_OT_AddWaypoint,
     BLOSM_OT_RemoveWaypoint,
+    BLOSM_OT_ClearTileCache,
+    BLOSM_OT_ClearServiceCache,
+    BLOSM_OT_BuildCityPack,
     BLOSM_OT_LevelsAdd,
     BLOSM_OT_LevelsDelete,
     BLOSM_OT_CaptureAsset,
@@ -72,6 +75,9 @@ _classes = (
     BLOSM_UL_DefaultLevels,
     BLOSM_OT_AddWaypoint,
     BLOSM_OT_RemoveWaypoint,
+    BLOSM_OT_ClearTileCache,
+    BLOSM_OT_ClearServiceCache,
+    BLOSM_OT_BuildCityPack,
     BLOSM_OT_LevelsAdd,
     BLOSM_OT_LevelsDelete,
     BLOSM_OT_CleanAndClear,
@@ -21,6 +21,8 @@ from ..asset_manager import (
 
 from ..asset_manager.asset_safety import AssetSafety
 from ..asset_manager.simple_asset_updater import SimpleAssetUpdater
+from ..route import city_pack, service_cache, tile_cache
+from ..route.utils import RouteServiceError
 
 
 class BLOSM_OT_AddWaypoint(bpy.types.Operator):
@@ -53,6 +55,76 @@ class BLOSM_OT_RemoveWaypoint(bpy.types.Operator):
         return {'FINISHED'}
 
 
+class BLOSM_OT_ClearTileCache(bpy.types.Operator):
+    """Remove all cached Overpass tiles"""
+
+    bl_idname = "blosm.clear_tile_cache"
+    bl_label = "Clear Tile Cache"
+    bl_description = "Delete cached Overpass tiles so the next import downloads fresh data"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        cache = tile_cache.get_default_cache()
+        if cache is None:
+            self.report({'INFO'}, "Tile cache is disabled")
+            return {'CANCELLED'}
+        removed = cache.clear()
+        self.report({'INFO'}, f"Removed {removed} cached tile(s)")
+        return {'FINISHED'}
+
+
+class BLOSM_OT_ClearServiceCache(bpy.types.Operator):
+    """Remove cached geocoding and routing results"""
+
+    bl_idname = "blosm.clear_service_cache"
+    bl_label = "Clear Lookup Cache"
+    bl_description = "Delete cached address lookups and routes so the next import queries Nominatim and OSRM again"
+    bl_options = {'INTERNAL'}
+
+    kind: bpy.props.EnumProperty(
+        name="Entries",
+        items=(
+            ('ALL', "All", "Addresses and routes"),
+            (service_cache.GEOCODE, "Addresses", "Nominatim address lookups"),
+            (service_cache.ROUTE, "Routes", "OSRM routes"),
+        ),
+        default='ALL',
+    )
+
+    def execute(self, context):
+        cache = service_cache.get_default_cache()
+        if cache is None:
+            self.report({'INFO'}, "Lookup cache is disabled")
+            return {'CANCELLED'}
+        removed = cache.clear(None if self.kind == 'ALL' else self.kind)
+        self.report({'INFO'}, f"Removed {removed} cached lookup(s)")
+        return {'FINISHED'}
+
+
+class BLOSM_OT_BuildCityPack(bpy.types.Operator):
+    """Build an offline city pack from a local OSM extract"""
+
+    bl_idname = "blosm.build_city_pack"
+    bl_label = "Build City Pack"
+    bl_description = "Index the selected OSM extract into a city pack next to it and use it for route imports"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        addon = context.scene.blosm
+        source = bpy.path.abspath(addon.route_city_pack_source)
+        if not addon.route_city_pack_source or not Path(source).is_file():
+            self.report({'ERROR'}, "Select an OSM extract first")
+            return {'CANCELLED'}
+        try:
+            pack_path = city_pack.build_city_pack(source)
+        except (RouteServiceError, OSError) as exc:
+            self.report({'ERROR'}, f"City pack build failed: {exc}")
+            return {'CANCELLED'}
+        addon.route_city_pack = str(pack_path)
+        self.report({'INFO'}, f"City pack built: {pack_path.name}")
+        return {'FINISHED'}
+
+
 class BLOSM_OT_LevelsAdd(bpy.types.Operator):
     """Add an entry for default building levels"""
 
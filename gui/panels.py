@@ -6,6 +6,7 @@ Minimal panel definitions for route import functionality only.
 import bpy
 
 from ..asset_manager import AssetRegistry, AssetType
+from ..route import import_job, performance_tracker, service_cache, tile_cache
 
 
 ROUTE_PANEL_UI_VERSION = "2.2.0"
@@ -33,6 +34,17 @@ class BLOSM_PT_RouteImport(bpy.types.Panel):
         layout = self.layout
         addon = context.scene.blosm
 
+        # Live progress of a route import running in the background
+        job = import_job.get_active_job()
+        if job is not None and not job.done:
+            job_box = layout.box()
+            job_box.label(text=f"{job.stage_label}...", icon='TIME')
+            if job.tiles_total:
+                job_box.label(text=f"Tiles {job.tiles_done}/{job.tiles_total} ({job.fraction * 100:.0f}%)")
+            eta = performance_tracker.format_eta(job.eta_s())
+            job_box.label(text=f"Elapsed {job.elapsed_s:.0f}s, remaining {eta}")
+            job_box.operator("blosm.cancel_route_import", text="Cancel Import", icon='CANCEL')
+
         # Address inputs
         col = layout.column(align=True)
         col.prop(addon, "route_start_address", text="Start Address")
@@ -49,6 +61,10 @@ class BLOSM_PT_RouteImport(bpy.types.Panel):
         col = layout.column(align=True)
         col.prop(addon, "route_end_address", text="End Address")
         layout.prop(addon, "route_padding_m")
+        corridor_col = layout.column(align=True)
+        corridor_col.prop(addon, "route_corridor_mode")
+        if addon.route_corridor_mode:
+            corridor_col.prop(addon, "route_corridor_endpoint_m")
 
         # Import layer toggles
         layer_col = layout.column(align=True)
@@ -87,6 +103,38 @@ class BLOSM_PT_RouteImport(bpy.types.Panel):
         if not has_import_state:
             extend_box.label(text="Run Fetch Route and Map first to enable extend.", icon='INFO')
 
+        # Overpass tile cache statistics (session hit/miss counters)
+        cache = tile_cache.get_default_cache()
+        if cache is not None:
+            stats = cache.stats()
+            cache_box = layout.box()
+            row = cache_box.row()
+            row.label(
+                text=f"Tile Cache: {stats['hits']} hits / {stats['misses']} misses",
+                icon='FILE_CACHE',
+            )
+            row.operator("blosm.clear_tile_cache", text="", icon='TRASH')
+            cache_box.label(
+                text=f"{stats['entries']} tiles, {stats['total_bytes'] / (1024 * 1024):.1f} of {stats['max_bytes'] / (1024 * 1024):.0f} MB"
+            )
+
+        # Geocode / route cache statistics
+        lookups = service_cache.get_default_cache()
+        if lookups is not None:
+            stats = lookups.stats()
+            geocode_stats = stats[service_cache.GEOCODE]
+            route_stats = stats[service_cache.ROUTE]
+            lookup_box = layout.box()
+            row = lookup_box.row()
+            row.label(
+                text=f"Lookup Cache: {geocode_stats['entries']} addresses, {route_stats['entries']} routes",
+                icon='FILE_CACHE',
+            )
+            row.operator("blosm.clear_service_cache", text="", icon='TRASH').kind = 'ALL'
+            lookup_box.label(
+                text=f"Hits {geocode_stats['hits'] + route_stats['hits']} / misses {geocode_stats['misses'] + route_stats['misses']}"
+            )
+
         # Animation settings - grouped in a collapsible tab-like box
         anim_box = layout.box()
         header = anim_box.row()
@@ -205,6 +253,20 @@ class BLOSM_PT_RouteImportAdvanced(bpy.types.Panel):
         layout = self.layout
         addon = context.scene.blosm
 
+        layout.prop(addon, "route_background_fetch")
+        layout.prop(addon, "route_pipelined_import")
+        layout.prop(addon, "route_resume_downloads")
+        layout.prop(addon, "osmSnapshots")
+        layout.prop(addon, "osmParallelDecode")
+        layout.prop(addon, "osmDropUnusedTags")
+
+        pack_box = layout.box()
+        pack_box.label(text="Offline City Pack", icon='PACKAGE')
+        pack_box.prop(addon, "route_city_pack")
+        row = pack_box.row(align=True)
+        row.prop(addon, "route_city_pack_source", text="Extract")
+        row.operator("blosm.build_city_pack", text="", icon='FILE_REFRESH')
+
         # Fallback building heights (moved from separate panel)
         layout.separator()
         layout.label(text="Fallback Building Heights", icon='HOME')
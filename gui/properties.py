@@ -313,6 +313,33 @@ class BlosmProperties(bpy.types.PropertyGroup):
         default=True,
     )
 
+    osmSnapshots: bpy.props.BoolProperty(
+        name="Reuse parsed OSM files",
+        description=(
+            "Keep a binary snapshot of each parsed OSM file in ~/.blosm/osm_snapshots. "
+            "Importing the same file again with the same settings loads the snapshot instead of parsing the file"
+        ),
+        default=True,
+    )
+
+    osmParallelDecode: bpy.props.BoolProperty(
+        name="Decode large OSM files in parallel",
+        description=(
+            "Decode OSM files of 16 MB and more in separate Python processes. "
+            "Faster on multi-core machines, but each process takes its own memory and startup time"
+        ),
+        default=False,
+    )
+
+    osmDropUnusedTags: bpy.props.BoolProperty(
+        name="Drop unused tags",
+        description=(
+            "Keep only the OSM tags used for the import, e.g. building, height or roof:shape. "
+            "Reduces memory use for large areas, but the imported objects get fewer custom properties"
+        ),
+        default=False,
+    )
+
     # Route address inputs
     route_start_address: bpy.props.StringProperty(
         name="Start Address",
@@ -365,6 +392,19 @@ class BlosmProperties(bpy.types.PropertyGroup):
         default=100.0,
     )
 
+    route_corridor_mode: bpy.props.BoolProperty(
+        name="Corridor tiles only",
+        description="Only fetch tiles within the padding distance of the route line instead of the whole bounding box",
+        default=False,
+    )
+
+    route_corridor_endpoint_m: bpy.props.FloatProperty(
+        name="Endpoint padding (m)",
+        description="Wider ring of tiles kept around the start and end points in corridor mode",
+        min=0.0,
+        default=500.0,
+    )
+
     # Route import toggles
     route_import_roads: bpy.props.BoolProperty(
         name="Import roads",
@@ -420,6 +460,38 @@ class BlosmProperties(bpy.types.PropertyGroup):
         default=True,
     )
 
+    route_background_fetch: bpy.props.BoolProperty(
+        name="Download in background",
+        description="Keep Blender responsive while geocoding, routing and map tiles download; the scene is built once everything has arrived",
+        default=True,
+    )
+
+    route_pipelined_import: bpy.props.BoolProperty(
+        name="Parse tiles while downloading",
+        description="Parse each Overpass tile as soon as it arrives while the next tiles download in the background",
+        default=True,
+    )
+
+    route_resume_downloads: bpy.props.BoolProperty(
+        name="Resume interrupted downloads",
+        description="Keep downloaded Overpass tiles on disk until the import completes, so running a failed import again only downloads the missing tiles",
+        default=True,
+    )
+
+    route_city_pack: bpy.props.StringProperty(
+        name="City pack",
+        subtype='FILE_PATH',
+        description="Offline city pack (.blosmpack) answering map requests inside its area without Overpass. Leave empty to download live data",
+        default="",
+    )
+
+    route_city_pack_source: bpy.props.StringProperty(
+        name="OSM extract",
+        subtype='FILE_PATH',
+        description="Local OpenStreetMap extract (.osm, .osm.gz, .osm.bz2 or .osm.pbf) to build a city pack from",
+        default="",
+    )
+
     route_import_separate_tiles: bpy.props.BoolProperty(
         name="Import separate tiles",
         description="Import Overpass tiles separately for better alignment",
@@ -3,6 +3,10 @@ import os
 import bpy
 from ..app import blender as blenderApp
 from ..parse.osm import Osm
+from ..util.trace import getTracer, Summary
+
+
+tracer = getTracer("import")
 
 class BLOSM_OT_ImportData(bpy.types.Operator):
     """CashCab: Import OpenStreetMap or terrain data"""
@@ -72,14 +76,16 @@ class BLOSM_OT_ImportData(bpy.types.Operator):
         self.setObjectMode(context)
         bpy.ops.object.select_all(action='DESELECT')
         
+        summary = Summary()
         osm = Osm(a)
-        print(f"[DEBUG] importOsm: Using setup_function: {setup_function.__module__}.{setup_function.__name__}")
         setup_function(a, osm)
-        # Print the conditions added to the OSM object
-        print(f"[DEBUG] importOsm: Osm conditions: {[(c[0].__name__, getattr(c[1], 'id', 'None'), getattr(c[2], 'id', 'None'), getattr(c[3], 'id', 'None')) for c in osm.conditions]}")
-        print(f"[DEBUG] importOsm: Osm nodeConditions: {[(c[0].__name__, getattr(c[1], 'id', 'None'), getattr(c[2], 'id', 'None'), getattr(c[3], 'id', 'None')) for c in osm.nodeConditions]}")
+        if tracer.level:
+            tracer.log("importOsm: setup function %s.%s", setup_function.__module__, setup_function.__name__)
+            tracer.log("importOsm: conditions %s", self.describeConditions(osm.conditions))
+            tracer.log("importOsm: node conditions %s", self.describeConditions(osm.nodeConditions))
         a.createLayers(osm)
         
+        summary.begin("parse")
         setLatLon = False
         use_existing_projection = (
             "lat" in scene and "lon" in scene and a.relativeToInitialImport
@@ -94,7 +100,12 @@ class BLOSM_OT_ImportData(bpy.types.Operator):
                     (a.minLon + a.maxLon) / 2.0,
                 )
                 setLatLon = True
-            osm.parse(a.osmFilepath, forceExtentCalculation=forceExtentCalculation)
+            tileStream = getattr(a, "osmTileStream", None)
+            if tileStream is not None:
+                a.osmTileStream = None
+                osm.parseStream(tileStream, forceExtentCalculation=forceExtentCalculation)
+            else:
+                osm.parse(a.osmFilepath, forceExtentCalculation=forceExtentCalculation)
         elif a.osmSource == "file":
             # Prefer scene property `osmFilepath`; fall back to legacy `osmFilePath` or app.osmFilepath
             file_path = (
@@ -128,6 +139,8 @@ class BLOSM_OT_ImportData(bpy.types.Operator):
                 # at the end of the method <osm.parse(..)>
                 osm.setProjection( (osm.minLat+osm.maxLat)/2., (osm.minLon+osm.maxLon)/2. )
         
+        summary.end(nodes=len(osm.nodes), ways=len(osm.ways), relations=len(osm.relations))
+        
         if forceExtentCalculation:
             a.minLat = osm.minLat
             a.maxLat = osm.maxLat
@@ -144,8 +157,12 @@ class BLOSM_OT_ImportData(bpy.types.Operator):
         
         a.initLayers()
         
+        summary.begin("process")
         a.process()
+        summary.end(**self.countElements(a))
+        summary.begin("render")
         a.render()
+        summary.end()
         
         # Set <lon> and <lat> attributes for <scene> if necessary.
         # <osm.projection> is set in <osm.setProjection(..)> along with <osm.lat> and <osm.lon>
@@ -156,8 +173,25 @@ class BLOSM_OT_ImportData(bpy.types.Operator):
         
         a.clean()
         
+        summary.report()
+        
         return {'FINISHED'}
     
+    @staticmethod
+    def describeConditions(conditions):
+        return [
+            (c[0].__name__, getattr(c[1], 'id', None), getattr(c[2], 'id', None), c[3])
+            for c in conditions
+        ]
+    
+    @staticmethod
+    def countElements(app):
+        """
+        Count the elements created by the managers (the buildings so far)
+        """
+        buildings = [m.buildings for m in app.managers if hasattr(m, "buildings")]
+        return dict(buildings=sum(len(b) for b in buildings)) if buildings else {}
+    
     def getCenterLatLon(self, context):
         a = blenderApp.app
         scene = context.scene
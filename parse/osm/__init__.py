@@ -1,7 +1,20 @@
+import os
+from array import array
+from itertools import chain
 import xml.etree.cElementTree as etree
 
 from .node import Node
+from .node_store import NodeStore
 from .way import Way
+from .condition import TagCondition, compileConditions, findCondition
+from .pbf import PbfFile
+from . import snapshot
+from . import parallel
+from .tags import TagTable, USED_TAG_KEYS
+from ...util.trace import getTracer
+
+
+tracer = getTracer("parse")
 
 
 class Osm:
@@ -38,7 +51,8 @@ class Osm:
             Osm.relationTypes = {'multipolygon': Multipolygon, 'building': Building, 'boundary': Multipolygon}
             Osm.roles = {'outer':Osm.outer, 'inner':Osm.inner, 'outline':Osm.outline, 'part':Osm.part}
         
-        self.nodes = {}
+        # OSM nodes with integer ids, see <node_store.NodeStore>
+        self.nodes = NodeStore()
         self.ways = {}
         self.relations = {}
         
@@ -48,6 +62,14 @@ class Osm:
         self.conditions = []
         # use separate conditions for nodes to get some performance gain
         self.nodeConditions = []
+        # the conditions and their compiled form (see <condition.compileConditions(..)>)
+        self.conditionDispatch = (None, None)
+        self.nodeConditionDispatch = (None, None)
+        
+        # <snapshot.SnapshotRecorder> set while an OSM file is parsed for a snapshot
+        self.recorder = None
+        # interned tags of the stored OSM elements, created in <self.internTags(..)>
+        self.tagTable = None
         
         # The variable below is used for the bounds calculation
         # Have we encountered the first point in the bounds calculations?
@@ -62,73 +84,240 @@ class Osm:
         self.conditions.append(
             (condition, manager, renderer, layerId)
         )
+        self.conditionDispatch = (None, None)
     
     def addNodeCondition(self, condition, layerId=None, manager=None, renderer=None):
         self.nodeConditions.append(
             (condition, manager, renderer, layerId)
         )
+        self.nodeConditionDispatch = (None, None)
     
     def parse(self, filepath, **kwargs):
+        if getattr(self.app, "osmSnapshots", False):
+            self.parseWithSnapshot(filepath, **kwargs)
+        else:
+            self.parseFile(filepath, **kwargs)
+    
+    def parseFile(self, filepath, **kwargs):
+        """
+        The keyword argument <workers> sets the number of processes decoding the file;
+        by default it's chosen from the file size and the number of CPUs if <app.osmParallelDecode> is set,
+        otherwise the file is parsed in this process.
+        """
+        if filepath.lower().endswith(".pbf"):
+            self.parsePbf(filepath, **kwargs)
+            return
+        workers = kwargs.get("workers")
+        if workers is None:
+            workers = parallel.defaultWorkers(os.path.getsize(filepath)) if self.parallelDecode() else 0
+        if workers > 0:
+            self.parseTiles(parallel.splitFile(filepath), **kwargs)
+        else:
+            self.parseElements(self.iterElements(filepath), **kwargs)
+    
+    def parallelDecode(self):
+        """
+        Are OSM files decoded in worker processes if the number of processes isn't given?
+        """
+        return getattr(self.app, "osmParallelDecode", False)
+    
+    def parseWithSnapshot(self, filepath, **kwargs):
+        """
+        Replay the snapshot of the OSM file <filepath> if it was parsed before with the same conditions,
+        otherwise parse the file and write its snapshot (see <snapshot.py>)
+        """
+        try:
+            snapshotPath = snapshot.getSnapshotPath(filepath, self)
+        except OSError as e:
+            print("OSM snapshots are unavailable: %s" % e)
+            self.parseFile(filepath, **kwargs)
+            return
+        
+        if snapshotPath.is_file() and snapshot.load(self, snapshotPath, kwargs.get("forceExtentCalculation")):
+            print("Loaded the OSM snapshot %s" % snapshotPath.name)
+            self.finishParse()
+            return
+        
+        self.recorder = snapshot.SnapshotRecorder(self)
+        try:
+            self.parseFile(filepath, **kwargs)
+            self.recorder.write(snapshotPath)
+        finally:
+            self.recorder = None
+        snapshot.pruneSnapshots()
+    
+    @staticmethod
+    def iterElements(filepath):
+        """
+        A generator of the children of the root element of the OSM file <filepath>.
+        The file is parsed incrementally and each element is cleared after it has been processed,
+        so the document tree isn't kept in memory next to <self.nodes>, <self.ways> and <self.relations>.
+        """
+        root = None
+        depth = 0
+        for event, e in etree.iterparse(filepath, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = e
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1:
+                    yield e
+                    e.clear()
+                    # drop the reference to <e> from the root element
+                    root.clear()
+    
+    def parseStream(self, tileStream, **kwargs):
+        """
+        Parse OSM elements arriving in batches, e.g. tile by tile from
+        <route.utils.OverpassFetcher.iter_write(..)>, while the next batches are still being downloaded.
+        The concatenated batches must have the same order as the children of an OSM file.
+        A batch is a list of elements or a <parallel.Tile> if the batches were already decoded
+        on the thread downloading them (see <parallel.decodeElements(..)>).
+        """
+        tileStream = iter(tileStream)
+        first = next(tileStream, None)
+        if isinstance(first, parallel.Tile):
+            self.parseDecodedTiles(chain((first,), tileStream), **kwargs)
+        else:
+            self.parseElements(chain(first or (), chain.from_iterable(tileStream)), **kwargs)
+    
+    def parsePbf(self, filepath, **kwargs):
+        """
+        Parse an .osm.pbf file. The decoded elements go through the same conditions
+        and managers as the elements of an XML file.
+        The keyword argument <workers> sets the number of processes decoding the file blocks;
+        by default it's chosen from the file size and the number of CPUs if <app.osmParallelDecode> is set.
+        """
         forceExtentCalculation = kwargs.get("forceExtentCalculation")
+        workers = kwargs.get("workers")
+        if workers is None and not self.parallelDecode():
+            workers = 0
         
-        osm = etree.parse(filepath).getroot()
+        if not self.projection:
+            self.projection = self.app.projection
+        
+        pbf = PbfFile(filepath)
+        if pbf.bbox:
+            forceExtentCalculation = self.setBounds(*pbf.bbox, forceExtentCalculation)
+        types = Osm.types
+        roles = Osm.roles
+        for nodes, ways, relations in pbf.blocks(workers):
+            for _id, lat, lon, tags in nodes:
+                self.addNode(_id, lat, lon, tags)
+            for _id, refs, tags in ways:
+                self.addWay(str(_id), refs, tags, forceExtentCalculation)
+            for _id, members, tags in relations:
+                self.addRelation(
+                    str(_id),
+                    [(types[mType], str(mId), roles.get(mRole)) for mType, mId, mRole in members],
+                    tags
+                )
+        
+        self.finishParse()
+    
+    def parseTiles(self, sources, **kwargs):
+        """
+        Parse OSM documents or chunks of an OSM file in worker processes (see <parallel.py>)
+        and merge the decoded tiles in the order of <sources>. A node, way or relation that was
+        already met in a preceding tile (e.g. a node on a tile boundary) is skipped,
+        like in <route.utils.OverpassFetcher> merging the tiles downloaded from Overpass.
+        """
+        workers = kwargs.get("workers")
+        if workers is None:
+            workers = parallel.defaultWorkers() if self.parallelDecode() else 0
+        self.parseDecodedTiles(parallel.decodeTiles(sources, workers), **kwargs)
+    
+    def parseDecodedTiles(self, tiles, **kwargs):
+        """
+        Merge the decoded tiles <tiles> (see <parallel.Tile>) in their order and
+        pass their elements to the conditions and managers
+        """
+        forceExtentCalculation = kwargs.get("forceExtentCalculation")
         
-        # <self.projection> could be set during a previous call of <self.parse(..)>
         if not self.projection:
             self.projection = self.app.projection
         
-        relations = self.relations
+        nodes = self.nodes
+        # the nodes with an index below <firstNode> come from a previously parsed file
+        firstNode = len(nodes.lats)
+        seenWays = set()
+        seenRelations = set()
+        types = Osm.types
+        roles = Osm.roles
+        for tile in tiles:
+            nodeIds, nodeLats, nodeLons, nodeTags = tile.nodeIds, tile.nodeLats, tile.nodeLons, tile.nodeTags
+            wayIds, wayRefs, wayRefStarts, wayTags = tile.wayIds, tile.wayRefs, tile.wayRefStarts, tile.wayTags
+            b = n = w = r = 0
+            for kind in tile.kinds:
+                if kind == snapshot.NODE:
+                    _id = nodeIds[n]
+                    if nodes.index.get(_id, -1) < firstNode:
+                        self.addNode(_id, nodeLats[n], nodeLons[n], nodeTags.get(n))
+                    n += 1
+                elif kind == snapshot.WAY:
+                    _id = wayIds[w]
+                    if not _id in seenWays:
+                        seenWays.add(_id)
+                        self.addWay(
+                            str(_id), wayRefs[wayRefStarts[w]:wayRefStarts[w+1]], wayTags.get(w),
+                            forceExtentCalculation
+                        )
+                    w += 1
+                elif kind == snapshot.RELATION:
+                    _id, members, tags = tile.relations[r]
+                    if not _id in seenRelations:
+                        seenRelations.add(_id)
+                        self.addRelation(
+                            _id,
+                            [
+                                (types[mType], mId, roles.get(mRole)) for mType, mId, mRole in members
+                                if mType in types and mId
+                            ],
+                            tags
+                        )
+                    r += 1
+                else:
+                    forceExtentCalculation = self.setBounds(*tile.bounds[4*b:4*b+4], forceExtentCalculation)
+                    b += 1
+        
+        self.finishParse()
+    
+    def parseElements(self, elements, **kwargs):
+        forceExtentCalculation = kwargs.get("forceExtentCalculation")
         
-        for e in osm: # e stands for element
+        # <self.projection> could be set during a previous call of <self.parse(..)>
+        if not self.projection:
+            self.projection = self.app.projection
+        
+        for e in elements: # e stands for element
             attrs = e.attrib
             if "action" in attrs and attrs["action"] == "delete": continue
             if e.tag == "node":
-                _id = attrs["id"]
                 tags = None
                 for c in e:
                     if c.tag == "tag":
                         if not tags:
                             tags = {}
                         tags[c.get("k")] = c.get("v")
-                node = Node(float(attrs["lat"]), float(attrs["lon"]), tags)
-                if tags:
-                    condition = self.checkNodeConditions(tags, node)
-                    if condition:
-                        self.processCondition(condition, node, _id, self.parseNode)
-                        # set <node> for rendering by appending it to <self.rNodes>
-                        self.rNodes.append(node)
-                self.nodes[_id] = node
+                self.addNode(int(attrs["id"]), float(attrs["lat"]), float(attrs["lon"]), tags)
             elif e.tag == "way":
                 _id = attrs["id"]
-                print(f"[DEBUG] Osm.parse: Processing way ID: {_id}")
                 nodes = []
                 tags = None
                 for c in e:
                     if c.tag == "nd":
-                        nodes.append(c.get("ref"))
+                        nodes.append(int(c.get("ref")))
                     elif c.tag == "tag":
                         if not tags:
                             tags = {}
                         tags[c.get("k")] = c.get("v")
-                way = Way(nodes, tags, self)
-                if way.valid:
-                    # do we need to skip the OSM <way> from storing in <self.ways>
-                    skip = False
-                    if tags:
-                        tags["id"] = _id
-                        condition = self.checkConditions(tags, way)
-                        if condition:
-                            skip = self.processCondition(condition, way, _id, self.parseWay)
-                            if (not self.projection or forceExtentCalculation) and way.valid:
-                                self.updateBounds(way)
-                    if not skip:
-                        self.ways[_id] = way
+                self.addWay(_id, nodes, tags, forceExtentCalculation)
             elif e.tag == "relation":
                 _id = attrs["id"]
-                print(f"[DEBUG] Osm.parse: Processing relation ID: {_id}")
                 members = []
                 tags = None
-                relation = None
                 for c in e:
                     if c.tag == "member":
                         mType = Osm.types.get( c.get("type") )
@@ -140,47 +329,153 @@ class Osm:
                     elif c.tag == "tag":
                         if not tags:
                             tags = {}
-                        k = c.get("k")
-                        v = c.get("v")
-                        tags[k] = v
-                        if k == "type":
-                            relation = Osm.relationTypes.get(v)
-                # skip the relation without tags
-                if relation and tags:
-                    tags["id"] = _id
-                    createdBefore = _id in relations
-                    if createdBefore:
-                        # The empty OSM relation was created before,
-                        # since it's referenced by another OSM relation
-                        relation = relations[_id]
-                    else:
-                        relation = relation(self)
-                    if relation.valid:
-                        condition = self.checkConditions(tags, relation)
-                        if condition:
-                            complete = relation.process(members, tags, self)
-                            if complete:
-                                if relation.valid:
-                                    skip = self.processCondition(condition, relation, _id, self.parseRelation)
-                                    if not createdBefore and not skip:
-                                        relations[_id] = relation
-                            else:
-                                self.app.incompleteRelations.append((relation, _id, members, tags, condition))
+                        tags[c.get("k")] = c.get("v")
+                self.addRelation(_id, members, tags)
             elif e.tag == "bounds":
-                # If <self.projection> isn't set,
-                # it means we need to set <self.projection> here,
-                # using <bounds> from the OSM file
-                if not self.projection:
-                    # also set the area extent
-                    self.minLat = float(attrs["minlat"])
-                    self.maxLat = float(attrs["maxlat"])
-                    self.minLon = float(attrs["minlon"])
-                    self.maxLon = float(attrs["maxlon"])
-                    lat = ( self.minLat + self.maxLat )/2.
-                    lon = ( self.minLon + self.maxLon )/2.
-                    self.setProjection(lat, lon)
-                    forceExtentCalculation = False
+                forceExtentCalculation = self.setBounds(
+                    float(attrs["minlat"]), float(attrs["minlon"]),
+                    float(attrs["maxlat"]), float(attrs["maxlon"]),
+                    forceExtentCalculation
+                )
         
+        self.finishParse()
+    
+    def addNode(self, _id, lat, lon, tags, conditionIndex=None):
+        """
+        <conditionIndex> is the position of the node condition recorded in a snapshot (see <self.useCondition(..)>)
+        """
+        condition = None
+        # only the nodes to be rendered get an instance of <Node>
+        if tags and self.nodeConditions:
+            node = Node(lat, lon, tags)
+            condition = self.checkNodeConditions(tags, node) if conditionIndex is None else\
+                self.useCondition(self.nodeConditions, conditionIndex, tags, node)
+        # record the tags before a manager gets a chance to change them
+        if self.recorder:
+            self.recorder.node(_id, lat, lon, tags, condition)
+        if tags:
+            tags = self.internTags(tags)
+            if condition:
+                node.tags = tags
+        self.nodes.add(_id, lat, lon, tags)
+        if condition:
+            self.processCondition(condition, node, _id, self.parseNode)
+            # set <node> for rendering by appending it to <self.rNodes>
+            self.rNodes.append(node)
+    
+    def addWay(self, _id, nodes, tags, forceExtentCalculation, conditionIndex=None):
+        """
+        <nodes> is a list of integer ids of the OSM nodes of the way,
+        <conditionIndex> is the position of the condition recorded in a snapshot (see <self.useCondition(..)>)
+        """
+        if tracer.level: tracer.sample("way", "way %s", _id)
+        way = Way(array("q", nodes), tags, self)
+        condition = None
+        if way.valid:
+            # do we need to skip the OSM <way> from storing in <self.ways>
+            skip = False
+            if tags:
+                tags["id"] = _id
+                condition = self.checkConditions(tags, way) if conditionIndex is None else\
+                    self.useCondition(self.conditions, conditionIndex, tags, way)
+            if self.recorder:
+                self.recorder.way(_id, nodes, tags, condition)
+            if tags:
+                way.tags = self.internTags(tags)
+            if condition:
+                skip = self.processCondition(condition, way, _id, self.parseWay)
+                if (not self.projection or forceExtentCalculation) and way.valid:
+                    self.updateBounds(way)
+            if not skip:
+                self.ways[_id] = way
+    
+    def addRelation(self, _id, members, tags, conditionIndex=None):
+        """
+        <members> is a list of tuples (memberType, memberId, memberRole) with
+        <memberType> and <memberRole> converted with <Osm.types> and <Osm.roles>,
+        <conditionIndex> is the position of the condition recorded in a snapshot (see <self.useCondition(..)>)
+        """
+        if tracer.level: tracer.sample("relation", "relation %s", _id)
+        relations = self.relations
+        relation = Osm.relationTypes.get(tags.get("type")) if tags else None
+        # skip the relation without tags
+        if relation and tags:
+            tags["id"] = _id
+            createdBefore = _id in relations
+            if createdBefore:
+                # The empty OSM relation was created before,
+                # since it's referenced by another OSM relation
+                relation = relations[_id]
+            else:
+                relation = relation(self)
+            if relation.valid:
+                condition = self.checkConditions(tags, relation) if conditionIndex is None else\
+                    self.useCondition(self.conditions, conditionIndex, tags, relation)
+                if self.recorder:
+                    self.recorder.relation(_id, members, tags, condition)
+                if condition:
+                    tags = self.internTags(tags)
+                    complete = relation.process(members, tags, self)
+                    if complete:
+                        if relation.valid:
+                            skip = self.processCondition(condition, relation, _id, self.parseRelation)
+                            if not createdBefore and not skip:
+                                relations[_id] = relation
+                    else:
+                        self.app.incompleteRelations.append((relation, _id, members, tags, condition))
+    
+    def internTags(self, tags):
+        """
+        Replace the Python dictionary <tags> of an OSM element to be stored with a view of interned tags
+        (see <tags.TagTable>)
+        """
+        tagTable = self.tagTable
+        if tagTable is None:
+            # the conditions are known now
+            tagTable = self.tagTable = TagTable(
+                self.getUsedTagKeys() if getattr(self.app, "osmDropUnusedTags", False) else None
+            )
+        return tagTable.wrap(tags)
+    
+    def getUsedTagKeys(self):
+        """
+        The tag keys preserved if the tags not used for the import are dropped:
+        the keys of the tag conditions and the keys read by the managers and renderers
+        """
+        keys = set(USED_TAG_KEYS)
+        for conditions in (self.conditions, self.nodeConditions):
+            for c in conditions:
+                if isinstance(c[0], TagCondition):
+                    keys.update(c[0].spec)
+        return keys
+    
+    def setBounds(self, minLat, minLon, maxLat, maxLon, forceExtentCalculation):
+        """
+        Use the bounds stored in an OSM file. Returns the new value of <forceExtentCalculation>.
+        """
+        if self.recorder:
+            self.recorder.bounds(minLat, minLon, maxLat, maxLon)
+        # If <self.projection> isn't set,
+        # it means we need to set <self.projection> here,
+        # using <bounds> from the OSM file
+        if not self.projection:
+            # also set the area extent
+            self.minLat = minLat
+            self.maxLat = maxLat
+            self.minLon = minLon
+            self.maxLon = maxLon
+            lat = ( self.minLat + self.maxLat )/2.
+            lon = ( self.minLon + self.maxLon )/2.
+            self.setProjection(lat, lon)
+            forceExtentCalculation = False
+        return forceExtentCalculation
+    
+    def finishParse(self):
+        missingWays = getattr(self.app, "missingWays", None)
+        if missingWays:
+            # Members of incomplete relations may come later in the file than the relations themselves.
+            # They are available now, so they don't have to be downloaded
+            missingWays.difference_update(self.ways)
         # The condition <self.firstPoint> means that the method <updateBounds(..)> was never called
         # and there was no OSM way with tags that satisfy <self.conditions>. There were
         # only incomplete relations available that satisfy <self.conditions>.
@@ -191,20 +486,44 @@ class Osm:
             lat = (self.minLat + self.maxLat)/2.
             lon = (self.minLon + self.maxLon)/2.
             self.setProjection(lat, lon)
+        if self.projection:
+            self.nodes.projectAll(self.projection)
     
     def checkConditions(self, tags, element):
-        for c in self.conditions:
-            if c[0](tags, element):
-                # setting manager
-                element.m = c[1]
-                return c
+        conditions = self.conditions
+        # <self.conditions> is replaced in <app.createLayers(..)>, so compile the conditions when they change
+        if self.conditionDispatch[0] is not conditions:
+            self.conditionDispatch = (conditions, compileConditions(conditions))
+        c = findCondition(conditions, self.conditionDispatch[1], tags, element)
+        if c:
+            # setting manager
+            element.m = c[1]
+            return c
 
     def checkNodeConditions(self, tags, element):
-        for c in self.nodeConditions:
-            if c[0](tags, element):
-                # setting manager
-                element.m = c[1]
-                return c
+        conditions = self.nodeConditions
+        if self.nodeConditionDispatch[0] is not conditions:
+            self.nodeConditionDispatch = (conditions, compileConditions(conditions))
+        c = findCondition(conditions, self.nodeConditionDispatch[1], tags, element)
+        if c:
+            # setting manager
+            element.m = c[1]
+            return c
+    
+    def useCondition(self, conditions, conditionIndex, tags, element):
+        """
+        Use the condition found for <element> during the parsing recorded in a snapshot
+        instead of searching for it. A negative <conditionIndex> means that no condition was satisfied.
+        """
+        if conditionIndex < 0:
+            return None
+        c = conditions[conditionIndex]
+        if not isinstance(c[0], TagCondition):
+            # a lambda condition may also change <element>, e.g. mark it as invalid
+            c[0](tags, element)
+        # setting manager
+        element.m = c[1]
+        return c
     
     def processCondition(self, condition, element, elementId, parseElement):
         # do we need to skip the OSM <element> from storing in <self.ways> or <self.relations>
@@ -238,10 +557,9 @@ class Osm:
         # <way> has been already used for bounds calculation
         if way.used:
             return
+        latLon = self.nodes.latLon
         for i in range(way.n):
-            node = self.nodes[way.nodes[i]]
-            lat = node.lat
-            lon = node.lon
+            lat, lon = latLon(way.nodes[i])
             if self.firstPoint:
                 self.minLat = self.maxLat = lat
                 self.minLon = self.maxLon = lon
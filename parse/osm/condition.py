@@ -0,0 +1,94 @@
+class TagCondition:
+    """
+    A condition for <Osm.addCondition(..)> or <Osm.addNodeCondition(..)> that only looks at tag values.
+
+    <spec> is a Python dictionary mapping an OSM tag key to an accepted tag value, a tuple of
+    accepted tag values or None if any value of the tag is accepted. The condition is satisfied
+    if any of the keys matches, e.g. TagCondition({"natural": "wood", "landuse": "forest"}).
+
+    Since the condition declares what it matches, <Osm> finds it with dictionary lookups
+    on the element tags instead of calling it (see <compileConditions(..)>).
+    An instance can still be called like a lambda condition.
+    """
+
+    __slots__ = ("spec",)
+
+    def __init__(self, spec):
+        self.spec = {
+            key: None if values is None else ((values,) if isinstance(values, str) else tuple(values))
+            for key, values in spec.items()
+        }
+
+    def __call__(self, tags, e):
+        for key, values in self.spec.items():
+            value = tags.get(key)
+            if value is not None and (values is None or value in values):
+                return True
+        return False
+
+    @property
+    def __name__(self):
+        return "TagCondition(%s)" % ", ".join(
+            key if values is None else "%s=%s" % (key, "|".join(values))
+            for key, values in self.spec.items()
+        )
+
+
+def compileConditions(conditions):
+    """
+    Build the dispatch structures for a sequence of conditions as stored in <Osm.conditions>.
+
+    Returns a tuple (index, generic):
+        <index[key]> is a tuple (values, anyValue) for every tag key used by a <TagCondition>,
+            <values[value]> is the position of the first condition matching the tag <key>=<value>,
+            <anyValue> is the position of the first condition matching any value of <key>
+            (<len(conditions)> if there is none)
+        <generic> is a tuple with the positions of the other conditions (e.g. lambdas); they are called in order
+    """
+    numConditions = len(conditions)
+    index = {}
+    generic = []
+    for i, c in enumerate(conditions):
+        condition = c[0]
+        if not isinstance(condition, TagCondition):
+            generic.append(i)
+            continue
+        for key, values in condition.spec.items():
+            keyValues, anyValue = index.get(key, ({}, numConditions))
+            if values is None:
+                anyValue = min(anyValue, i)
+            else:
+                for value in values:
+                    if not value in keyValues:
+                        keyValues[value] = i
+            index[key] = (keyValues, anyValue)
+    # a condition matching any value of the key also covers the values of the conditions following it
+    for keyValues, anyValue in index.values():
+        for value, i in keyValues.items():
+            if anyValue < i:
+                keyValues[value] = anyValue
+    return index, tuple(generic)
+
+
+def findCondition(conditions, dispatch, tags, element):
+    """
+    Returns the first condition from <conditions> satisfied by <tags> and <element> or None.
+    <dispatch> is the result of <compileConditions(conditions)>.
+    """
+    index, generic = dispatch
+    best = len(conditions)
+    for key in tags:
+        entry = index.get(key)
+        if entry:
+            i = entry[0].get(tags[key], entry[1])
+            if i < best:
+                best = i
+    # only the generic conditions placed before <best> can take precedence over it
+    for i in generic:
+        if i > best:
+            break
+        c = conditions[i]
+        if c[0](tags, element):
+            return c
+    if best < len(conditions):
+        return conditions[best]
@@ -1,10 +1,11 @@
 class Node:
     """
-    A class to represent an OSM node
+    A class to represent an OSM node to be rendered, i.e. satisfying one of <Osm.nodeConditions>.
+    All OSM nodes are kept in <node_store.NodeStore>.
     
     Some attributes:
         l (app.Layer): layer used to place the related geometry to a specific Blender object
-        tags (dict): OSM tags
+        tags (tags.Tags): OSM tags, a view of interned tags
         m: A manager used during the rendering; if None, <manager.BaseManager> applies defaults
             during the rendering
         rr: A special renderer for the OSM node
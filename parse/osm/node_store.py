@@ -0,0 +1,195 @@
+from array import array
+
+
+NAN = float("nan")
+
+
+class NodeStore:
+    """
+    Compact storage of OSM nodes used as <Osm.nodes>.
+
+    Node ids (integers) are mapped to indices into contiguous arrays of latitudes and longitudes and
+    of projected x and y coordinates. The projected coordinates are NaN until they are requested.
+    Tags, the sets <b> and <w> and non-zero projected z coordinates are kept in sparse side tables
+    keyed by the index, since only a small part of the nodes uses them.
+
+    The store behaves like a Python dictionary of the node ids (<in>, <len(..)>, iteration, <get(..)>);
+    <store[nodeId]> returns a <StoredNode> accessor with the attributes of <node.Node>.
+    """
+
+    __slots__ = ("index", "lats", "lons", "xs", "ys", "zs", "tags", "b", "w", "numProjected")
+
+    def __init__(self):
+        self.index = {}
+        self.lats = array("d")
+        self.lons = array("d")
+        self.xs = array("d")
+        self.ys = array("d")
+        self.zs = {}
+        self.tags = {}
+        self.b = {}
+        self.w = {}
+        # the nodes with the indices below <numProjected> went through <self.projectAll(..)>
+        self.numProjected = 0
+
+    def add(self, _id, lat, lon, tags=None):
+        """
+        Add the OSM node <_id> or replace the data of a node with the same id.
+        Returns the index of the node.
+        """
+        i = self.index.get(_id)
+        if i is None:
+            i = len(self.lats)
+            self.index[_id] = i
+            self.lats.append(lat)
+            self.lons.append(lon)
+            self.xs.append(NAN)
+            self.ys.append(NAN)
+        else:
+            # the node was already defined, e.g. in a previously parsed OSM file
+            self.lats[i] = lat
+            self.lons[i] = lon
+            self.xs[i] = NAN
+            self.ys[i] = NAN
+            self.zs.pop(i, None)
+            self.b.pop(i, None)
+            self.w.pop(i, None)
+        if tags:
+            self.tags[i] = tags
+        else:
+            self.tags.pop(i, None)
+        return i
+
+    def __contains__(self, _id):
+        return _id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __getitem__(self, _id):
+        return StoredNode(self, self.index[_id])
+
+    def get(self, _id, default=None):
+        i = self.index.get(_id)
+        return default if i is None else StoredNode(self, i)
+
+    def items(self):
+        return ((_id, StoredNode(self, i)) for _id, i in self.index.items())
+
+    def latLon(self, _id):
+        i = self.index[_id]
+        return self.lats[i], self.lons[i]
+
+    def getData(self, _id, osm):
+        """
+        Get projected coordinates of the OSM node <_id>
+        """
+        return self.project(self.index[_id], osm.projection)
+
+    def iterData(self, ids, projection):
+        """
+        A generator of projected coordinates of the OSM nodes with the ids from the iterable <ids>
+        """
+        index = self.index
+        xs = self.xs
+        ys = self.ys
+        zs = self.zs
+        for _id in ids:
+            i = index[_id]
+            x = xs[i]
+            if x != x:
+                yield self.project(i, projection)
+            else:
+                yield (x, ys[i], zs.get(i, 0.) if zs else 0.)
+
+    def projectAll(self, projection):
+        """
+        Project in one pass all nodes added since the previous call.
+        A node replaced later by <self.add(..)> is projected on demand.
+        """
+        start = self.numProjected
+        end = len(self.lats)
+        if start == end:
+            return
+        batch = getattr(projection, "fromGeographicBatch", None)
+        if batch:
+            xs, ys = batch(self.lats[start:end], self.lons[start:end])
+            self.xs[start:end] = xs
+            self.ys[start:end] = ys
+        else:
+            for i in range(start, end):
+                if self.xs[i] != self.xs[i]:
+                    self.project(i, projection)
+        self.numProjected = end
+
+    def project(self, i, projection):
+        """
+        Get projected coordinates of the node with the index <i>,
+        preserving them in the local system of reference for a future use
+        """
+        x = self.xs[i]
+        # <x != x> is True only for NaN, i.e. for the node that hasn't been projected yet
+        if x != x:
+            coords = projection.fromGeographic(self.lats[i], self.lons[i])
+            self.xs[i] = coords[0]
+            self.ys[i] = coords[1]
+            if coords[2]:
+                self.zs[i] = coords[2]
+            return coords
+        return (x, self.ys[i], self.zs.get(i, 0.))
+
+
+class StoredNode:
+    """
+    A thin accessor to an OSM node kept in a <NodeStore>, so the code written for
+    instances of <node.Node> keeps working with the nodes of OSM ways and relations
+    """
+
+    __slots__ = ("store", "i")
+
+    valid = True
+    rr = None
+
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+
+    @property
+    def lat(self):
+        return self.store.lats[self.i]
+
+    @property
+    def lon(self):
+        return self.store.lons[self.i]
+
+    @property
+    def tags(self):
+        return self.store.tags.get(self.i)
+
+    @property
+    def coords(self):
+        x = self.store.xs[self.i]
+        return None if x != x else (x, self.store.ys[self.i], self.store.zs.get(self.i, 0.))
+
+    @property
+    def b(self):
+        b = self.store.b.get(self.i)
+        if b is None:
+            b = self.store.b[self.i] = {}
+        return b
+
+    @property
+    def w(self):
+        w = self.store.w.get(self.i)
+        if w is None:
+            w = self.store.w[self.i] = {}
+        return w
+
+    def getData(self, osm):
+        """
+        Get projected coordinates
+        """
+        return self.store.project(self.i, osm.projection)
@@ -0,0 +1,304 @@
+"""
+Decoding of OSM XML in worker processes.
+
+An OSM XML file is split into chunks at the boundaries of its top-level elements (<splitFile(..)>).
+Each chunk, or each OSM document given as bytes (e.g. an Overpass tile payload), is decoded
+in a worker process into compact arrays (<decodeTile(..)>), which are cheap to send back to
+the calling process. <Osm.parseTiles(..)> merges the decoded tiles in their original order
+and passes the elements to the conditions and managers.
+"""
+
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+import xml.etree.cElementTree as etree
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .snapshot import BOUNDS, NODE, WAY, RELATION
+
+
+# XML files smaller than this are parsed in the calling process
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+MAX_WORKERS = 8
+# the approximate size of a chunk of an XML file decoded by a worker
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# the start of a top-level element; the nested elements of OSM (<nd>, <tag>, <member>) have other names
+elementStart = re.compile(rb"<(?:node|way|relation)[\s/>]")
+
+# Run by <exec(..)> in a new worker process before it imports this module. The packages containing
+# this module are registered without running their <__init__.py>, which imports the modules of Blender.
+registerPackages = """
+import sys, types
+for name, path in packages:
+    if not name in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = path
+        sys.modules[name] = package
+"""
+
+
+def defaultWorkers(size=None, minBytes=PARALLEL_MIN_BYTES):
+    """
+    The number of worker processes for <size> bytes of OSM data (unknown if None),
+    0 if the data is decoded in the calling process
+    """
+    cpus = os.cpu_count() or 1
+    if cpus < 2 or (size is not None and size < minBytes):
+        return 0
+    return min(cpus - 1, MAX_WORKERS)
+
+
+def _packages():
+    """
+    The names and the search paths of the packages containing this module
+    """
+    names = __name__.split(".")[:-1]
+    return [
+        (".".join(names[:i]), list(sys.modules[".".join(names[:i])].__path__))
+        for i in range(1, len(names) + 1)
+    ]
+
+
+def imapOrdered(func, items, workers, label):
+    """
+    A generator of <func(item)> for <items> in their order, computed in <workers> processes.
+    <func> must be a module level function. A bounded number of items is in flight, so memory use
+    doesn't grow with the number of items. If the process pool can't be used, the items are
+    processed in this process.
+    The worker processes are spawned rather than forked, since forking Blender,
+    a multi-threaded process, isn't safe.
+    """
+    items = iter(items)
+    if workers <= 0:
+        for item in items:
+            yield func(item)
+        return
+
+    try:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=exec,
+            initargs=(registerPackages, {"packages": _packages()})
+        )
+    except (OSError, NotImplementedError, ImportError) as e:
+        print("%s: parallel decoding unavailable (%s), decoding in this process" % (label, e))
+        for item in items:
+            yield func(item)
+        return
+    pending = []
+    try:
+        for item in items:
+            pending.append((item, pool.submit(func, item)))
+            if len(pending) >= 2 * workers:
+                # the item leaves <pending> only after its result is available,
+                # so the item of a broken pool is processed in this process below
+                result = pending[0][1].result()
+                pending.pop(0)
+                yield result
+        while pending:
+            result = pending[0][1].result()
+            pending.pop(0)
+            yield result
+    except BrokenProcessPool as e:
+        # e.g. the worker processes can't import this module
+        print("%s: parallel decoding failed (%s), decoding in this process" % (label, e))
+        for item, _ in pending:
+            yield func(item)
+        for item in items:
+            yield func(item)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def splitFile(filepath, numChunks=None):
+    """
+    Split the OSM XML file <filepath> into chunks of whole top-level elements.
+    Returns a list of tuples (filepath, prolog, start, end) accepted by <decodeTile(..)>,
+    where <prolog> is the part of the file preceding its root element.
+    """
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        rootStart = mm.find(b"<osm")
+        if rootStart < 0:
+            raise ValueError("%s isn't an OSM XML file" % os.path.basename(filepath))
+        prolog = mm[:rootStart]
+        start = mm.find(b">", rootStart) + 1
+        end = mm.rfind(b"</osm>")
+        if end < start:
+            # an empty root element (<osm/>) or a truncated file
+            end = start
+        if not numChunks:
+            numChunks = max(1, (end - start) // CHUNK_BYTES)
+        spans = []
+        chunkStart = start
+        for k in range(1, numChunks):
+            match = elementStart.search(mm, max(chunkStart + 1, start + k * (end - start) // numChunks), end)
+            if not match:
+                break
+            if match.start() > chunkStart:
+                spans.append((filepath, prolog, chunkStart, match.start()))
+                chunkStart = match.start()
+        spans.append((filepath, prolog, chunkStart, end))
+    return spans
+
+
+class Tile:
+    """
+    The elements of a decoded OSM document or of a part of it in compact arrays.
+
+    <kinds> holds the kind (<snapshot.NODE>, <snapshot.WAY>, <snapshot.RELATION>, <snapshot.BOUNDS>)
+    of each element in the document order, the other attributes hold the data of the elements of each kind.
+    Tags are kept in Python dictionaries keyed by the position of the element within its kind.
+    """
+
+    __slots__ = (
+        "kinds", "bounds",
+        "nodeIds", "nodeLats", "nodeLons", "nodeTags",
+        "wayIds", "wayRefs", "wayRefStarts", "wayTags",
+        "relations"
+    )
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.bounds = array("d")
+        self.nodeIds = array("q")
+        self.nodeLats = array("d")
+        self.nodeLons = array("d")
+        self.nodeTags = {}
+        self.wayIds = array("q")
+        self.wayRefs = array("q")
+        self.wayRefStarts = array("q", (0,))
+        self.wayTags = {}
+        # a list of tuples (id, members, tags), a member is a tuple of strings (type, ref, role)
+        self.relations = []
+
+
+def _iterSource(source):
+    """
+    Yield the pieces of the OSM document <source> (see <decodeTile(..)>) to be fed to an XML parser
+    """
+    if isinstance(source, (bytes, bytearray)):
+        yield source
+        return
+    filepath, prolog, start, end = source
+    yield prolog
+    yield b"<osm>"
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = f.read(min(remaining, 1 << 20))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    yield b"</osm>"
+
+
+def decodeTile(source):
+    """
+    Decode an OSM document into a <Tile>. <source> is either the document itself as bytes
+    or a chunk of an OSM file as returned by <splitFile(..)>.
+    Module level function, so it can run in a process pool.
+    """
+    tile = Tile()
+    kinds = tile.kinds
+    parser = etree.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+    for data in _iterSource(source):
+        parser.feed(data)
+        for event, e in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = e
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            _decodeElement(e, tile, kinds)
+            root.clear()
+    parser.close()
+    return tile
+
+
+def _getTags(e):
+    tags = None
+    for c in e:
+        if c.tag == "tag":
+            if not tags:
+                tags = {}
+            tags[c.get("k")] = c.get("v")
+    return tags
+
+
+def _decodeElement(e, tile, kinds):
+    attrs = e.attrib
+    if attrs.get("action") == "delete":
+        return
+    if e.tag == "node":
+        tags = _getTags(e)
+        if tags:
+            tile.nodeTags[len(tile.nodeIds)] = tags
+        tile.nodeIds.append(int(attrs["id"]))
+        tile.nodeLats.append(float(attrs["lat"]))
+        tile.nodeLons.append(float(attrs["lon"]))
+        kinds.append(NODE)
+    elif e.tag == "way":
+        refs = tile.wayRefs
+        tags = None
+        for c in e:
+            if c.tag == "nd":
+                refs.append(int(c.get("ref")))
+            elif c.tag == "tag":
+                if not tags:
+                    tags = {}
+                tags[c.get("k")] = c.get("v")
+        if tags:
+            tile.wayTags[len(tile.wayIds)] = tags
+        tile.wayIds.append(int(attrs["id"]))
+        tile.wayRefStarts.append(len(refs))
+        kinds.append(WAY)
+    elif e.tag == "relation":
+        members = []
+        tags = None
+        for c in e:
+            if c.tag == "member":
+                members.append((c.get("type"), c.get("ref"), c.get("role")))
+            elif c.tag == "tag":
+                if not tags:
+                    tags = {}
+                tags[c.get("k")] = c.get("v")
+        tile.relations.append((attrs["id"], members, tags))
+        kinds.append(RELATION)
+    elif e.tag == "bounds":
+        tile.bounds.extend((
+            float(attrs["minlat"]), float(attrs["minlon"]),
+            float(attrs["maxlat"]), float(attrs["maxlon"])
+        ))
+        kinds.append(BOUNDS)
+
+
+def decodeElements(elements):
+    """
+    Decode a batch of top-level OSM elements, e.g. a tile of <route.utils.OverpassFetcher.iter_write(..)>,
+    into a <Tile>. Used to decode the tiles on the thread downloading them.
+    """
+    tile = Tile()
+    kinds = tile.kinds
+    for e in elements:
+        _decodeElement(e, tile, kinds)
+    return tile
+
+
+def decodeTiles(sources, workers):
+    """
+    A generator of decoded tiles (see <decodeTile(..)>) for <sources> in their order
+    """
+    return imapOrdered(decodeTile, sources, workers, "OSM")
@@ -0,0 +1,344 @@
+"""
+Reader for OpenStreetMap .osm.pbf files without external dependencies.
+
+The file is a sequence of blobs (zlib or lzma compressed protobuf messages):
+an <OSMHeader> blob followed by <OSMData> blobs, each holding a primitive block
+with plain nodes, dense nodes, ways and relations. See
+https://wiki.openstreetmap.org/wiki/PBF_Format
+
+Blocks are decoded independently, so for large files the decoding is spread
+over a process pool while the calling process consumes the decoded blocks in
+file order.
+"""
+
+import lzma
+import os
+import zlib
+
+from .parallel import defaultWorkers, imapOrdered
+
+
+# Files smaller than this are decoded in the calling process
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+# Features of the OSM data model this reader understands
+SUPPORTED_FEATURES = {"OsmSchema-V0.6", "DenseNodes"}
+
+MEMBER_TYPES = ("node", "way", "relation")
+
+
+def _varint(buf, pos):
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7f
+    shift = 7
+    pos += 1
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _signed(value):
+    """Interpret a decoded varint as int64 (negative values use ten bytes)."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _zigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _fields(buf, pos, end):
+    """
+    Iterate over the fields of a protobuf message in <buf[pos:end]>.
+    Yields (fieldNumber, value); length-delimited values are (start, end) spans of <buf>.
+    """
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        wireType = key & 7
+        if wireType == 0:
+            value, pos = _varint(buf, pos)
+        elif wireType == 2:
+            length, pos = _varint(buf, pos)
+            value = (pos, pos + length)
+            pos += length
+        elif wireType == 1:
+            value = buf[pos:pos+8]
+            pos += 8
+        elif wireType == 5:
+            value = buf[pos:pos+4]
+            pos += 4
+        else:
+            raise ValueError("Unsupported protobuf wire type %s in PBF data" % wireType)
+        yield key >> 3, value
+
+
+def _packed(buf, span):
+    """Decode a packed repeated varint field"""
+    pos, end = span
+    values = []
+    append = values.append
+    while pos < end:
+        b = buf[pos]
+        pos += 1
+        if b < 0x80:
+            append(b)
+            continue
+        result = b & 0x7f
+        shift = 7
+        while True:
+            b = buf[pos]
+            pos += 1
+            result |= (b & 0x7f) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        append(result)
+    return values
+
+
+def _deltas(buf, span):
+    """Decode a packed, delta coded sint64 field"""
+    values = _packed(buf, span)
+    total = 0
+    for i, value in enumerate(values):
+        total += (value >> 1) ^ -(value & 1)
+        values[i] = total
+    return values
+
+
+def _tags(keys, vals, strings):
+    return {strings[k]: strings[v] for k, v in zip(keys, vals)} if keys else None
+
+
+def _blobData(blob):
+    """Uncompressed contents of a <Blob> message"""
+    raw = None
+    for field, value in _fields(blob, 0, len(blob)):
+        if field == 1:
+            raw = blob[value[0]:value[1]]
+        elif field == 3:
+            raw = zlib.decompress(blob[value[0]:value[1]])
+        elif field == 4:
+            raw = lzma.decompress(blob[value[0]:value[1]])
+        elif field in (5, 6, 7):
+            raise ValueError("Unsupported PBF blob compression (field %s)" % field)
+    if raw is None:
+        raise ValueError("Empty PBF blob")
+    return raw
+
+
+def decodeHeader(blob):
+    """
+    Decode an <OSMHeader> blob. Returns (bbox, requiredFeatures) with
+    <bbox> as (minLat, minLon, maxLat, maxLon) or None.
+    """
+    data = _blobData(blob)
+    bbox = None
+    required = []
+    for field, value in _fields(data, 0, len(data)):
+        if field == 1:
+            box = {}
+            for f, v in _fields(data, *value):
+                box[f] = _zigzag(v) / 1e9
+            if len(box) == 4:
+                # left, right, top, bottom
+                bbox = (box[4], box[1], box[3], box[2])
+        elif field == 4:
+            required.append(data[value[0]:value[1]].decode("utf-8"))
+    return bbox, required
+
+
+def decodeBlock(blob):
+    """
+    Decode an <OSMData> blob into the lists (nodes, ways, relations) with the items
+        nodes: (id, lat, lon, tags)
+        ways: (id, nodeIds, tags)
+        relations: (id, [(memberType, memberId, role), ...], tags)
+    <tags> is None for an element without tags. Module level function, so it can run in a process pool.
+    """
+    data = _blobData(blob)
+    strings = []
+    groups = []
+    granularity = 100
+    latOffset = lonOffset = 0
+    for field, value in _fields(data, 0, len(data)):
+        if field == 1:
+            strings = [data[s:e].decode("utf-8") for f, (s, e) in _fields(data, *value) if f == 1]
+        elif field == 2:
+            groups.append(value)
+        elif field == 17:
+            granularity = value
+        elif field == 19:
+            latOffset = _signed(value)
+        elif field == 20:
+            lonOffset = _signed(value)
+
+    nodes = []
+    ways = []
+    relations = []
+    for group in groups:
+        for field, value in _fields(data, *group):
+            if field == 2:
+                _decodeDense(data, value, strings, granularity, latOffset, lonOffset, nodes)
+            elif field == 1:
+                _decodeNode(data, value, strings, granularity, latOffset, lonOffset, nodes)
+            elif field == 3:
+                _decodeWay(data, value, strings, ways)
+            elif field == 4:
+                _decodeRelation(data, value, strings, relations)
+    return nodes, ways, relations
+
+
+def _decodeDense(data, span, strings, granularity, latOffset, lonOffset, nodes):
+    ids = lats = lons = keysVals = ()
+    for field, value in _fields(data, *span):
+        if field == 1:
+            ids = _deltas(data, value)
+        elif field == 8:
+            lats = _deltas(data, value)
+        elif field == 9:
+            lons = _deltas(data, value)
+        elif field == 10:
+            keysVals = _packed(data, value)
+    append = nodes.append
+    kv = 0
+    for _id, lat, lon in zip(ids, lats, lons):
+        tags = None
+        if keysVals:
+            while keysVals[kv]:
+                if tags is None:
+                    tags = {}
+                tags[strings[keysVals[kv]]] = strings[keysVals[kv+1]]
+                kv += 2
+            # skip the 0 delimiting the tags of the node
+            kv += 1
+        # dividing the exact integer gives the same float as the decimal in an XML file
+        append((_id, (latOffset + granularity * lat) / 1e9, (lonOffset + granularity * lon) / 1e9, tags))
+
+
+def _decodeNode(data, span, strings, granularity, latOffset, lonOffset, nodes):
+    _id = lat = lon = 0
+    keys = vals = ()
+    for field, value in _fields(data, *span):
+        if field == 1:
+            _id = _zigzag(value)
+        elif field == 2:
+            keys = _packed(data, value)
+        elif field == 3:
+            vals = _packed(data, value)
+        elif field == 8:
+            lat = _zigzag(value)
+        elif field == 9:
+            lon = _zigzag(value)
+    nodes.append((
+        _id,
+        (latOffset + granularity * lat) / 1e9,
+        (lonOffset + granularity * lon) / 1e9,
+        _tags(keys, vals, strings)
+    ))
+
+
+def _decodeWay(data, span, strings, ways):
+    _id = 0
+    keys = vals = refs = ()
+    for field, value in _fields(data, *span):
+        if field == 1:
+            _id = _signed(value)
+        elif field == 2:
+            keys = _packed(data, value)
+        elif field == 3:
+            vals = _packed(data, value)
+        elif field == 8:
+            refs = _deltas(data, value)
+    ways.append((_id, refs, _tags(keys, vals, strings)))
+
+
+def _decodeRelation(data, span, strings, relations):
+    _id = 0
+    keys = vals = roles = memberIds = types = ()
+    for field, value in _fields(data, *span):
+        if field == 1:
+            _id = _signed(value)
+        elif field == 2:
+            keys = _packed(data, value)
+        elif field == 3:
+            vals = _packed(data, value)
+        elif field == 8:
+            roles = _packed(data, value)
+        elif field == 9:
+            memberIds = _deltas(data, value)
+        elif field == 10:
+            types = _packed(data, value)
+    members = [
+        (MEMBER_TYPES[t], memberId, strings[role])
+        for t, memberId, role in zip(types, memberIds, roles)
+    ]
+    relations.append((_id, members, _tags(keys, vals, strings)))
+
+
+class PbfFile:
+    """
+    An .osm.pbf file. The header is read in the constructor;
+    <self.blocks(..)> yields the decoded data blocks in file order.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.bbox = None
+        with open(filepath, "rb") as f:
+            for blobType, blob in self._blobs(f):
+                if blobType == "OSMHeader":
+                    self.bbox, required = decodeHeader(blob)
+                    unsupported = set(required) - SUPPORTED_FEATURES
+                    if unsupported:
+                        raise ValueError(
+                            "%s requires unsupported PBF features: %s" %
+                            (os.path.basename(filepath), ", ".join(sorted(unsupported)))
+                        )
+                break
+
+    @staticmethod
+    def _blobs(f):
+        """Yield (type, blob) for the blobs of an open file"""
+        while True:
+            size = f.read(4)
+            if not size:
+                return
+            if len(size) < 4:
+                raise ValueError("Truncated PBF file")
+            header = f.read(int.from_bytes(size, "big"))
+            blobType = ""
+            dataSize = 0
+            for field, value in _fields(header, 0, len(header)):
+                if field == 1:
+                    blobType = header[value[0]:value[1]].decode("utf-8")
+                elif field == 3:
+                    dataSize = value
+            blob = f.read(dataSize)
+            if len(blob) < dataSize:
+                raise ValueError("Truncated PBF file")
+            yield blobType, blob
+
+    def _dataBlobs(self):
+        with open(self.filepath, "rb") as f:
+            for blobType, blob in self._blobs(f):
+                if blobType == "OSMData":
+                    yield blob
+
+    def defaultWorkers(self):
+        return defaultWorkers(os.path.getsize(self.filepath), PARALLEL_MIN_BYTES)
+
+    def blocks(self, workers=None):
+        """
+        Yield (nodes, ways, relations) for each data block (see <decodeBlock(..)>).
+        With <workers> > 0 the blocks are decoded in that many processes;
+        if the process pool can't be used, the decoding continues in this process.
+        """
+        if workers is None:
+            workers = self.defaultWorkers()
+        return imapOrdered(decodeBlock, self._dataBlobs(), workers, "PBF")
@@ -4,7 +4,7 @@ class Relation:
     
     Some attributes:
         l (app.Layer): layer index used to place the related geometry to a specific Blender object
-        tags (dict): OSM tags
+        tags (tags.Tags): OSM tags, a view of interned tags
         m: A manager used during the rendering, if None <manager.BaseManager> applies defaults
             during the rendering
         r (bool): Defines if we need to render (True) or not (False) the OSM relation
@@ -347,7 +347,7 @@ class Multipolygon(Relation):
         
         Returns a Python generator
         """
-        return (osm.nodes[nodeId].getData(osm) for nodeId in linestring.nodeIds(osm))
+        return osm.nodes.iterData(linestring.nodeIds(osm), osm.projection)
     
     def getOuterData(self, osm):
         """
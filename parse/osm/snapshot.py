@@ -0,0 +1,345 @@
+"""
+Binary snapshots of parsed OSM files.
+
+While an OSM file is parsed, a <SnapshotRecorder> attached to <Osm> records the decoded elements
+in parse order: node coordinates, the node ids of the ways, the members of the relations,
+the interned tags and the position of the condition each element matched.
+The recording is written to ~/.blosm/osm_snapshots, keyed by the hash of the file contents
+and a fingerprint of the conditions set by the setup script.
+
+Importing the same file again with the same setup replays the snapshot instead:
+the elements go to <Osm.addNode(..)>, <Osm.addWay(..)> and <Osm.addRelation(..)> with the
+recorded condition, so XML parsing and the condition matching are skipped, while the managers
+build their data exactly as after a regular parse.
+
+The file is a header followed by 8-byte aligned sections of packed arrays. It is memory-mapped
+on load, the sections are read through memoryviews without copying them.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import types
+from array import array
+from pathlib import Path
+
+from .condition import TagCondition
+
+
+VERSION = 1
+MAGIC = b"BLOSMSNP"
+SUFFIX = ".blosnap"
+# the number of snapshots kept on disk, the least recently used ones are removed
+MAX_SNAPSHOTS = 8
+
+# event kinds
+BOUNDS = 0
+NODE = 1
+WAY = 2
+RELATION = 3
+
+# name and typecode of the sections in the order they are written
+SECTIONS = (
+    ("kinds", "b"),
+    ("bounds", "d"),
+    ("nodeIds", "q"), ("nodeLats", "d"), ("nodeLons", "d"), ("nodeConditions", "i"), ("nodeTags", "q"),
+    ("wayIds", "q"), ("wayRefs", "q"), ("wayRefStarts", "q"), ("wayConditions", "i"), ("wayTags", "q"),
+    ("relationIds", "q"), ("memberTypes", "b"), ("memberIds", "q"), ("memberRoles", "b"),
+    ("memberStarts", "q"), ("relationConditions", "i"), ("relationTags", "q"),
+    ("tags", "i"),
+    ("strings", "B"), ("stringStarts", "q"),
+)
+
+
+def getSnapshotDir():
+    snapshotDir = Path.home() / ".blosm" / "osm_snapshots"
+    snapshotDir.mkdir(parents=True, exist_ok=True)
+    return snapshotDir
+
+
+def getSnapshotPath(filepath, osm):
+    """
+    Get the path of the snapshot for the OSM file <filepath> parsed with the conditions of <osm>
+    """
+    digest = hashlib.sha1(b"%d" % VERSION)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    fingerprintConditions(digest, osm.conditions)
+    digest.update(b"|")
+    fingerprintConditions(digest, osm.nodeConditions)
+    return getSnapshotDir() / (digest.hexdigest() + SUFFIX)
+
+
+def fingerprintConditions(digest, conditions):
+    """
+    Update <digest> with the conditions, managers, renderers and layers of <conditions>,
+    so a change in the setup script gives another snapshot
+    """
+    for condition, manager, renderer, layer in conditions:
+        if isinstance(condition, TagCondition):
+            digest.update(condition.__name__.encode("utf-8"))
+        else:
+            digest.update(("%s.%s" % (
+                getattr(condition, "__module__", ""),
+                getattr(condition, "__qualname__", type(condition).__qualname__)
+            )).encode("utf-8"))
+            code = getattr(condition, "__code__", None)
+            if code:
+                _fingerprintCode(digest, code)
+        for obj in (manager, renderer):
+            digest.update(("%s.%s;" % (type(obj).__module__, type(obj).__qualname__) if obj else "-;").encode("utf-8"))
+        digest.update(("%s;" % getattr(layer, "id", layer)).encode("utf-8"))
+
+
+def _fingerprintCode(digest, code):
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _fingerprintCode(digest, const)
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
+
+def pruneSnapshots(keep=MAX_SNAPSHOTS):
+    snapshots = []
+    for path in getSnapshotDir().glob("*" + SUFFIX):
+        try:
+            snapshots.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    snapshots.sort(reverse=True)
+    for _, path in snapshots[keep:]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+class SnapshotRecorder:
+    """
+    Records the elements passed to <Osm.addNode(..)>, <Osm.addWay(..)>, <Osm.addRelation(..)>
+    and <Osm.setBounds(..)> together with the matched condition
+    """
+
+    def __init__(self, osm):
+        self.sections = {name: array(typecode) for name, typecode in SECTIONS}
+        for name in ("wayRefStarts", "memberStarts"):
+            self.sections[name].append(0)
+        # interned strings and their positions in <self.strings>
+        self.strings = []
+        self.stringIndices = {}
+        # positions of the conditions, they are looked up by identity
+        self.conditionIndices = {id(c): i for i, c in enumerate(osm.conditions)}
+        self.nodeConditionIndices = {id(c): i for i, c in enumerate(osm.nodeConditions)}
+
+    def addTags(self, tags, spans):
+        """
+        Add <tags> to the shared tag pool and their span in the pool to <spans>
+        """
+        tagPool = self.sections["tags"]
+        spans.append(len(tagPool))
+        if tags:
+            stringIndices = self.stringIndices
+            for k, v in tags.items():
+                # <id> is set by <Osm> itself
+                if k == "id":
+                    continue
+                for s in (k, v):
+                    i = stringIndices.get(s)
+                    if i is None:
+                        i = stringIndices[s] = len(self.strings)
+                        self.strings.append(s)
+                    tagPool.append(i)
+        spans.append(len(tagPool))
+
+    def bounds(self, minLat, minLon, maxLat, maxLon):
+        self.sections["kinds"].append(BOUNDS)
+        self.sections["bounds"].extend((minLat, minLon, maxLat, maxLon))
+
+    def node(self, _id, lat, lon, tags, condition):
+        s = self.sections
+        s["kinds"].append(NODE)
+        s["nodeIds"].append(_id)
+        s["nodeLats"].append(lat)
+        s["nodeLons"].append(lon)
+        s["nodeConditions"].append(self.nodeConditionIndices[id(condition)] if condition else -1)
+        self.addTags(tags, s["nodeTags"])
+
+    def way(self, _id, nodes, tags, condition):
+        s = self.sections
+        s["kinds"].append(WAY)
+        s["wayIds"].append(int(_id))
+        s["wayRefs"].extend(nodes)
+        s["wayRefStarts"].append(len(s["wayRefs"]))
+        s["wayConditions"].append(self.conditionIndices[id(condition)] if condition else -1)
+        self.addTags(tags, s["wayTags"])
+
+    def relation(self, _id, members, tags, condition):
+        s = self.sections
+        s["kinds"].append(RELATION)
+        s["relationIds"].append(int(_id))
+        for mType, mId, mRole in members:
+            s["memberTypes"].append(mType)
+            s["memberIds"].append(int(mId))
+            s["memberRoles"].append(mRole or 0)
+        s["memberStarts"].append(len(s["memberIds"]))
+        s["relationConditions"].append(self.conditionIndices[id(condition)] if condition else -1)
+        self.addTags(tags, s["relationTags"])
+
+    def write(self, path):
+        sections = self.sections
+        stringData = [s.encode("utf-8") for s in self.strings]
+        sections["strings"] = array("B", b"".join(stringData))
+        stringStarts = sections["stringStarts"]
+        stringStarts.append(0)
+        offset = 0
+        for data in stringData:
+            offset += len(data)
+            stringStarts.append(offset)
+
+        layout = {}
+        offset = 0
+        for name, _ in SECTIONS:
+            size = len(sections[name]) * sections[name].itemsize
+            layout[name] = (offset, size)
+            offset += _aligned(size)
+        header = json.dumps({"version": VERSION, "sections": layout}).encode("utf-8")
+        dataStart = _aligned(len(MAGIC) + 4 + len(header))
+
+        path = Path(path)
+        tmpPath = path.with_suffix(".%s.tmp" % os.getpid())
+        try:
+            with open(tmpPath, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.write(b"\0" * (dataStart - len(MAGIC) - 4 - len(header)))
+                for name, _ in SECTIONS:
+                    data = sections[name].tobytes()
+                    f.write(data)
+                    f.write(b"\0" * (_aligned(len(data)) - len(data)))
+            os.replace(tmpPath, path)
+        except OSError as e:
+            print("Unable to write the OSM snapshot %s: %s" % (path, e))
+            try:
+                tmpPath.unlink()
+            except OSError:
+                pass
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def load(osm, path, forceExtentCalculation=None):
+    """
+    Replay the snapshot <path> into <osm>. Returns False if the snapshot can't be used.
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+    try:
+        sections = _readSections(mm)
+        if sections is None:
+            return False
+        _replay(osm, sections, forceExtentCalculation)
+        # release the memoryviews before the map is closed
+        for view in sections.values():
+            view.release()
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # a memoryview is still referenced, the map is closed when it's garbage collected
+            pass
+    # mark the snapshot as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return True
+
+
+def _readSections(mm):
+    # a truncated or foreign file is rejected, so the OSM file is parsed again
+    if len(mm) < len(MAGIC) + 4 or mm[:len(MAGIC)] != MAGIC:
+        return None
+    headerSize = struct.unpack("<I", mm[len(MAGIC):len(MAGIC) + 4])[0]
+    try:
+        header = json.loads(mm[len(MAGIC) + 4:len(MAGIC) + 4 + headerSize])
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or header.get("version") != VERSION:
+        return None
+    dataStart = _aligned(len(MAGIC) + 4 + headerSize)
+    view = memoryview(mm)
+    sections = {}
+    for name, typecode in SECTIONS:
+        offset, size = header["sections"][name]
+        start = dataStart + offset
+        if start + size > len(mm):
+            view.release()
+            for v in sections.values():
+                v.release()
+            return None
+        sections[name] = view[start:start + size].cast(typecode)
+    view.release()
+    return sections
+
+
+def _replay(osm, s, forceExtentCalculation):
+    strings = s["strings"]
+    stringStarts = s["stringStarts"]
+    # decode every interned string once; the tags of all elements share these objects
+    strings = [
+        bytes(strings[stringStarts[i]:stringStarts[i+1]]).decode("utf-8") for i in range(len(stringStarts) - 1)
+    ]
+    tagPool = s["tags"]
+
+    def getTags(spans, i):
+        start, end = spans[2*i], spans[2*i+1]
+        if start == end:
+            return None
+        return {strings[tagPool[j]]: strings[tagPool[j+1]] for j in range(start, end, 2)}
+
+    if not osm.projection:
+        osm.projection = osm.app.projection
+
+    bounds = s["bounds"]
+    nodeIds, nodeLats, nodeLons, nodeConditions, nodeTags = \
+        s["nodeIds"], s["nodeLats"], s["nodeLons"], s["nodeConditions"], s["nodeTags"]
+    wayIds, wayRefs, wayRefStarts, wayConditions, wayTags = \
+        s["wayIds"], s["wayRefs"], s["wayRefStarts"], s["wayConditions"], s["wayTags"]
+    relationIds, memberTypes, memberIds, memberRoles, memberStarts, relationConditions, relationTags = \
+        s["relationIds"], s["memberTypes"], s["memberIds"], s["memberRoles"], \
+        s["memberStarts"], s["relationConditions"], s["relationTags"]
+
+    addNode = osm.addNode
+    addWay = osm.addWay
+    addRelation = osm.addRelation
+    b = n = w = r = 0
+    for kind in s["kinds"]:
+        if kind == NODE:
+            addNode(nodeIds[n], nodeLats[n], nodeLons[n], getTags(nodeTags, n), nodeConditions[n])
+            n += 1
+        elif kind == WAY:
+            addWay(
+                str(wayIds[w]), wayRefs[wayRefStarts[w]:wayRefStarts[w+1]], getTags(wayTags, w),
+                forceExtentCalculation, wayConditions[w]
+            )
+            w += 1
+        elif kind == RELATION:
+            start, end = memberStarts[r], memberStarts[r+1]
+            members = [
+                (memberTypes[i], str(memberIds[i]), memberRoles[i] or None) for i in range(start, end)
+            ]
+            addRelation(str(relationIds[r]), members, getTags(relationTags, r), relationConditions[r])
+            r += 1
+        else:
+            forceExtentCalculation = osm.setBounds(*bounds[4*b:4*b+4], forceExtentCalculation)
+            b += 1
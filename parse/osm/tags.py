@@ -0,0 +1,118 @@
+from collections.abc import Mapping
+from itertools import chain
+
+
+# tag keys read by the managers and renderers of this addon and by the code using
+# the custom properties of the imported Blender objects (see <util.osm.assignTags(..)>)
+USED_TAG_KEYS = frozenset((
+    "area", "building", "building:colour", "building:height", "building:levels",
+    "building:min_level", "building:part", "height", "highway", "landuse", "lanes",
+    "min_height", "name", "natural", "place", "roof:angle", "roof:colour", "roof:direction",
+    "roof:height", "roof:levels", "roof:orientation", "roof:shape", "roof:slope:direction",
+    "tunnel", "type", "waterway", "width"
+))
+
+
+class TagTable:
+    """
+    Interned tags of OSM elements.
+
+    Every tag key and value is kept as a single string object, and the elements with the same tags
+    share one Python dictionary of them; each element gets a <Tags> view of it (see <self.wrap(..)>).
+    """
+
+    def __init__(self, keep=None):
+        # the interned strings
+        self.strings = {}
+        # the shared dictionaries of tags indexed by the flat tuples of their keys and values
+        self.sets = {}
+        # if it isn't None, only the tags with the keys from <keep> are preserved
+        self.keep = keep
+
+    def wrap(self, tags):
+        """
+        Returns a <Tags> view replacing the Python dictionary <tags> of an OSM element.
+        The item <tags["id"]> set by <Osm> for OSM ways and relations is kept in the view.
+        """
+        _id = tags.pop("id", None)
+        keep = self.keep
+        items = tags.items() if keep is None else [item for item in tags.items() if item[0] in keep]
+        key = tuple(chain.from_iterable(items))
+        shared = self.sets.get(key)
+        if shared is None:
+            strings = self.strings
+            key = tuple(strings.setdefault(s, s) for s in key)
+            shared = self.sets[key] = dict(zip(key[::2], key[1::2]))
+        return Tags(shared, _id)
+
+
+class Tags(Mapping):
+    """
+    Tags of an OSM element: a view of a dictionary shared by the elements with the same tags.
+
+    It behaves like a Python dictionary of tags for reading. Assigning a tag (e.g. <tags["height"] = "6">)
+    only changes the tags of this element, the shared dictionary is never modified.
+    """
+
+    __slots__ = ("shared", "id", "own")
+
+    def __init__(self, shared, _id=None):
+        self.shared = shared
+        # OSM id set by <Osm> as the tag "id"
+        self.id = _id
+        # the tags assigned to this element only
+        self.own = None
+
+    def __getitem__(self, key):
+        own = self.own
+        if own and key in own:
+            return own[key]
+        if key == "id" and self.id is not None:
+            return self.id
+        return self.shared[key]
+
+    def get(self, key, default=None):
+        own = self.own
+        if own and key in own:
+            return own[key]
+        if key == "id" and self.id is not None:
+            return self.id
+        return self.shared.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.shared or (key == "id" and self.id is not None) or (self.own is not None and key in self.own)
+
+    def __setitem__(self, key, value):
+        if key == "id":
+            self.id = value
+        else:
+            if self.own is None:
+                self.own = {}
+            self.own[key] = value
+
+    def __iter__(self):
+        shared = self.shared
+        yield from shared
+        if self.id is not None and not "id" in shared:
+            yield "id"
+        if self.own:
+            for key in self.own:
+                if not key in shared:
+                    yield key
+
+    def __len__(self):
+        shared = self.shared
+        n = len(shared)
+        if self.id is not None and not "id" in shared:
+            n += 1
+        if self.own:
+            n += sum(1 for key in self.own if not key in shared)
+        return n
+
+    def items(self):
+        if self.id is None and not self.own:
+            return self.shared.items()
+        return super().items()
+
+    def __repr__(self):
+        return "Tags(%s)" % dict(self)
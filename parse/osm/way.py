@@ -5,7 +5,7 @@ class Way:
     Some attributes:
         l (app.Layer): layer used to place the related geometry to a specific Blender object
         t: type for rendering (Render.polygon, Render.linestring)
-        tags (dict): OSM tags
+        tags (tags.Tags): OSM tags, a view of interned tags
         m: A manager used during the rendering; if None, <manager.BaseManager> applies defaults
             during the rendering
         r (bool): Defines if we need to render (True) or not (False) the OSM way
@@ -61,7 +61,7 @@ class Way:
         
         Returns a Python generator
         """
-        return (osm.nodes[self.nodes[i]].getData(osm) for i in range(self.n))
+        return osm.nodes.iterData(self.nodes[:self.n], osm.projection)
     
     def getNodes(self, osm):
         """
@@ -1,7 +1,7 @@
 """
 Route fetching and processing functionality for BLOSM
 """
-from .fetch_operator import BLOSM_OT_FetchRouteMap, BLOSM_OT_ExtendCityArea
+from .fetch_operator import BLOSM_OT_FetchRouteMap, BLOSM_OT_ExtendCityArea, BLOSM_OT_CancelRouteImport
 from .utils import RouteServiceError, prepare_route, OverpassFetcher
 
 # Import route functionality
@@ -19,4 +19,4 @@ except ImportError:
     # Fallback for partial imports
     pass
 
-__all__ = ['BLOSM_OT_FetchRouteMap', 'BLOSM_OT_ExtendCityArea', 'RouteServiceError', 'prepare_route', 'OverpassFetcher']
+__all__ = ['BLOSM_OT_FetchRouteMap', 'BLOSM_OT_ExtendCityArea', 'BLOSM_OT_CancelRouteImport', 'RouteServiceError', 'prepare_route', 'OverpassFetcher']
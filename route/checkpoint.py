@@ -0,0 +1,114 @@
+"""
+On-disk checkpoints for resumable Overpass downloads.
+
+Every tile payload of a download job is written to
+``~/.blosm/checkpoints/<job id>`` as soon as it arrives. If the job fails
+part-way (for example one tile exhausting all retries on a flaky mirror),
+running the same import again finds the finished tiles on disk and only
+downloads the missing ones. The job id is derived from the tile list and
+layer flags, so "the same import" means the same tiles and layers.
+
+A checkpoint is removed once its download completes; abandoned checkpoints
+are pruned after ``APIConfig.overpass_checkpoint_max_age_s``.
+"""
+
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from .config import DEFAULT_CONFIG
+
+
+def get_checkpoint_root() -> Path:
+    """Get the directory holding the checkpoints of all download jobs."""
+    root = Path.home() / ".blosm" / "checkpoints"
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def make_job_id(tiles: Sequence[Sequence[float]], layers: str) -> str:
+    """Build a job id from the tile list and the requested layer flags."""
+    digest = hashlib.sha1(layers.encode("utf-8"))
+    for tile in tiles:
+        digest.update(",".join(f"{coord:.7f}" for coord in tile).encode("utf-8"))
+        digest.update(b";")
+    return digest.hexdigest()[:16]
+
+
+def prune_checkpoints(max_age_s: Optional[float] = None) -> int:
+    """Remove checkpoints untouched for longer than ``max_age_s``; returns the count removed."""
+    if max_age_s is None:
+        max_age_s = DEFAULT_CONFIG.api.overpass_checkpoint_max_age_s
+    if max_age_s <= 0:
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age_s
+    for job_dir in get_checkpoint_root().iterdir():
+        try:
+            if job_dir.is_dir() and job_dir.stat().st_mtime < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+class TileCheckpoint:
+    """Tile payloads of one download job, stored one file per tile.
+
+    ``load``/``save`` are safe to call from the concurrent tile workers:
+    payloads are written to a temporary name and renamed into place.
+    """
+
+    def __init__(self, job_id: str, root=None):
+        self.job_id = job_id
+        self._dir = Path(root or get_checkpoint_root()) / job_id
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def _path(self, tile: Sequence[float], layer: str) -> Path:
+        name = hashlib.sha1(",".join(f"{coord:.7f}" for coord in tile).encode("utf-8")).hexdigest()
+        return self._dir / f"{name}_{layer}.osm"
+
+    def load(self, tile: Sequence[float], layer: str) -> Optional[bytes]:
+        """Return the checkpointed ``layer`` payload of ``tile`` or None if it isn't on disk."""
+        path = self._path(tile, layer)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def contains(self, tile: Sequence[float], layer: str) -> bool:
+        return self._path(tile, layer).exists()
+
+    def save(self, tile: Sequence[float], layer: str, payload: bytes) -> None:
+        path = self._path(tile, layer)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{id(payload)}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[BLOSM] Checkpoint write error: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def count(self) -> int:
+        """Number of layer payloads currently checkpointed."""
+        try:
+            return sum(1 for _ in self._dir.glob("*.osm"))
+        except OSError:
+            return 0
+
+    def discard(self) -> None:
+        """Remove the checkpoint after the job completed."""
+        shutil.rmtree(self._dir, ignore_errors=True)
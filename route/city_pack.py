@@ -0,0 +1,565 @@
+"""
+Offline city packs: OSM data for a region answered from a local store.
+
+A city pack is built once from a local OSM extract (``.osm`` XML, optionally
+gzip/bz2 compressed, or ``.osm.pbf``) with :func:`build_city_pack`. It is a SQLite file
+holding the ways and relations of every fetcher layer (``buildings``,
+``roads``, ``water``, ``shoreline``), the nodes they reference, and a grid
+index of which elements touch which cell. Everything else in the extract is
+dropped, so the pack is much smaller than its source.
+
+:class:`CityPack` answers a layer request for any tile with the same
+elements the ``_build_query`` Overpass query returns (including the
+``(._;>;)`` recursion), formatted like an Overpass ``out body`` response.
+``OverpassFetcher(city_pack=...)`` uses it for every tile inside the pack
+bounds, so imports of the packed region need no network and give the same
+result every run.
+
+Differences to live Overpass: elements are matched on their bounding box
+rather than their exact geometry, and the ``water`` layer matches its large
+lake relations on the tile instead of the widened bbox used by the live
+query.
+"""
+
+import bz2
+import gzip
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from xml.sax.saxutils import quoteattr
+
+from ..parse.osm.pbf import PbfFile
+from .utils import RouteServiceError
+
+
+PACK_VERSION = "1"
+PACK_SUFFIX = ".blosmpack"
+LAYERS = ("buildings", "roads", "water", "shoreline")
+
+# Grid index cell size in degrees (~1.1 km of latitude)
+CELL_DEG = 0.01
+# Elements covering more cells (lakes, coastlines) are indexed once with a
+# NULL cell and checked for every request instead
+MAX_ELEMENT_CELLS = 256
+
+# Rows per executemany batch while building, and ids per "IN (...)" lookup
+_BATCH = 5000
+_SQL_IN_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE nodes (id INTEGER PRIMARY KEY, lat REAL, lon REAL, tags BLOB);
+CREATE TABLE ways (id INTEGER PRIMARY KEY, south REAL, west REAL, north REAL, east REAL, refs BLOB, tags BLOB);
+CREATE TABLE relations (id INTEGER PRIMARY KEY, south REAL, west REAL, north REAL, east REAL, members BLOB, tags BLOB);
+CREATE TABLE cells (layer TEXT, row INTEGER, col INTEGER, kind TEXT, id INTEGER);
+"""
+
+_WATERWAYS = {"river", "stream", "canal", "creek", "riverbank"}
+_ISLAND_NAME = re.compile(
+    r"Toronto.*Island|Island.*Toronto|Centre.*Island|Ward.*Island|Algonquin.*Island|Muggs.*Island|South.*Island"
+)
+
+
+def _is_water_feature(kind: str, tags: Dict[str, str]) -> bool:
+    """Tag filter of the ``water`` layer query in ``OverpassFetcher._build_query``."""
+    natural = tags.get("natural")
+    name = tags.get("name", "")
+    if tags.get("place") == "island" or _ISLAND_NAME.search(name):
+        return True
+    if kind == "way":
+        return (
+            natural in ("water", "coastline")
+            or tags.get("waterway") in _WATERWAYS
+            or tags.get("landuse") in ("reservoir", "water")
+        )
+    return (
+        natural == "water"
+        or tags.get("landuse") == "water"
+        or tags.get("place") in ("sea", "ocean")
+        or name in ("Lake Ontario", "Lake Erie")
+    )
+
+
+def layers_for(kind: str, tags: Dict[str, str]) -> List[str]:
+    """Fetcher layers whose Overpass query selects a way or relation with ``tags``."""
+    layers = []
+    if "building" in tags:
+        layers.append("buildings")
+    if kind == "way" and "highway" in tags:
+        layers.append("roads")
+    if _is_water_feature(kind, tags):
+        layers.append("water")
+    if tags.get("natural") in ("water", "coastline") or "water" in tags or "waterway" in tags:
+        layers.append("shoreline")
+    return layers
+
+
+def _open_source(path: Path):
+    name = path.name.lower()
+    if name.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if name.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _iter_osm_xml(path: Path) -> Iterator[tuple]:
+    """Yield ``(kind, id, data, tags)`` for the elements of an OSM XML file, in file order.
+
+    ``data`` is ``(lat, lon)`` for nodes, the node refs for ways and
+    ``[(type, ref, role), ...]`` for relations. ``("bounds", None, bbox, None)``
+    is yielded for a ``<bounds>`` element.
+    """
+    with _open_source(path) as f:
+        root = None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            tag = elem.tag
+            if tag == "node":
+                yield "node", int(elem.get("id")), (float(elem.get("lat")), float(elem.get("lon"))), _tags(elem)
+            elif tag == "way":
+                refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                yield "way", int(elem.get("id")), refs, _tags(elem)
+            elif tag == "relation":
+                members = [(m.get("type"), int(m.get("ref")), m.get("role", "")) for m in elem.iter("member")]
+                yield "relation", int(elem.get("id")), members, _tags(elem)
+            elif tag == "bounds":
+                bbox = tuple(float(elem.get(key)) for key in ("minlat", "minlon", "maxlat", "maxlon"))
+                yield "bounds", None, bbox, None
+            else:
+                continue
+            root.clear()
+
+
+def _iter_osm_pbf(path: Path) -> Iterator[tuple]:
+    """Yield the elements of an ``.osm.pbf`` file like :func:`_iter_osm_xml`."""
+    pbf = PbfFile(str(path))
+    if pbf.bbox:
+        yield "bounds", None, pbf.bbox, None
+    for nodes, ways, relations in pbf.blocks():
+        for element_id, lat, lon, tags in nodes:
+            yield "node", element_id, (lat, lon), tags or {}
+        for element_id, refs, tags in ways:
+            yield "way", element_id, refs, tags or {}
+        for element_id, members, tags in relations:
+            yield "relation", element_id, members, tags or {}
+
+
+def _iter_elements(path: Path) -> Iterator[tuple]:
+    if path.name.lower().endswith(".pbf"):
+        return _iter_osm_pbf(path)
+    return _iter_osm_xml(path)
+
+
+def _tags(elem) -> Dict[str, str]:
+    return {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+
+
+def _encode_tags(tags: Dict[str, str]) -> Optional[bytes]:
+    return json.dumps(tags, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if tags else None
+
+
+def _decode_tags(blob: Optional[bytes]) -> Dict[str, str]:
+    return json.loads(blob) if blob else {}
+
+
+def _encode_refs(refs: Sequence[int]) -> bytes:
+    return array("q", refs).tobytes()
+
+
+def _decode_refs(blob: bytes) -> array:
+    refs = array("q")
+    refs.frombytes(blob)
+    return refs
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEG), math.floor(lon / CELL_DEG)
+
+
+def _cells_for_bbox(south: float, west: float, north: float, east: float) -> Iterator[Tuple[int, int]]:
+    row0, col0 = _cell(south, west)
+    row1, col1 = _cell(north, east)
+    if (row1 - row0 + 1) * (col1 - col0 + 1) > MAX_ELEMENT_CELLS:
+        yield None, None
+        return
+    for row in range(row0, row1 + 1):
+        for col in range(col0, col1 + 1):
+            yield row, col
+
+
+def _select_in(conn, sql: str, ids: Iterable[int]) -> Iterator[tuple]:
+    """Run ``sql`` (containing ``{ids}``) over ``ids`` in chunks below SQLite's variable limit."""
+    ids = list(ids)
+    for start in range(0, len(ids), _SQL_IN_CHUNK):
+        chunk = ids[start:start + _SQL_IN_CHUNK]
+        yield from conn.execute(sql.format(ids=",".join("?" * len(chunk))), chunk)
+
+
+def _union_bbox(boxes: Iterable[Tuple[float, float, float, float]]) -> Optional[Tuple[float, float, float, float]]:
+    south = west = math.inf
+    north = east = -math.inf
+    for s, w, n, e in boxes:
+        south, west, north, east = min(south, s), min(west, w), max(north, n), max(east, e)
+    if south == math.inf:
+        return None
+    return south, west, north, east
+
+
+def get_pack_path(source) -> Path:
+    """Default pack location for an extract: next to it, with the ``.blosmpack`` suffix."""
+    source = Path(source)
+    name = source.name
+    for suffix in (".gz", ".bz2", ".pbf", ".osm"):
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    return source.with_name(name + PACK_SUFFIX)
+
+
+def build_city_pack(source, pack_path=None, log=print) -> Path:
+    """Build a city pack from the OSM extract ``source``; returns the pack path.
+
+    The pack is written to a temporary file and moved into place once
+    complete, so an existing pack stays usable if the build fails.
+    """
+    source = Path(source)
+    pack_path = Path(pack_path) if pack_path else get_pack_path(source)
+    tmp_path = pack_path.with_name(pack_path.name + ".building")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    start = time.perf_counter()
+    log(f"[BLOSM] Building city pack {pack_path.name} from {source.name}")
+    conn = sqlite3.connect(str(tmp_path))
+    try:
+        conn.executescript(_SCHEMA)
+        # The pack is rebuilt from scratch on failure, so skip the journal
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        bounds = _load_extract(conn, source, log)
+        kept = _prune(conn)
+        conn.execute("CREATE INDEX cells_lookup ON cells (layer, row, col)")
+        if bounds is None:
+            bounds = conn.execute("SELECT MIN(lat), MIN(lon), MAX(lat), MAX(lon) FROM nodes").fetchone()
+        meta = {
+            "version": PACK_VERSION,
+            "source": source.name,
+            "created": str(time.time()),
+            "bounds": json.dumps(list(bounds)),
+            "counts": json.dumps(kept),
+        }
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+        conn.commit()
+        conn.execute("VACUUM")
+    except BaseException:
+        conn.close()
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    conn.close()
+    os.replace(tmp_path, pack_path)
+    log(
+        f"[BLOSM] City pack built in {time.perf_counter() - start:.1f}s: {kept['node']} nodes, "
+        f"{kept['way']} ways, {kept['relation']} relations, {pack_path.stat().st_size / 1048576.0:.1f} MB"
+    )
+    return pack_path
+
+
+def _load_extract(conn, source: Path, log) -> Optional[Tuple[float, float, float, float]]:
+    """Copy every element of the extract into the pack tables and index the layer features."""
+    bounds = None
+    nodes: List[tuple] = []
+    ways: List[tuple] = []
+    relations: List[tuple] = []
+    counts = {"node": 0, "way": 0, "relation": 0}
+    try:
+        for kind, element_id, data, tags in _iter_elements(source):
+            if kind == "node":
+                nodes.append((element_id, data[0], data[1], _encode_tags(tags)))
+                if len(nodes) >= _BATCH:
+                    _insert_nodes(conn, nodes)
+            elif kind == "way":
+                if nodes:
+                    _insert_nodes(conn, nodes)
+                ways.append((element_id, data, tags))
+                if len(ways) >= _BATCH:
+                    _insert_ways(conn, ways)
+            elif kind == "relation":
+                if ways:
+                    _insert_ways(conn, ways)
+                relations.append((element_id, data, tags))
+                if len(relations) >= _BATCH:
+                    _insert_relations(conn, relations)
+            else:
+                bounds = data
+                continue
+            counts[kind] += 1
+            if sum(counts.values()) % 1_000_000 == 0:
+                log(f"[BLOSM] City pack: read {counts['node']} nodes, {counts['way']} ways, {counts['relation']} relations")
+    except (ET.ParseError, ValueError) as exc:
+        raise RouteServiceError(f"Unable to parse {source.name}: {exc}") from exc
+    _insert_nodes(conn, nodes)
+    _insert_ways(conn, ways)
+    _insert_relations(conn, relations)
+    return bounds
+
+
+def _insert_nodes(conn, nodes: List[tuple]) -> None:
+    conn.executemany("INSERT OR REPLACE INTO nodes (id, lat, lon, tags) VALUES (?, ?, ?, ?)", nodes)
+    nodes.clear()
+
+
+def _insert_ways(conn, ways: List[tuple]) -> None:
+    refs = {ref for _, way_refs, _ in ways for ref in way_refs}
+    coords = {
+        node_id: (lat, lon)
+        for node_id, lat, lon in _select_in(conn, "SELECT id, lat, lon FROM nodes WHERE id IN ({ids})", refs)
+    }
+    rows = []
+    cells = []
+    for way_id, way_refs, tags in ways:
+        bbox = _union_bbox((lat, lon, lat, lon) for lat, lon in (coords[ref] for ref in way_refs if ref in coords))
+        if bbox is None:
+            continue
+        rows.append((way_id, *bbox, _encode_refs(way_refs), _encode_tags(tags)))
+        cells.extend(_feature_cells("way", way_id, bbox, tags))
+    conn.executemany("INSERT OR REPLACE INTO ways VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO cells VALUES (?, ?, ?, ?, ?)", cells)
+    ways.clear()
+
+
+def _insert_relations(conn, relations: List[tuple]) -> None:
+    way_refs = {ref for _, members, _ in relations for kind, ref, _ in members if kind == "way"}
+    node_refs = {ref for _, members, _ in relations for kind, ref, _ in members if kind == "node"}
+    way_boxes = {
+        row[0]: row[1:]
+        for row in _select_in(conn, "SELECT id, south, west, north, east FROM ways WHERE id IN ({ids})", way_refs)
+    }
+    node_boxes = {
+        node_id: (lat, lon, lat, lon)
+        for node_id, lat, lon in _select_in(conn, "SELECT id, lat, lon FROM nodes WHERE id IN ({ids})", node_refs)
+    }
+    boxes = {"way": way_boxes, "node": node_boxes}
+    rows = []
+    cells = []
+    for relation_id, members, tags in relations:
+        bbox = _union_bbox(
+            boxes[kind][ref] for kind, ref, _ in members if ref in boxes.get(kind, ())
+        )
+        if bbox is None:
+            continue
+        rows.append((relation_id, *bbox, json.dumps(members).encode("utf-8"), _encode_tags(tags)))
+        cells.extend(_feature_cells("relation", relation_id, bbox, tags))
+    conn.executemany("INSERT OR REPLACE INTO relations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO cells VALUES (?, ?, ?, ?, ?)", cells)
+    relations.clear()
+
+
+def _feature_cells(kind: str, element_id: int, bbox, tags: Dict[str, str]) -> List[tuple]:
+    layers = layers_for(kind, tags)
+    if not layers:
+        return []
+    cells = list(_cells_for_bbox(*bbox))
+    return [(layer, row, col, kind, element_id) for layer in layers for row, col in cells]
+
+
+def _prune(conn) -> Dict[str, int]:
+    """Drop the elements no layer request can return; returns the counts kept."""
+    conn.execute("CREATE TEMP TABLE keep_relations (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE keep_ways (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE keep_nodes (id INTEGER PRIMARY KEY)")
+    conn.execute("INSERT OR IGNORE INTO keep_relations SELECT id FROM cells WHERE kind = 'relation'")
+    conn.execute("INSERT OR IGNORE INTO keep_ways SELECT id FROM cells WHERE kind = 'way'")
+    member_ways = []
+    member_nodes = []
+    for (members,) in conn.execute(
+        "SELECT members FROM relations WHERE id IN (SELECT id FROM keep_relations)"
+    ).fetchall():
+        for kind, ref, _ in json.loads(members):
+            if kind == "way":
+                member_ways.append((ref,))
+            elif kind == "node":
+                member_nodes.append((ref,))
+    conn.executemany("INSERT OR IGNORE INTO keep_ways VALUES (?)", member_ways)
+    conn.executemany("INSERT OR IGNORE INTO keep_nodes VALUES (?)", member_nodes)
+    cursor = conn.execute("SELECT refs FROM ways WHERE id IN (SELECT id FROM keep_ways)")
+    while True:
+        rows = cursor.fetchmany(_BATCH)
+        if not rows:
+            break
+        conn.executemany(
+            "INSERT OR IGNORE INTO keep_nodes VALUES (?)",
+            ((ref,) for (refs,) in rows for ref in _decode_refs(refs)),
+        )
+    conn.execute("DELETE FROM relations WHERE id NOT IN (SELECT id FROM keep_relations)")
+    conn.execute("DELETE FROM ways WHERE id NOT IN (SELECT id FROM keep_ways)")
+    conn.execute("DELETE FROM nodes WHERE id NOT IN (SELECT id FROM keep_nodes)")
+    return {
+        kind: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for kind, table in (("node", "nodes"), ("way", "ways"), ("relation", "relations"))
+    }
+
+
+class CityPack:
+    """Read-only access to a city pack.
+
+    Thread-safe: every thread (e.g. each concurrent tile worker) gets its own
+    SQLite connection.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not self.path.is_file():
+            raise RouteServiceError(f"City pack not found: {self.path}")
+        self._local = threading.local()
+        try:
+            meta = dict(self._conn().execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError as exc:
+            raise RouteServiceError(f"Not a city pack: {self.path.name} ({exc})") from exc
+        if meta.get("version") != PACK_VERSION:
+            raise RouteServiceError(f"City pack {self.path.name} has version {meta.get('version')}; rebuild it")
+        self.source = meta.get("source", "")
+        self.bounds: Tuple[float, float, float, float] = tuple(json.loads(meta["bounds"]))
+        self.counts: Dict[str, int] = json.loads(meta.get("counts", "{}"))
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def covers(self, tile: Sequence[float]) -> bool:
+        """True when ``tile`` lies completely inside the extract the pack was built from."""
+        south, west, north, east = tile
+        pack_south, pack_west, pack_north, pack_east = self.bounds
+        return south >= pack_south and west >= pack_west and north <= pack_north and east <= pack_east
+
+    def query(self, layer: str, tile: Sequence[float]) -> bytes:
+        """OSM XML of ``layer`` for ``tile``, as the live Overpass query would return it."""
+        conn = self._conn()
+        south, west, north, east = tile
+        row0, col0 = _cell(south, west)
+        row1, col1 = _cell(north, east)
+        candidates = {"way": set(), "relation": set()}
+        for kind, element_id in conn.execute(
+            "SELECT kind, id FROM cells WHERE layer = ? AND "
+            "((row BETWEEN ? AND ? AND col BETWEEN ? AND ?) OR row IS NULL)",
+            (layer, row0, row1, col0, col1),
+        ):
+            candidates[kind].add(element_id)
+
+        def intersects(row) -> bool:
+            return row[1] <= north and row[3] >= south and row[2] <= east and row[4] >= west
+
+        relations = {}
+        member_ways: Set[int] = set()
+        node_ids: Set[int] = set()
+        for row in _select_in(
+            conn, "SELECT id, south, west, north, east, members, tags FROM relations WHERE id IN ({ids})",
+            candidates["relation"],
+        ):
+            if not intersects(row):
+                continue
+            members = json.loads(row[5])
+            relations[row[0]] = (members, _decode_tags(row[6]))
+            for kind, ref, _ in members:
+                if kind == "way":
+                    member_ways.add(ref)
+                elif kind == "node":
+                    node_ids.add(ref)
+
+        ways = {}
+        for row in _select_in(
+            conn, "SELECT id, south, west, north, east, refs, tags FROM ways WHERE id IN ({ids})",
+            candidates["way"],
+        ):
+            if intersects(row):
+                ways[row[0]] = (_decode_refs(row[5]), _decode_tags(row[6]))
+        for way_id, refs, tags in _select_in(
+            conn, "SELECT id, refs, tags FROM ways WHERE id IN ({ids})", member_ways - ways.keys()
+        ):
+            ways[way_id] = (_decode_refs(refs), _decode_tags(tags))
+        for refs, _ in ways.values():
+            node_ids.update(refs)
+
+        nodes = {
+            node_id: (lat, lon, _decode_tags(tags))
+            for node_id, lat, lon, tags in _select_in(
+                conn, "SELECT id, lat, lon, tags FROM nodes WHERE id IN ({ids})", node_ids
+            )
+        }
+        return _format_osm(nodes, ways, relations)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _format_tags(parts: List[str], tags: Dict[str, str]) -> None:
+    for key, value in tags.items():
+        parts.append(f"    <tag k={quoteattr(key)} v={quoteattr(value)}/>\n")
+
+
+def _format_osm(nodes, ways, relations) -> bytes:
+    """Serialise elements like an Overpass ``out body`` response: nodes, ways, relations by id."""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6" generator="BLOSM city pack">\n']
+    for node_id in sorted(nodes):
+        lat, lon, tags = nodes[node_id]
+        if not tags:
+            parts.append(f'  <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}"/>\n')
+            continue
+        parts.append(f'  <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}">\n')
+        _format_tags(parts, tags)
+        parts.append("  </node>\n")
+    for way_id in sorted(ways):
+        refs, tags = ways[way_id]
+        parts.append(f'  <way id="{way_id}">\n')
+        parts.extend(f'    <nd ref="{ref}"/>\n' for ref in refs)
+        _format_tags(parts, tags)
+        parts.append("  </way>\n")
+    for relation_id in sorted(relations):
+        members, tags = relations[relation_id]
+        parts.append(f'  <relation id="{relation_id}">\n')
+        for kind, ref, role in members:
+            parts.append(f'    <member type="{kind}" ref="{ref}" role={quoteattr(role)}/>\n')
+        _format_tags(parts, tags)
+        parts.append("  </relation>\n")
+    parts.append("</osm>\n")
+    return "".join(parts).encode("utf-8")
+
+
+_open_packs: Dict[str, Tuple[float, CityPack]] = {}
+_open_packs_lock = threading.Lock()
+
+
+def open_pack(path) -> Optional[CityPack]:
+    """Open (or reuse) the pack at ``path``; None for an empty path. Reopened when the file changes."""
+    if not path:
+        return None
+    key = str(Path(path).resolve())
+    try:
+        mtime = os.path.getmtime(key)
+    except OSError as exc:
+        raise RouteServiceError(f"City pack not found: {path}") from exc
+    with _open_packs_lock:
+        cached = _open_packs.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        pack = CityPack(key)
+        _open_packs[key] = (mtime, pack)
+        return pack
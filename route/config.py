@@ -47,9 +47,46 @@ class APIConfig:
     overpass_min_interval_ms: int = 1000
     overpass_timeout_s: float = 200.0  # Increased from 30s to allow full 180s query + 20s buffer
     overpass_max_retries: int = 3
+    overpass_max_workers: int = 3  # Concurrent tile downloads (spread across overpass_servers)
     overpass_tile_max_m: float = 2000.0
+    # "grid" snaps tiles to a global metric grid so they are shared across routes;
+    # "bbox" tiles from the south-west corner of each bbox (legacy behavior)
+    overpass_tile_mode: str = "grid"
     overpass_query_timeout: int = 180  # Overpass query timeout in seconds
 
+    # Overpass tile cache (~/.blosm/overpass_cache)
+    overpass_cache_enabled: bool = True
+    overpass_cache_max_mb: float = 512.0  # Least recently used tiles are evicted above this
+    overpass_cache_ttl_s: float = 30 * 24 * 3600.0  # 0 disables expiry
+    # Resumable downloads (~/.blosm/checkpoints)
+    overpass_checkpoint_enabled: bool = True
+    overpass_checkpoint_max_age_s: float = 7 * 24 * 3600.0  # Abandoned checkpoints are pruned after this
+
+    # Adaptive tiling (densities in ~/.blosm/tile_density.json)
+    overpass_adaptive_tiles: bool = True
+    overpass_query_max_mb: int = 128  # Overpass [maxsize]; queries exceeding it fail and are split
+    overpass_split_max_depth: int = 2  # A grid tile is split into at most 4**depth requests
+    overpass_dense_tile_mb: float = 16.0  # Tiles predicted above this are split before fetching
+    overpass_sparse_tile_kb: float = 512.0  # Neighbouring tiles are merged while their predicted total stays below this
+    overpass_merge_max_tiles: int = 4  # Most grid tiles merged into one request
+
+    # Endpoint health scoring (~/.blosm/endpoint_health.json)
+    overpass_health_enabled: bool = True
+    overpass_health_alpha: float = 0.3  # Weight of the newest sample in the rolling averages
+    overpass_health_stale_s: float = 24 * 3600.0  # Scores older than this are discarded on load
+
+    # Geocode / route cache (~/.blosm/service_cache.json)
+    service_cache_enabled: bool = True
+    service_cache_max_entries: int = 5000  # Per namespace; least recently used entries are dropped
+    geocode_cache_ttl_s: float = 90 * 24 * 3600.0  # 0 disables expiry
+    route_cache_ttl_s: float = 30 * 24 * 3600.0  # 0 disables expiry
+
+    # Shared HTTP connections for Nominatim, OSRM and Overpass (route/http_pool.py)
+    http_keepalive_enabled: bool = True
+    http_max_idle_per_host: int = 4  # Idle connections kept open per host
+    http_idle_timeout_s: float = 60.0  # Idle connections older than this are closed instead of reused
+    http_compression_enabled: bool = True  # Ask servers for gzip/deflate responses
+
 
 @dataclass(frozen=True)
 class GeographyConfig:
@@ -98,6 +135,9 @@ class RouteOperatorConfig:
     # Curve handling tweaks
     route_curve_simplify_tolerance_m: float = 0.5  # Remove near-collinear points within this distance
 
+    # Extend City
+    extend_weld_distance_m: float = 0.05  # Appended road vertices this close to existing ones are welded
+
 
 @dataclass(frozen=True)
 class BlenderObjectConfig:
@@ -0,0 +1,196 @@
+"""
+Health scoring for the Overpass endpoints.
+
+Every request made by :class:`route.utils.OverpassFetcher` is recorded here:
+exponentially weighted latency and error rate per endpoint, plus the
+back-off asked for by ``Retry-After`` headers. Each tile is then sent to the
+endpoint with the lowest expected completion time instead of strictly
+round-robin, so one slow mirror no longer receives every other request.
+
+Scores are persisted in ``~/.blosm/endpoint_health.json`` (next to the
+performance history) so a new session starts from what the last one saw;
+scores older than ``APIConfig.overpass_health_stale_s`` are discarded.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .config import DEFAULT_CONFIG
+
+
+# Latency assumed for an endpoint without samples; optimistic so it gets tried
+DEFAULT_LATENCY_S = 2.0
+# Lower bound for the success probability used to scale the expected time
+MIN_SUCCESS_RATE = 0.05
+
+
+def get_health_file_path() -> Path:
+    """Get the path to the endpoint health JSON file."""
+    blosm_dir = Path.home() / ".blosm"
+    blosm_dir.mkdir(exist_ok=True)
+    return blosm_dir / "endpoint_health.json"
+
+
+class EndpointHealth:
+    """Rolling latency / error statistics per endpoint.
+
+    Thread-safe; shared by the concurrent tile workers of one fetcher and by
+    consecutive imports in the same session.
+    """
+
+    def __init__(self, path=None, alpha: float = 0.3, stale_s: float = 0.0):
+        self._path = Path(path) if path else get_health_file_path()
+        self.alpha = min(1.0, max(0.01, float(alpha)))
+        self.stale_s = max(0.0, float(stale_s))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = self._load()
+        self._in_flight: Dict[str, int] = {}
+        self._dirty = False
+
+    def _load(self) -> Dict[str, dict]:
+        if not self._path.exists():
+            return {}
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[BLOSM] Endpoint health load error: {e}")
+            return {}
+        endpoints = data.get("endpoints", {}) if isinstance(data, dict) else {}
+        now = time.time()
+        return {
+            server: stats for server, stats in endpoints.items()
+            if isinstance(stats, dict)
+            and not (self.stale_s > 0 and now - stats.get("updated", 0.0) > self.stale_s)
+        }
+
+    def save(self) -> None:
+        """Persist the scores if anything changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self._path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": "1.0", "endpoints": self._stats}, f, indent=2)
+                os.replace(tmp_path, self._path)
+                self._dirty = False
+            except IOError as e:
+                print(f"[BLOSM] Endpoint health save error: {e}")
+
+    def _entry_locked(self, server: str) -> dict:
+        entry = self._stats.get(server)
+        if entry is None:
+            entry = {"latency_s": None, "error_rate": 0.0, "samples": 0, "backoff_until": 0.0, "updated": 0.0}
+            self._stats[server] = entry
+        return entry
+
+    def _record_locked(self, server: str, latency_s: Optional[float], failed: bool) -> dict:
+        entry = self._entry_locked(server)
+        a = self.alpha
+        if latency_s is not None:
+            previous = entry.get("latency_s")
+            entry["latency_s"] = latency_s if previous is None else (1.0 - a) * previous + a * latency_s
+        entry["error_rate"] = (1.0 - a) * entry.get("error_rate", 0.0) + a * (1.0 if failed else 0.0)
+        entry["samples"] = entry.get("samples", 0) + 1
+        entry["updated"] = time.time()
+        self._dirty = True
+        return entry
+
+    def record_success(self, server: str, latency_s: float) -> None:
+        with self._lock:
+            self._record_locked(server, latency_s, failed=False)
+
+    def record_failure(self, server: str, latency_s: Optional[float] = None) -> None:
+        with self._lock:
+            self._record_locked(server, latency_s, failed=True)
+
+    def defer(self, server: str, retry_after_s: float) -> None:
+        """Keep ``server`` out of rotation for ``retry_after_s`` (from a Retry-After header)."""
+        with self._lock:
+            entry = self._entry_locked(server)
+            entry["backoff_until"] = max(entry.get("backoff_until", 0.0), time.time() + retry_after_s)
+            self._dirty = True
+
+    def expected_completion_s(self, server: str, wait_s: float = 0.0) -> float:
+        """Expected time until a request sent to ``server`` now has completed successfully."""
+        with self._lock:
+            return self._expected_locked(server, wait_s, time.time())
+
+    def _expected_locked(self, server: str, wait_s: float, now: float) -> float:
+        entry = self._stats.get(server) or {}
+        latency = entry.get("latency_s")
+        if latency is None:
+            latency = DEFAULT_LATENCY_S
+        # Requests already running on the endpoint are served before ours
+        busy = latency * (1 + self._in_flight.get(server, 0))
+        # Failed attempts have to be repeated
+        success_rate = max(MIN_SUCCESS_RATE, 1.0 - entry.get("error_rate", 0.0))
+        backoff = max(0.0, entry.get("backoff_until", 0.0) - now)
+        return max(wait_s, backoff) + busy / success_rate
+
+    def choose(self, servers: Iterable[str], exclude: Iterable[str] = (), wait_s: Optional[Dict[str, float]] = None) -> str:
+        """Pick the endpoint with the best expected completion time.
+
+        ``exclude`` holds endpoints already tried for this request; it is
+        ignored once every endpoint has been tried. ``wait_s`` adds the
+        caller's politeness delay per endpoint.
+        """
+        with self._lock:
+            return self._choose_locked(servers, exclude, wait_s)
+
+    def acquire(self, servers: Iterable[str], exclude: Iterable[str] = (), wait_s: Optional[Dict[str, float]] = None) -> str:
+        """Like :meth:`choose`, and count the request as in flight until :meth:`end_request`."""
+        with self._lock:
+            server = self._choose_locked(servers, exclude, wait_s)
+            self._in_flight[server] = self._in_flight.get(server, 0) + 1
+        return server
+
+    def _choose_locked(self, servers, exclude, wait_s) -> str:
+        servers = list(servers)
+        excluded = set(exclude)
+        candidates = [server for server in servers if server not in excluded] or servers
+        wait_s = wait_s or {}
+        now = time.time()
+        return min(
+            candidates,
+            key=lambda server: self._expected_locked(server, wait_s.get(server, 0.0), now),
+        )
+
+    def end_request(self, server: str) -> None:
+        with self._lock:
+            self._in_flight[server] = max(0, self._in_flight.get(server, 0) - 1)
+
+    def summary(self) -> Dict[str, dict]:
+        """Copy of the current scores with the expected completion time per endpoint."""
+        with self._lock:
+            now = time.time()
+            return {
+                server: dict(entry, expected_s=self._expected_locked(server, 0.0, now))
+                for server, entry in self._stats.items()
+            }
+
+
+_default_tracker: Optional[EndpointHealth] = None
+
+
+def get_default_tracker() -> Optional[EndpointHealth]:
+    """Get the shared health tracker, or None when health-based dispatch is disabled."""
+    global _default_tracker
+    api = DEFAULT_CONFIG.api
+    if not api.overpass_health_enabled:
+        return None
+    if _default_tracker is None:
+        try:
+            _default_tracker = EndpointHealth(
+                alpha=api.overpass_health_alpha,
+                stale_s=api.overpass_health_stale_s,
+            )
+        except OSError as e:
+            print(f"[BLOSM] Endpoint health unavailable: {e}")
+            return None
+    return _default_tracker
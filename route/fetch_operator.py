@@ -8,12 +8,15 @@ import bpy
 import tempfile
 import math
 import time
+from concurrent.futures import ThreadPoolExecutor
 from ..app import blender as blenderApp
+from ..util.transverse_mercator import projectBatch
+from ..parse.osm import parallel
 
 # Import route functionality from local modules
-from .utils import RouteServiceError, prepare_route, OverpassFetcher, bbox_size, _meters_to_lat_delta, _meters_to_lon_delta, _tile_bbox
+from .utils import RouteServiceError, RouteImportCancelled, prepare_route, OverpassFetcher, bbox_size, _meters_to_lat_delta, _meters_to_lon_delta, _tiles_for_bbox, _tile_key, pack_osm_ids, unpack_osm_ids
 from .config import DEFAULT_CONFIG
-from . import buildings as route_buildings, water_manager
+from . import buildings as route_buildings, water_manager, import_job, performance_tracker, checkpoint, city_pack
 try:
     from .state_manager import RouteStateManager
 except ImportError:
@@ -81,6 +84,87 @@ class RouteProgressReporter:
         self._active = False
 
 
+class _PrefetchedFetcher:
+    """Route fetcher replaying an Overpass download finished in the background.
+
+    Stands in for :class:`OverpassFetcher` in ``BaseApp.downloadOsmFile`` and
+    exposes the timing/tile attributes of the fetcher that did the download.
+    With ``tiles`` (a pipelined download, each tile decoded into a
+    ``parallel.Tile`` on the worker thread as it arrived) the importer replays
+    the tiles through ``iter_write`` instead of parsing the merged file again.
+    """
+
+    def __init__(self, fetcher, osm_path, tiles=None):
+        self._fetcher = fetcher
+        self._osm_path = osm_path
+        self._tiles = tiles
+        self.pipelined = tiles is not None
+
+    def __getattr__(self, name):
+        return getattr(self._fetcher, name)
+
+    def write(self, filepath, *_bbox):
+        shutil.copyfile(self._osm_path, filepath)
+
+    def iter_write(self, filepath, *_bbox):
+        shutil.copyfile(self._osm_path, filepath)
+        tiles, self._tiles = self._tiles, None
+        return iter(tiles or ())
+
+    def discard(self):
+        self._tiles = None
+        try:
+            os.remove(self._osm_path)
+        except OSError:
+            pass
+
+
+def _city_pack_path(addon):
+    """Absolute path of the city pack selected in the scene, or None to use live Overpass."""
+    path = getattr(addon, "route_city_pack", "")
+    return bpy.path.abspath(path) if path else None
+
+
+def _remove_water_file(path):
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _discard_water_future(future):
+    """Drop a background water download whose import failed; its file is removed once it finishes."""
+    def _cleanup(done):
+        if not done.cancelled() and done.exception() is None:
+            _remove_water_file(done.result())
+
+    future.cancel()
+    future.add_done_callback(_cleanup)
+
+
+class _StaticTileFetcher:
+    """Route fetcher that writes one already downloaded tile payload."""
+
+    pipelined = False
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def write(self, filepath, *_bbox):
+        with open(filepath, "wb") as f:
+            f.write(self._payload)
+
+
+def _redraw_sidebar(context):
+    wm = getattr(context, "window_manager", None)
+    for window in getattr(wm, "windows", []) or []:
+        screen = getattr(window, "screen", None)
+        for area in getattr(screen, "areas", []) or []:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
 try:
     from . import (
         resolve as route_resolve,
@@ -238,11 +322,16 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
     _dialog_stats = None
     _tile_warning = False
     _route_state_manager = RouteStateManager() if RouteStateManager else None
+    _job = None
+    _timer = None
+    _stage_timings = None
+    _water_osm_file = None
 
     # Overpass configuration (from config module)
     _overpass_min_interval_ms = DEFAULT_CONFIG.api.overpass_min_interval_ms
     _overpass_timeout_s = DEFAULT_CONFIG.api.overpass_timeout_s
     _overpass_max_retries = DEFAULT_CONFIG.api.overpass_max_retries
+    _overpass_max_workers = DEFAULT_CONFIG.api.overpass_max_workers
 
     def _ensure_base_scene(self, context):
         """Append the base scene from assets/base.blend and switch context to it.
@@ -339,6 +428,8 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
         if not route_ctx:
             return {'CANCELLED'}
 
+        # Reused by execute() so the dialog doesn't cost a second geocode/OSRM round
+        self._prepared = route_ctx
         self._record_dialog_stats(route_ctx)
         self._needs_confirm = True
 
@@ -423,10 +514,25 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
         # lighting, and render settings come from a known template.
         context = self._ensure_base_scene(context)
 
-        route_ctx = self._ensure_prepared(context, report_tag='WARNING')
+        # Interactive sessions download in the background and stay responsive;
+        # background Blender (batch renders) keeps the synchronous path.
+        if self._can_run_modal(context):
+            return self._start_modal(context)
+
+        stage_start = time.perf_counter()
+        route_ctx = self._prepared or self._ensure_prepared(context, report_tag='WARNING')
         if not route_ctx:
             return {'CANCELLED'}
+        self._stage_timings = {'prepare': time.perf_counter() - stage_start}
+        return self._run_import(context, route_ctx)
+
+    def _run_import(self, context, route_ctx, fetcher=None):
+        """Import a prepared route and finish the scene (main thread only).
 
+        ``fetcher`` replaces the Overpass fetcher, e.g. with the tiles already
+        downloaded by the background stage of the modal import.
+        """
+        timings = self._stage_timings if self._stage_timings is not None else {}
         if not self._dialog_stats:
             self._record_dialog_stats(route_ctx)
 
@@ -437,8 +543,9 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
         self._over_limit = False
         route_obj = None
 
+        stage_start = time.perf_counter()
         try:
-            route_obj = self._import_route(context, route_ctx)
+            route_obj = self._import_route(context, route_ctx, fetcher=fetcher)
         except Exception as exc:
             self.report({'ERROR'}, f"Route import error: {exc}")
             return {'CANCELLED'}
@@ -447,6 +554,8 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
             self._summary_logged = False
             self._dialog_stats = None
             self._tile_warning = False
+        timings['build'] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
 
         # Auto-append assets
         pipeline_result = self._auto_append_assets(context, route_ctx, route_obj=route_obj)
@@ -464,6 +573,7 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
                     continue
                 target_scene["blosm_import_bbox"] = bbox
                 target_scene["blosm_import_tiles"] = tiles
+                _store_osm_ids(target_scene, getattr(blenderApp.app, 'last_route_osm_ids', None))
         except Exception as exc:
             print(f"[BLOSM] WARN storing import bbox/tiles failed: {exc}")
 
@@ -508,12 +618,158 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
         except Exception as exc:
             print(f"[BLOSM] WARN storing import bbox/tiles failed: {exc}")
 
+        timings['finalize'] = time.perf_counter() - stage_start
+        try:
+            performance_tracker.save_stage_timings(route_ctx.tile_count, timings)
+        except Exception as perf_exc:
+            self._log(f'Performance tracking error: {perf_exc}')
+        self._stage_timings = None
+
         distance_km = route_ctx.route.distance_m / 1000.0 if hasattr(route_ctx, 'route') else 0.0
         self.report({'INFO'}, f"Route imported (~{distance_km:.2f} km)")
         return {'FINISHED'}
 
+    # --- Modal import: network on a worker thread, bpy on the main thread ---
+
+    def _can_run_modal(self, context):
+        if bpy.app.background:
+            return False
+        addon = getattr(context.scene, "blosm", None)
+        if addon is not None and not getattr(addon, "route_background_fetch", True):
+            return False
+        return getattr(context, "window", None) is not None and getattr(context, "window_manager", None) is not None
+
+    def _start_modal(self, context):
+        active = import_job.get_active_job()
+        if active is not None and not active.done:
+            self.report({'WARNING'}, "A route import is already running")
+            return {'CANCELLED'}
+        addon = context.scene.blosm
+        # Everything read from bpy is captured here; the worker only gets plain data
+        request = self._route_request(context)
+        options = self._fetch_options(context)
+        fetch_water = bool(addon.route_import_water)
+        eta_hint = (self._dialog_stats or {}).get('eta_seconds')
+        job = import_job.RouteImportJob(eta_hint_s=eta_hint)
+        job.start(type(self)._background_fetch, self._prepared, request, options, fetch_water)
+        self._prepared = None
+        import_job.set_active_job(job)
+        self._job = job
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.2, window=context.window)
+        wm.modal_handler_add(self)
+        self.report({'INFO'}, "Route import running in the background (Esc to cancel)")
+        return {'RUNNING_MODAL'}
+
+    @classmethod
+    def _background_fetch(cls, job, route_ctx, request, options, fetch_water):
+        """Worker thread: geocoding, routing and all downloads. Must not touch bpy."""
+        if route_ctx is None:
+            with job.run_stage("prepare"):
+                route_ctx = prepare_route(**request)
+        if job.cancelled:
+            raise RouteImportCancelled("Route import cancelled")
+        # Water tiles download alongside the road/building tiles; the "water"
+        # stage only waits for whatever is still outstanding afterwards.
+        water_pool = water_future = None
+        if fetch_water:
+            water_bounds = water_manager.water_fetch_bounds(route_ctx.padded_bbox)
+            water_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blosm-water")
+            water_future = water_pool.submit(
+                water_manager.fetch_raw_water_data,
+                *water_bounds,
+                user_agent=options["user_agent"],
+                cancel_event=job.cancel_event,
+                city_pack=city_pack.open_pack(options["city_pack"]),
+            )
+            water_pool.shutdown(wait=False)
+        fd, osm_path = tempfile.mkstemp(prefix="blosm_route_", suffix=".osm")
+        os.close(fd)
+        tiles = None
+        try:
+            with job.run_stage("overpass"):
+                fetcher = cls._create_fetcher(options, route_ctx, progress=job, cancel_event=job.cancel_event)
+                if fetcher.pipelined:
+                    # Each tile is decoded here while the next ones download; only the
+                    # conditions and managers are left for the main thread
+                    tiles = [
+                        parallel.decodeElements(elements)
+                        for elements in fetcher.iter_write(osm_path, *route_ctx.padded_bbox)
+                    ]
+                else:
+                    fetcher.write(osm_path, *route_ctx.padded_bbox)
+        except BaseException:
+            try:
+                os.remove(osm_path)
+            except OSError:
+                pass
+            if water_future is not None:
+                _discard_water_future(water_future)
+            raise
+        prefetched = _PrefetchedFetcher(fetcher, osm_path, tiles)
+        water_file = None
+        if water_future is not None:
+            try:
+                with job.run_stage("water"):
+                    water_file = water_future.result()
+            except BaseException:
+                prefetched.discard()
+                raise
+        return route_ctx, prefetched, water_file
+
+    def modal(self, context, event):
+        job = self._job
+        if job is None:
+            return {'CANCELLED'}
+        if event.type == 'ESC' and event.value == 'PRESS':
+            job.cancel()
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        _redraw_sidebar(context)
+        if not job.done:
+            return {'PASS_THROUGH'}
+
+        self._stop_modal(context)
+        if job.cancelled or isinstance(job.error, RouteImportCancelled):
+            if job.error is None and job.result:
+                job.result[1].discard()
+                _remove_water_file(job.result[2])
+            self.report({'WARNING'}, "Route import cancelled")
+            return {'CANCELLED'}
+        if isinstance(job.error, RouteServiceError):
+            self.report({'WARNING'}, str(job.error))
+            return {'CANCELLED'}
+        if job.error is not None:
+            self.report({'ERROR'}, f"Route import error: {job.error}")
+            return {'CANCELLED'}
+
+        route_ctx, fetcher, water_file = job.result
+        self._stage_timings = dict(job.timings)
+        self._water_osm_file = water_file
+        try:
+            return self._run_import(context, route_ctx, fetcher=fetcher)
+        finally:
+            self._water_osm_file = None
+            fetcher.discard()
+            _remove_water_file(water_file)
+
+    def _stop_modal(self, context):
+        if self._timer is not None:
+            try:
+                context.window_manager.event_timer_remove(self._timer)
+            except Exception:
+                pass
+            self._timer = None
+        if import_job.get_active_job() is self._job:
+            import_job.set_active_job(None)
+        _redraw_sidebar(context)
+
     def cancel(self, context):
         """Cancel the route operation"""
+        if self._job is not None:
+            self._job.cancel()
+            self._stop_modal(context)
+            self._job = None
         self._prepared = None
         self._summary_logged = False
         self._dialog_stats = None
@@ -576,30 +832,47 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
             return None
         return {"level_height": level_height, "levels": tuple(distribution)}
 
+    def _route_request(self, context):
+        """Collect the ``prepare_route`` arguments from the scene properties."""
+        addon = context.scene.blosm
+        padding_m = addon.route_padding_m
+
+        # Smart water import: use targeted queries for nearby water
+        include_water = bool(addon.route_import_water)
+        smart_water_padding = 500.0  # Moderate padding for smart water import
+        if include_water:
+            # Use moderate padding for smart water import instead of massive expansion
+            original_padding = padding_m
+            padding_m = max(padding_m, smart_water_padding)  # 500m for nearby water features
+            if padding_m != original_padding:
+                print(f"[BLOSM] Water import enabled: smart padding from {original_padding}m to {padding_m}m for nearby water features")
+
+        # Collect waypoint addresses
+        waypoint_addresses = [wp.address for wp in addon.route_waypoints if wp.address.strip()]
+
+        # Corridor mode buffers the route polyline by the user padding (not the
+        # widened water padding) and keeps only the tiles touching that buffer.
+        corridor_padding_m = None
+        endpoint_padding_m = 0.0
+        if getattr(addon, "route_corridor_mode", False):
+            corridor_padding_m = addon.route_padding_m
+            endpoint_padding_m = addon.route_corridor_endpoint_m
+
+        return {
+            "start_address": addon.route_start_address,
+            "end_address": addon.route_end_address,
+            "padding_m": padding_m,
+            "user_agent": self._resolved_user_agent,
+            "waypoint_addresses": waypoint_addresses if waypoint_addresses else None,
+            "corridor_padding_m": corridor_padding_m,
+            "endpoint_padding_m": endpoint_padding_m,
+        }
+
     def _ensure_prepared(self, context, log=True, report_tag='ERROR'):
         """Ensure route is prepared"""
         # Get route parameters from scene properties
         try:
-            addon = context.scene.blosm
-            start_address = addon.route_start_address
-            end_address = addon.route_end_address
-            padding_m = addon.route_padding_m
-            user_agent = self._resolved_user_agent
-
-            # Smart water import: use targeted queries for nearby water
-            include_water = bool(addon.route_import_water)
-            smart_water_padding = 500.0  # Moderate padding for smart water import
-            if include_water:
-                # Use moderate padding for smart water import instead of massive expansion
-                original_padding = padding_m
-                padding_m = max(padding_m, smart_water_padding)  # 500m for nearby water features
-                if padding_m != original_padding:
-                    print(f"[BLOSM] Water import enabled: smart padding from {original_padding}m to {padding_m}m for nearby water features")
-
-            # Collect waypoint addresses
-            waypoint_addresses = [wp.address for wp in addon.route_waypoints if wp.address.strip()]
-
-            return prepare_route(start_address, end_address, padding_m, user_agent, waypoint_addresses=waypoint_addresses if waypoint_addresses else None)
+            return prepare_route(**self._route_request(context))
         except RouteServiceError as e:
             # Provide clear, friendly guidance for address/routing problems
             if log:
@@ -687,15 +960,65 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
             print(f"[BLOSM] {message}")
 
 
-    def _import_route(self, context, route_ctx):
+    def _fetch_options(self, context):
+        """Overpass fetch settings captured from the scene (plain data, safe to pass to a worker)."""
         addon = context.scene.blosm
-        include_roads = bool(addon.route_import_roads)
-        include_buildings = bool(addon.route_import_buildings)
+        separate_tiles = bool(getattr(addon, 'route_import_separate_tiles', False))
+        return {
+            "user_agent": getattr(self, '_resolved_user_agent', self._resolve_user_agent(context)),
+            "include_roads": bool(addon.route_import_roads),
+            "include_buildings": bool(addon.route_import_buildings),
+            # DISABLE STANDARD WATER IMPORT
+            # We handle water exclusively via the custom water_manager to ensure proper styling (Stitch -> Extrude -> Boolean).
+            "include_water": False,
+            "separate_tiles": separate_tiles,
+            "pipelined": bool(getattr(addon, 'route_pipelined_import', True)) and not separate_tiles,
+            "checkpoint": bool(getattr(addon, 'route_resume_downloads', True))
+            and DEFAULT_CONFIG.api.overpass_checkpoint_enabled,
+            "city_pack": _city_pack_path(addon),
+        }
+
+    @classmethod
+    def _create_fetcher(cls, options, route_ctx, progress=None, cancel_event=None):
+        pack = city_pack.open_pack(options.get("city_pack"))
+        tile_checkpoint = None
+        if options.get("checkpoint") and pack is None:
+            checkpoint.prune_checkpoints()
+            layers = "r{:d}b{:d}w{:d}".format(
+                options["include_roads"], options["include_buildings"], options["include_water"]
+            )
+            tile_checkpoint = checkpoint.TileCheckpoint(checkpoint.make_job_id(route_ctx.tiles, layers))
+            if tile_checkpoint.count():
+                print(f"[BLOSM] Resuming download: {tile_checkpoint.count()} layer payload(s) already on disk")
+        return OverpassFetcher(
+            options["user_agent"],
+            options["include_roads"],
+            options["include_buildings"],
+            include_water=options["include_water"],
+            min_interval_ms=cls._overpass_min_interval_ms,
+            timeout_s=cls._overpass_timeout_s,
+            max_retries=cls._overpass_max_retries,
+            logger=None,
+            progress=progress,
+            store_tiles=options["separate_tiles"],
+            max_workers=cls._overpass_max_workers,
+            tiles=route_ctx.tiles,
+            pipelined=options["pipelined"],
+            cancel_event=cancel_event,
+            checkpoint=tile_checkpoint,
+            city_pack=pack,
+        )
+
+    def _import_route(self, context, route_ctx, fetcher=None):
+        addon = context.scene.blosm
+        options = self._fetch_options(context)
+        include_roads = options["include_roads"]
+        include_buildings = options["include_buildings"]
         # DISABLE STANDARD WATER IMPORT
         # We handle water exclusively via the custom water_manager to ensure proper styling (Stitch -> Extrude -> Boolean).
         # Water import is handled by BLOSM_OT_ImportData; we only extend the tiles here, not re-import.
-        include_water = False
-        separate_tiles = bool(getattr(addon, 'route_import_separate_tiles', False))
+        include_water = options["include_water"]
+        separate_tiles = options["separate_tiles"]
         south, west, north, east = route_ctx.padded_bbox
         state = self._capture_state(addon)
         result = {'CANCELLED'}
@@ -719,17 +1042,18 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
             if separate_tiles and getattr(route_ctx, 'tiles', None):
                 width_samples = []
                 height_samples = []
-                for idx, tile in enumerate(route_ctx.tiles, 1):
-                    south_t, west_t, north_t, east_t = tile
-                    cx_lat = (south_t + north_t) * 0.5
-                    cx_lon = (west_t + east_t) * 0.5
-                    cx, cy, _ = projection.fromGeographic(cx_lat, cx_lon)
-                    expected_tiles.append((idx, cx, cy))
-                    west_xy = projection.fromGeographic(south_t, west_t)
-                    east_xy = projection.fromGeographic(south_t, east_t)
-                    north_xy = projection.fromGeographic(north_t, west_t)
-                    width_samples.append(abs(east_xy[0] - west_xy[0]))
-                    height_samples.append(abs(north_xy[1] - west_xy[1]))
+                # Project the centroid and three corners of every tile in one pass
+                lats = []
+                lons = []
+                for south_t, west_t, north_t, east_t in route_ctx.tiles:
+                    lats.extend(((south_t + north_t) * 0.5, south_t, south_t, north_t))
+                    lons.extend(((west_t + east_t) * 0.5, west_t, east_t, west_t))
+                xs, ys = projectBatch(projection, lats, lons)
+                for idx in range(1, len(route_ctx.tiles) + 1):
+                    k = 4 * (idx - 1)
+                    expected_tiles.append((idx, xs[k], ys[k]))
+                    width_samples.append(abs(xs[k + 2] - xs[k + 1]))
+                    height_samples.append(abs(ys[k + 3] - ys[k + 1]))
                 if width_samples:
                     tile_w_m = sum(width_samples) / len(width_samples)
                 if height_samples:
@@ -744,18 +1068,8 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
                 }
             else:
                 blenderApp.app.last_route_tile_stats = None
-            fetcher = OverpassFetcher(
-                getattr(self, '_resolved_user_agent', self._resolve_user_agent(context)),
-                include_roads,
-                include_buildings,
-                include_water=include_water,
-                min_interval_ms=self._overpass_min_interval_ms,
-                timeout_s=self._overpass_timeout_s,
-                max_retries=self._overpass_max_retries,
-                logger=None,
-                progress=progress_ref,
-                store_tiles=separate_tiles,
-            )
+            if fetcher is None:
+                fetcher = self._create_fetcher(options, route_ctx, progress=progress_ref)
             blenderApp.app.route_fetcher = fetcher
             if include_buildings:
                 fallback_config = self._resolve_weighted_fallback(addon)
@@ -817,8 +1131,10 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
             else:
                 self._configure_addon(addon, south, west, north, east, include_roads, include_buildings, include_water)
                 result = bpy.ops.blosm.import_data('EXEC_DEFAULT')
-            avg_ms = fetcher.average_tile_ms
+            avg_ms = fetcher.effective_tile_ms or fetcher.average_tile_ms
             total_elapsed_s = fetcher.total_elapsed_s
+            # Way/relation ids in the map, stored on the scene for Extend City
+            blenderApp.app.last_route_osm_ids = getattr(fetcher, 'merged_ids', None)
         except Exception as exc:
             raise RouteServiceError('BLOSM import failed: {}'.format(exc)) from exc
         finally:
@@ -874,7 +1190,7 @@ class BLOSM_OT_FetchRouteMap(bpy.types.Operator):
         # Process Water & Islands (New System)
         try:
             from . import water_manager
-            water_manager.process(context, bounds=route_ctx.padded_bbox)
+            water_manager.process(context, bounds=route_ctx.padded_bbox, osm_file=self._water_osm_file)
         except Exception as water_exc:
             self._log(f'Water processing failed: {water_exc}')
 
@@ -1386,114 +1702,44 @@ def _normalize_tile(tile: tuple[float, float, float, float]) -> tuple[float, flo
     return tuple(round(coord, 7) for coord in tile)
 
 
-def _tile_set_from_prop(scene_prop):
+def _tile_map_from_prop(scene_prop):
+    """Map tile keys to the tile bboxes stored in ``blosm_import_tiles``."""
     tiles = []
     if scene_prop is None:
-        return set()
+        return {}
     try:
         tiles = [tuple(t) for t in scene_prop]
     except Exception:
         pass
-    return {_normalize_tile(tile) for tile in tiles}
-
-
-def _clear_collection_objects(coll: bpy.types.Collection) -> int:
-    """Remove all objects in the given collection (and unlink from other collections)."""
-    if coll is None:
-        return 0
-    removed = 0
-    for obj in list(coll.objects):
-        try:
-            for parent in list(getattr(obj, "users_collection", []) or []):
-                try:
-                    parent.objects.unlink(obj)
-                except Exception:
-                    pass
-            bpy.data.objects.remove(obj, do_unlink=True)
-            removed += 1
-        except Exception:
-            pass
-    return removed
+    return {_tile_key(tile): _normalize_tile(tile) for tile in tiles if len(tile) == 4}
 
 
-def _remove_collection(coll: bpy.types.Collection) -> bool:
-    if coll is None:
-        return False
-    for scene in bpy.data.scenes:
-        root = getattr(scene, "collection", None)
-        if root and coll.name in root.children.keys():
-            try:
-                root.children.unlink(coll)
-            except Exception:
-                pass
-    for parent in list(getattr(coll, "users_collection", []) or []):
-        try:
-            parent.children.unlink(coll)
-        except Exception:
-            pass
-    bpy.data.collections.remove(coll)
-    return True
-
-
-def _remove_existing_map_assets(scene: bpy.types.Scene) -> dict[str, int]:
-    """Remove previously imported building/road/water/map collections before a full reimport."""
-    summary = {
-        "buildings": 0,
-        "roads": 0,
-        "water": 0,
-        "islands": 0,
-        "map_collections": 0,
-        "way_profiles": 0,
+def _store_osm_ids(scene: bpy.types.Scene, osm_ids) -> None:
+    """Store the way/relation ids of the imported map so Extend City can skip them."""
+    if scene is None or osm_ids is None:
+        return
+    for kind in ("way", "relation"):
+        key = f"blosm_import_{kind}_ids"
+        ids = osm_ids.get(kind, ())
+        if ids:
+            # A list property would keep one double per id in the .blend file
+            scene[key] = pack_osm_ids(ids)
+        elif key in scene:
+            del scene[key]
+
+
+def _load_osm_ids(scene: bpy.types.Scene) -> dict[str, set[int]]:
+    return {
+        kind: unpack_osm_ids(scene.get(f"blosm_import_{kind}_ids") or "")
+        for kind in ("way", "relation")
     }
 
-    summary["buildings"] = _clear_collection_objects(bpy.data.collections.get("ASSET_BUILDINGS"))
-    summary["roads"] = _clear_collection_objects(bpy.data.collections.get("ASSET_ROADS"))
-    summary["water"] = _clear_collection_objects(bpy.data.collections.get("ASSET_WATER"))
-    summary["islands"] = _clear_collection_objects(bpy.data.collections.get("ASSET_ISLAND"))
-    summary["water"] += _clear_collection_objects(bpy.data.collections.get("ASSET_WATER_RESULT"))
-
-    # Remove map_*.osm collections so finalizer can recreate cleanly
-    map_cols = [
-        coll for coll in list(bpy.data.collections)
-        if coll and coll.name and coll.name.lower().startswith("map_") and coll.name.lower().endswith(".osm")
-    ]
-    for coll in map_cols:
-        _clear_collection_objects(coll)
-        if _remove_collection(coll):
-            summary["map_collections"] += 1
-
-    wp = bpy.data.collections.get("way_profiles")
-    if wp is not None:
-        _clear_collection_objects(wp)
-        if _remove_collection(wp):
-            summary["way_profiles"] = 1
-
-    return summary
-
-
-def _collect_map_road_curves() -> list[bpy.types.Object]:
-    """Return importer-created road curve objects (map_*.osm_roads_*)."""
-    curves: list[bpy.types.Object] = []
-    for obj in bpy.data.objects:
-        if obj.type != 'CURVE':
-            continue
-        name = obj.name.lower()
-        if name.startswith("map_") and "_roads_" in name:
-            curves.append(obj)
-    return curves
-
-
-def _rebuild_road_mesh(context: bpy.types.Context) -> bpy.types.Object | None:
-    """Convert map_*.osm road curves into the unified ASSET_ROADS mesh."""
-    road_curves = _collect_map_road_curves()
-    if not road_curves:
-        print("[BLOSM] ExtendCity roads: no road curves detected after import")
-        return None
 
+def _curves_to_meshes(context: bpy.types.Context, curves: list[bpy.types.Object]) -> list[bpy.types.Object]:
+    """Evaluate road curves into temporary mesh objects linked to the scene."""
     depsgraph = context.evaluated_depsgraph_get()
     tmp_objects: list[bpy.types.Object] = []
-
-    for curve in road_curves:
+    for curve in curves:
         try:
             mesh_data = bpy.data.meshes.new_from_object(
                 curve, preserve_all_data_layers=True, depsgraph=depsgraph
@@ -1505,33 +1751,69 @@ def _rebuild_road_mesh(context: bpy.types.Context) -> bpy.types.Object | None:
         tmp_obj.matrix_world = curve.matrix_world.copy()
         context.scene.collection.objects.link(tmp_obj)
         tmp_objects.append(tmp_obj)
+    return tmp_objects
 
-    if not tmp_objects:
-        print("[BLOSM] WARN extend: no temporary road meshes created")
-        return None
 
+def _join_objects(context: bpy.types.Context, target: bpy.types.Object, sources: list[bpy.types.Object]) -> bool:
+    """Join ``sources`` into ``target``, which keeps its name, data block and modifiers."""
     if bpy.ops.object.mode_set.poll():
         try:
             bpy.ops.object.mode_set(mode='OBJECT')
         except Exception:
             pass
-
     bpy.ops.object.select_all(action='DESELECT')
-    for obj in tmp_objects:
-        obj.select_set(True)
-    context.view_layer.objects.active = tmp_objects[0]
-
+    try:
+        for obj in sources:
+            obj.select_set(True)
+        target.select_set(True)
+    except RuntimeError as exc:
+        print(f"[BLOSM] WARN extend: cannot select objects to join into {target.name}: {exc}")
+        return False
+    context.view_layer.objects.active = target
     try:
         bpy.ops.object.join()
     except Exception as exc:
-        print(f"[BLOSM] WARN extend: joining road meshes failed: {exc}")
-        return None
+        print(f"[BLOSM] WARN extend: joining into {target.name} failed: {exc}")
+        return False
+    return True
+
+
+def _weld_seam(obj: bpy.types.Object, first_new_vertex: int, distance: float) -> int:
+    """Weld appended vertices (index >= ``first_new_vertex``) onto coincident existing ones.
+
+    Roads split into two OSM ways at a tile seam end in identical
+    cross-sections, so welding them makes the old and new parts one surface.
+    """
+    import bmesh
+    from mathutils import kdtree
+
+    mesh = obj.data
+    if first_new_vertex <= 0 or first_new_vertex >= len(mesh.vertices):
+        return 0
+    bm = bmesh.new()
+    try:
+        bm.from_mesh(mesh)
+        bm.verts.ensure_lookup_table()
+        old_verts = bm.verts[:first_new_vertex]
+        tree = kdtree.KDTree(len(old_verts))
+        for index, vert in enumerate(old_verts):
+            tree.insert(vert.co, index)
+        tree.balance()
+        targetmap = {}
+        for vert in bm.verts[first_new_vertex:]:
+            _co, index, dist = tree.find(vert.co)
+            if index is not None and dist <= distance:
+                targetmap[vert] = old_verts[index]
+        if targetmap:
+            bmesh.ops.weld_verts(bm, targetmap=targetmap)
+            bm.to_mesh(mesh)
+            mesh.update()
+        return len(targetmap)
+    finally:
+        bm.free()
 
-    road_obj = context.view_layer.objects.active
-    if not road_obj:
-        print("[BLOSM] WARN extend: no active road mesh after join")
-        return None
 
+def _link_road_asset(context: bpy.types.Context, road_obj: bpy.types.Object) -> None:
     road_obj.name = "ASSET_ROADS"
     road_obj.hide_set(False)
     road_obj.hide_render = False
@@ -1552,8 +1834,82 @@ def _rebuild_road_mesh(context: bpy.types.Context) -> bpy.types.Object | None:
             except RuntimeError:
                 pass
 
-    print("[BLOSM] ExtendCity roads mesh rebuilt:", road_obj.name)
-    return road_obj
+
+def _append_road_mesh(context: bpy.types.Context, road_curves: list[bpy.types.Object]) -> bpy.types.Object | None:
+    """Convert the road curves of an extension and append them to the ASSET_ROADS mesh.
+
+    The existing mesh is kept as is; only the new geometry is converted, and
+    its seam vertices are welded onto the existing roads. Without an
+    ASSET_ROADS mesh the new roads become it.
+    """
+    if not road_curves:
+        print("[BLOSM] ExtendCity roads: no new road curves in the extension")
+        return None
+    tmp_objects = _curves_to_meshes(context, road_curves)
+    if not tmp_objects:
+        print("[BLOSM] WARN extend: no temporary road meshes created")
+        return None
+
+    try:
+        from ..road.processor import create_unified_material
+        material = create_unified_material()
+    except Exception as exc:
+        print(f"[BLOSM] WARN extend: road material unavailable: {exc}")
+        material = None
+    if material is not None:
+        for obj in tmp_objects:
+            obj.data.materials.clear()
+            obj.data.materials.append(material)
+
+    road_obj = bpy.data.objects.get("ASSET_ROADS")
+    if road_obj is not None and road_obj.type == 'MESH':
+        target, sources = road_obj, tmp_objects
+        first_new_vertex = len(road_obj.data.vertices)
+    else:
+        target, sources = tmp_objects[0], tmp_objects[1:]
+        first_new_vertex = 0
+
+    if sources and not _join_objects(context, target, sources):
+        for obj in tmp_objects:
+            if obj is not road_obj:
+                bpy.data.objects.remove(obj, do_unlink=True)
+        return None
+
+    if first_new_vertex:
+        welded = _weld_seam(target, first_new_vertex, DEFAULT_CONFIG.operator.extend_weld_distance_m)
+        print(f"[BLOSM] ExtendCity roads appended to {target.name}; welded {welded} seam vertex(es)")
+    else:
+        _link_road_asset(context, target)
+        print("[BLOSM] ExtendCity roads mesh created:", target.name)
+
+    # The curves are now part of the mesh, as after the initial import
+    for curve in road_curves:
+        try:
+            bpy.data.objects.remove(curve, do_unlink=True)
+        except Exception:
+            pass
+    return target
+
+
+def _append_buildings(context: bpy.types.Context, new_objects: list[bpy.types.Object]) -> bool:
+    """Join the buildings of an extension into the existing BUILDINGS mesh.
+
+    Returns False if there is no BUILDINGS mesh to extend; the finalizer then
+    promotes the new buildings object instead.
+    """
+    new_buildings = [
+        obj for obj in new_objects
+        if obj.type == 'MESH' and obj.name.casefold().endswith("_buildings")
+    ]
+    if not new_buildings:
+        return True
+    target = bpy.data.objects.get("BUILDINGS")
+    if target is None or target.type != 'MESH':
+        return False
+    if not _join_objects(context, target, new_buildings):
+        return False
+    print(f"[BLOSM] ExtendCity buildings appended to {target.name}")
+    return True
 
 
 def _record_extend_history(scene: bpy.types.Scene, bbox: tuple[float, ...], delta_tiles: list[tuple[float, float, float, float]]):
@@ -1620,7 +1976,7 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
 
         bbox_prop = scene.get("blosm_import_bbox")
         stored_bbox = list(bbox_prop) if bbox_prop is not None else []
-        stored_tiles = _tile_set_from_prop(scene.get("blosm_import_tiles"))
+        stored_tiles = _tile_map_from_prop(scene.get("blosm_import_tiles"))
         if len(stored_bbox) != 4:
             self.report({'ERROR'}, "No existing import state found")
             return None
@@ -1636,11 +1992,13 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
         lon_pad = _meters_to_lon_delta(expand_m, mid_lat)
         new_bbox = (south - lat_pad, west - lon_pad, north + lat_pad, east + lon_pad)
 
-        tile_items = list(_tile_bbox(*new_bbox))
-        normalized_tiles = {_normalize_tile(tile) for tile in tile_items}
-        tile_lookup = { _normalize_tile(tile): tile for tile in tile_items }
-        delta_keys = [key for key in normalized_tiles if key not in stored_tiles]
-        delta_tiles = [tile_lookup[key] for key in delta_keys]
+        # Tiles are snapped to the global grid, so the delta is plain set
+        # arithmetic on tile keys.
+        tile_items = list(_tiles_for_bbox(*new_bbox))
+        tile_lookup = {_tile_key(tile): tile for tile in tile_items}
+        normalized_tiles = {key: _normalize_tile(tile) for key, tile in tile_lookup.items()}
+        delta_keys = tile_lookup.keys() - stored_tiles.keys()
+        delta_tiles = [tile for key, tile in tile_lookup.items() if key in delta_keys]
         print(f"[BLOSM] ExtendCity delta tiles: {len(delta_tiles)} new of {len(tile_items)} total, expand={expand_m:.1f}m")
         width_m, height_m = bbox_size(new_bbox)
         tile_hint_m = getattr(DEFAULT_CONFIG.api, "overpass_tile_max_m", 1400.0)
@@ -1651,7 +2009,7 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
             "expand_m": expand_m,
             "stored_tiles": stored_tiles,
             "new_tiles": tile_items,
-            "new_tile_keys": normalized_tiles,
+            "new_tile_map": normalized_tiles,
             "delta_tiles": delta_tiles,
             "new_bbox": new_bbox,
             "bbox_width": width_m,
@@ -1660,15 +2018,16 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
             "tile_hint_m": tile_hint_m,
         }
 
-    def _persist_import_state(self, context, bbox, tiles):
+    def _persist_import_state(self, context, bbox, tiles, osm_ids=None):
         scenes = {context.scene, getattr(bpy.context, "scene", None)}
         for target_scene in scenes:
             if not target_scene:
                 continue
             try:
                 target_scene["blosm_import_bbox"] = list(bbox)
-                normalized_tiles = sorted(tiles)
+                normalized_tiles = sorted(tiles.values())
                 target_scene["blosm_import_tiles"] = [list(t) for t in normalized_tiles]
+                _store_osm_ids(target_scene, osm_ids)
             except Exception:
                 pass
 
@@ -1734,8 +2093,12 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
         expand_m = stats["expand_m"]
         scene = stats["scene"]
 
-        removal = _remove_existing_map_assets(scene)
-        print(f"[BLOSM] ExtendCity cleared map assets: {removal}")
+        # Only the delta tiles are fetched. Ways and relations already in the
+        # scene (those crossing into the new tiles) are skipped while merging,
+        # so the extension holds just the new geometry.
+        known_ids = _load_osm_ids(scene)
+        if not known_ids["way"]:
+            print("[BLOSM] ExtendCity: no imported OSM ids stored; elements crossing the seam may be duplicated")
 
         progress = RouteProgressReporter(context)
 
@@ -1743,20 +2106,22 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
             user_agent=BLOSM_OT_FetchRouteMap._resolved_user_agent,
             include_roads=bool(getattr(addon, "route_import_roads", True)),
             include_buildings=bool(getattr(addon, "route_import_buildings", True)),
-            include_water=bool(getattr(addon, "route_import_water", True)),
             min_interval_ms=DEFAULT_CONFIG.api.overpass_min_interval_ms,
             timeout_s=DEFAULT_CONFIG.api.overpass_timeout_s,
             max_retries=DEFAULT_CONFIG.api.overpass_max_retries,
             progress=progress,
-            store_tiles=True,
+            max_workers=DEFAULT_CONFIG.api.overpass_max_workers,
+            exclude_ids=known_ids,
+            city_pack=city_pack.open_pack(_city_pack_path(addon)),
         )
 
         south, west, north, east = new_bbox
 
+        objects_before = set(bpy.data.objects.keys())
         tmp_dir = tempfile.mkdtemp(prefix="blosm_extend_")
         path = os.path.join(tmp_dir, "map_extend.osm")
         try:
-            fetcher.write(path, south, west, north, east)
+            fetcher.write_tiles(path, delta_tiles)
 
             state = self._capture_state(addon)
             try:
@@ -1786,7 +2151,8 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
                 addon.maxLon = east
                 addon.buildings = bool(getattr(addon, "route_import_buildings", True))
                 addon.highways = bool(getattr(addon, "route_import_roads", True))
-                addon.water = bool(getattr(addon, "route_import_water", True))
+                # Water is rebuilt by water_manager below
+                addon.water = False
 
                 bpy.ops.blosm.import_data("EXEC_DEFAULT")
             finally:
@@ -1807,36 +2173,69 @@ class BLOSM_OT_ExtendCityArea(bpy.types.Operator):
             except Exception:
                 pass
 
+        new_objects = [obj for obj in bpy.data.objects if obj.name not in objects_before]
+        print(f"[BLOSM] ExtendCity imported {len(new_objects)} new object(s)")
+
         try:
-            bldg_summary = route_buildings.apply_building_nodes(context)
-            if bldg_summary:
-                print("[BLOSM] ExtendCity building nodes:", bldg_summary)
+            from ..road.processor import get_road_objects
+            new_names = {obj.name for obj in new_objects}
+            road_curves = [obj for obj in get_road_objects() if obj.name in new_names]
+            _append_road_mesh(context, road_curves)
         except Exception as exc:
-            print("[BLOSM] WARN extend: building_nodes:", exc)
+            print("[BLOSM] WARN extend: roads:", exc)
 
         try:
-            road_obj = _rebuild_road_mesh(context)
-            if not road_obj:
-                print("[BLOSM] WARN extend: unified road mesh missing after rebuild")
+            buildings_joined = _append_buildings(context, new_objects)
         except Exception as exc:
-            print("[BLOSM] WARN extend: roads:", exc)
+            buildings_joined = False
+            print("[BLOSM] WARN extend: buildings:", exc)
 
+        # Water polygons are stitched across tile borders, so the water layer
+        # is rebuilt for the extended bbox (tiles come from the Overpass cache).
         try:
             water_manager.process(context, bounds=new_bbox)
         except Exception as exc:
             print("[BLOSM] WARN extend: water:", exc)
 
+        # Only the finalizer steps touching the map collections are needed;
+        # route, car and building node setup are left as they are.
         try:
-            route_pipeline_finalizer.run(context.scene)
+            route_pipeline_finalizer.regroup_map_collections(scene)
         except Exception as exc:
             print("[BLOSM] WARN extend: finalizer:", exc)
 
-        all_tile_keys = stored_tiles.union(stats["new_tile_keys"])
-        self._persist_import_state(context, new_bbox, all_tile_keys)
+        if not buildings_joined:
+            try:
+                bldg_summary = route_buildings.apply_building_nodes(context)
+                if bldg_summary:
+                    print("[BLOSM] ExtendCity building nodes:", bldg_summary)
+            except Exception as exc:
+                print("[BLOSM] WARN extend: building_nodes:", exc)
+
+        all_tiles = dict(stored_tiles)
+        all_tiles.update(stats["new_tile_map"])
+        self._persist_import_state(context, new_bbox, all_tiles, fetcher.merged_ids)
         _record_extend_history(scene, new_bbox, delta_tiles)
         self.report({'INFO'}, f"Extended city by {expand_m:.0f} m; fetched {len(delta_tiles)} new tile(s).")
         self._extend_stats = None
         return {'FINISHED'}
 
 
-classes = (BLOSM_OT_FetchRouteMap, BLOSM_OT_ExtendCityArea)
+class BLOSM_OT_CancelRouteImport(bpy.types.Operator):
+    """Cancel the route import running in the background"""
+
+    bl_idname = "blosm.cancel_route_import"
+    bl_label = "Cancel Route Import"
+    bl_description = "Stop the background downloads of the running route import"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        job = import_job.get_active_job()
+        if job is None or job.done:
+            return {'CANCELLED'}
+        job.cancel()
+        self.report({'INFO'}, "Cancelling route import...")
+        return {'FINISHED'}
+
+
+classes = (BLOSM_OT_FetchRouteMap, BLOSM_OT_ExtendCityArea, BLOSM_OT_CancelRouteImport)
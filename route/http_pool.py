@@ -0,0 +1,239 @@
+"""
+Shared keep-alive HTTP connections for the route services.
+
+Nominatim, OSRM and every Overpass endpoint are requested through one
+:class:`HTTPPool`. Idle connections are kept per host and reused, so
+consecutive requests skip the TCP and TLS handshakes, and requests ask for a
+gzip/deflate response which is decompressed chunk by chunk while it is read
+(Overpass XML shrinks about ten-fold on the wire).
+
+Errors are raised as the exceptions ``urllib.request.urlopen`` raises, so
+callers handle both the same way:
+
+- ``urllib.error.HTTPError`` for a response status of 400 or above.
+- ``urllib.error.URLError`` when the request could not be sent.
+- ``TimeoutError`` when the server stops answering.
+- ``http.client.IncompleteRead`` for a truncated body, or
+  ``http.client.HTTPException`` for a body that doesn't decompress.
+
+Requests to hosts reached through a proxy (``*_proxy`` environment
+variables) go through ``urlopen`` so the proxy settings keep working.
+"""
+
+import io
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPException, HTTPSConnection, IncompleteRead
+from typing import Dict, List, Optional, Tuple
+from urllib import error, parse, request
+
+from .config import DEFAULT_CONFIG
+
+
+READ_CHUNK_BYTES = 64 * 1024
+# Connection failures on a reused socket that mean the server closed it while idle
+_STALE_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, HTTPException)
+
+
+@dataclass(frozen=True)
+class PoolResponse:
+    status: int
+    headers: object
+    data: bytes
+    transferred: int  # Bytes received on the wire (before decompression)
+
+
+class HTTPPool:
+    """Per-host pool of idle HTTP(S) connections.
+
+    Thread-safe: a connection is checked out by one request at a time and
+    returned to the pool once its response has been read completely.
+    """
+
+    def __init__(self, max_idle_per_host: int = 4, idle_timeout_s: float = 60.0, compression: bool = True):
+        self.max_idle_per_host = max(0, int(max_idle_per_host))
+        self.idle_timeout_s = max(0.0, float(idle_timeout_s))
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[HTTPConnection, float]]] = {}
+        self.requests = 0
+        self.connections_opened = 0
+        self.bytes_transferred = 0
+        self.bytes_decoded = 0
+
+    def _checkout(self, key: Tuple[str, str, int], timeout: float) -> Tuple[HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if self.idle_timeout_s and now - last_used > self.idle_timeout_s:
+                    conn.close()
+                    continue
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.connections_opened += 1
+        scheme, host, port = key
+        connection_class = HTTPSConnection if scheme == "https" else HTTPConnection
+        return connection_class(host, port, timeout=timeout), False
+
+    def _checkin(self, key: Tuple[str, str, int], conn: HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "idle": sum(len(connections) for connections in self._idle.values()),
+                "bytes_transferred": self.bytes_transferred,
+                "bytes_decoded": self.bytes_decoded,
+            }
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30.0,
+    ) -> PoolResponse:
+        """Send a request and return the complete, decompressed response."""
+        send_headers = dict(headers or {})
+        if self.compression:
+            send_headers.setdefault("Accept-Encoding", "gzip, deflate")
+        parts = parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise error.URLError(f"unsupported URL scheme {scheme!r}")
+        if _uses_proxy(scheme, parts.hostname or ""):
+            return self._request_via_urllib(method, url, body, send_headers, timeout)
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        if self.max_idle_per_host == 0:
+            send_headers.setdefault("Connection", "close")
+
+        while True:
+            conn, reused = self._checkout(key, timeout)
+            if conn.sock is None:
+                try:
+                    conn.connect()
+                except OSError as exc:
+                    conn.close()
+                    raise error.URLError(exc) from exc
+            try:
+                conn.request(method, path, body=body, headers=send_headers)
+                resp = conn.getresponse()
+            except TimeoutError:
+                conn.close()
+                raise
+            except _STALE_ERRORS as exc:
+                conn.close()
+                if reused:
+                    # The server dropped the idle connection; retry on a new one
+                    continue
+                raise error.URLError(exc) from exc
+            except OSError as exc:
+                conn.close()
+                raise error.URLError(exc) from exc
+            break
+
+        try:
+            data, transferred = _read_body(resp)
+        except BaseException:
+            conn.close()
+            raise
+        with self._lock:
+            self.requests += 1
+            self.bytes_transferred += transferred
+            self.bytes_decoded += len(data)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        if resp.status >= 400:
+            raise error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+        return PoolResponse(resp.status, resp.headers, data, transferred)
+
+    def _request_via_urllib(self, method, url, body, headers, timeout) -> PoolResponse:
+        req = request.Request(url, data=body, headers=headers, method=method)
+        with request.urlopen(req, timeout=timeout) as resp:
+            data, transferred = _read_body(resp)
+            status = getattr(resp, "status", 200)
+            with self._lock:
+                self.requests += 1
+                self.bytes_transferred += transferred
+                self.bytes_decoded += len(data)
+            return PoolResponse(status, resp.headers, data, transferred)
+
+
+def _uses_proxy(scheme: str, host: str) -> bool:
+    return scheme in request.getproxies() and not request.proxy_bypass(host)
+
+
+def _read_body(resp) -> Tuple[bytes, int]:
+    """Read a response body, decompressing gzip/deflate as the chunks arrive."""
+    encoding = (resp.headers.get("Content-Encoding") or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decoder = zlib.decompressobj()
+    else:
+        decoder = None
+    chunks = []
+    transferred = 0
+    try:
+        while True:
+            chunk = resp.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            transferred += len(chunk)
+            chunks.append(decoder.decompress(chunk) if decoder is not None else chunk)
+        if decoder is not None:
+            chunks.append(decoder.flush())
+    except zlib.error as exc:
+        raise HTTPException(f"Invalid {encoding} response body: {exc}") from exc
+    data = b"".join(chunks)
+    # read(amt) returns what arrived when the server closes early instead of raising
+    remaining = getattr(resp, "length", None)
+    if remaining or (decoder is not None and not decoder.eof):
+        raise IncompleteRead(data, remaining)
+    return data, transferred
+
+
+_default_pool: Optional[HTTPPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> HTTPPool:
+    """Get the pool shared by all route services."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            api = DEFAULT_CONFIG.api
+            _default_pool = HTTPPool(
+                max_idle_per_host=api.http_max_idle_per_host if api.http_keepalive_enabled else 0,
+                idle_timeout_s=api.http_idle_timeout_s,
+                compression=api.http_compression_enabled,
+            )
+        return _default_pool
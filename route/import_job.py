@@ -0,0 +1,142 @@
+"""
+Background job state for the modal route import.
+
+The worker thread of ``BLOSM_OT_FetchRouteMap`` (geocoding, OSRM, Overpass
+and water downloads) only touches a :class:`RouteImportJob`. The modal
+operator and the sidebar panel read it from the main thread, so nothing in
+this module may use ``bpy``.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+STAGE_LABELS = {
+    "prepare": "Geocoding & routing",
+    "overpass": "Downloading map tiles",
+    "water": "Downloading water",
+    "build": "Building scene",
+    "finalize": "Finalizing",
+}
+
+
+class RouteImportJob:
+    """Progress, per-stage timings and cancellation for one route import.
+
+    Also implements the ``begin/update/end`` progress interface expected by
+    :class:`route.utils.OverpassFetcher`, so it can be handed to the fetcher
+    directly from a worker thread.
+    """
+
+    def __init__(self, eta_hint_s: Optional[float] = None):
+        self.eta_hint_s = eta_hint_s
+        self.stage = "prepare"
+        self.tiles_done = 0
+        self.tiles_total = 0
+        self.timings: Dict[str, float] = {}
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = time.monotonic()
+        self._stage_started = self._started
+        self._tiles_started = None
+
+    # --- state read by the main thread ---
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def stage_label(self) -> str:
+        return STAGE_LABELS.get(self.stage, self.stage)
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self._started
+
+    @property
+    def fraction(self) -> float:
+        with self._lock:
+            if self.tiles_total <= 0:
+                return 0.0
+            return min(1.0, self.tiles_done / self.tiles_total)
+
+    def eta_s(self) -> Optional[float]:
+        """Remaining download time, from the observed tile rate once tiles arrive."""
+        with self._lock:
+            done = self.tiles_done
+            total = self.tiles_total
+            tiles_started = self._tiles_started
+        if total > 0 and done > 0 and tiles_started is not None:
+            per_tile = (time.monotonic() - tiles_started) / done
+            return per_tile * (total - done)
+        if self.eta_hint_s is not None:
+            return max(0.0, self.eta_hint_s - self.elapsed_s)
+        return None
+
+    # --- control ---
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def start(self, target: Callable, *args) -> None:
+        """Run ``target(job, *args)`` on a daemon thread; its return value becomes ``result``."""
+        def _run():
+            try:
+                self.result = target(self, *args)
+            except BaseException as exc:
+                self.error = exc
+            finally:
+                self._done.set()
+
+        self._thread = threading.Thread(target=_run, name="blosm-route-import", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def run_stage(self, name: str):
+        """Mark ``name`` as the current stage and record its duration in ``timings``."""
+        self.stage = name
+        self._stage_started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.monotonic() - self._stage_started)
+
+    # --- OverpassFetcher progress interface ---
+
+    def begin(self, total):
+        with self._lock:
+            self.tiles_total = max(0, int(total))
+            self.tiles_done = 0
+            self._tiles_started = time.monotonic()
+
+    def update(self, index, total):
+        with self._lock:
+            self.tiles_done = max(0, int(index))
+            self.tiles_total = max(self.tiles_done, int(total or 0))
+
+    def end(self):
+        pass
+
+
+_active_job: Optional[RouteImportJob] = None
+
+
+def get_active_job() -> Optional[RouteImportJob]:
+    """The route import currently running in the background, if any."""
+    return _active_job
+
+
+def set_active_job(job: Optional[RouteImportJob]) -> None:
+    global _active_job
+    _active_job = job
@@ -139,3 +139,35 @@ def format_eta(seconds: Optional[float]) -> str:
         return f"~{minutes}m"
     else:
         return f"~{minutes}m {remaining_seconds}s"
+
+
+def save_stage_timings(tile_count: int, timings: Dict[str, float]) -> None:
+    """
+    Save per-stage timings (prepare, overpass, water, build, finalize) of an import.
+
+    Args:
+        tile_count: Number of tiles in the import
+        timings: Seconds spent in each stage, keyed by stage name
+    """
+    if not timings:
+        return
+
+    history = load_performance_history()
+    stages = history.setdefault("stages", [])
+    stages.append({
+        "tile_count": tile_count,
+        "timings": {name: round(float(value), 3) for name, value in timings.items()},
+    })
+
+    # Keep only last 50 imports
+    if len(stages) > 50:
+        history["stages"] = stages[-50:]
+
+    perf_file = get_performance_file_path()
+    try:
+        with open(perf_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=2)
+        summary = ", ".join(f"{name} {value:.1f}s" for name, value in timings.items())
+        print(f"[BLOSM] Stage timings saved: {summary}")
+    except IOError as e:
+        print(f"[BLOSM] Performance history save error: {e}")
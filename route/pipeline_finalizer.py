@@ -2704,6 +2704,35 @@ def _ensure_world(scene: Optional[bpy.types.Scene]) -> Optional[bpy.types.World]
     return world
 
 
+def regroup_map_collections(scene: Optional[bpy.types.Scene]) -> dict[str, object]:
+    """Group newly imported map collections like ``run`` does, without touching the route or car.
+
+    Used when map tiles are added to an existing scene (Extend City).
+    """
+    result: dict[str, object] = {}
+    if scene is None:
+        return result
+    try:
+        prom = _promote_buildings_and_group_others(scene)
+        if prom:
+            result["map_grouping"] = prom
+    except Exception as exc:
+        print(f"[FP][MAP] WARN promote/group failed: {exc}")
+    try:
+        stripped = _strip_building_materials(scene)
+        if stripped:
+            result["building_materials_pruned"] = stripped
+    except Exception as exc:
+        print(f"[FP][MAP] WARN stripping building materials failed: {exc}")
+    try:
+        map_sum = _mute_map_route_objects(scene)
+        if map_sum and (map_sum.get('muted') or map_sum.get('kept')):
+            result["map_osm_filter"] = map_sum
+    except Exception as exc:
+        print(f"[FP][MAP] WARN map osm filtering failed: {exc}")
+    return result
+
+
 def run(ctx_or_scene: SceneLike = None) -> dict[str, object]:
     """Run final adjustments after the auto pipeline completes."""
     if ctx_or_scene is None:
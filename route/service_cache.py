@@ -0,0 +1,198 @@
+"""
+Persistent cache for Nominatim geocoding and OSRM routing results.
+
+Batch manifests reuse the same pickup and dropoff addresses many times, and
+every Nominatim request is throttled to one per second. Results are kept in
+``~/.blosm/service_cache.json`` (next to the performance history and the
+Overpass tile cache) so known addresses and routes are answered without a
+request:
+
+- ``geocode`` entries are keyed on the normalised address and the Nominatim
+  country codes.
+- ``route`` entries are keyed on the OSRM server and the start, waypoint and
+  end coordinates rounded to ``COORD_PRECISION`` decimals (~1 m).
+
+Each namespace has its own time-to-live and a least-recently-used entry cap.
+Failed lookups are never cached. Changes are written by :meth:`ServiceCache.flush`
+(at the end of ``prepare_route`` and at exit) rather than on every lookup, since
+route entries carry their full geometry.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from .config import DEFAULT_CONFIG
+
+
+GEOCODE = "geocode"
+ROUTE = "route"
+NAMESPACES = (GEOCODE, ROUTE)
+
+# Decimal places kept for route endpoint coordinates in cache keys
+COORD_PRECISION = 5
+
+
+def get_cache_path() -> Path:
+    """Get the path of the service cache file in the addon data directory."""
+    data_dir = Path.home() / ".blosm"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir / "service_cache.json"
+
+
+def normalize_address(address: str) -> str:
+    """Case-fold and collapse whitespace and commas so trivial variants share an entry."""
+    return " ".join(address.casefold().replace(",", " ").split())
+
+
+def make_geocode_key(address: str, country_codes: str) -> str:
+    return f"{normalize_address(address)}|{country_codes.casefold()}"
+
+
+def make_route_key(server: str, coords: Sequence[Tuple[float, float]]) -> str:
+    """Build a route key from ``(lat, lon)`` pairs in travel order."""
+    points = ";".join(f"{lat:.{COORD_PRECISION}f},{lon:.{COORD_PRECISION}f}" for lat, lon in coords)
+    return f"{server}|{points}"
+
+
+class ServiceCache:
+    """JSON-backed cache of geocoding and routing results.
+
+    All public methods are thread-safe; the route import geocodes from a
+    background thread.
+    """
+
+    def __init__(self, path=None, ttl_s: Optional[Dict[str, float]] = None, max_entries: int = 0):
+        self._path = Path(path) if path else get_cache_path()
+        self.ttl_s = {namespace: 0.0 for namespace in NAMESPACES}
+        self.ttl_s.update(ttl_s or {})
+        self.max_entries = max(0, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, dict]] = self._load()
+        self._dirty = False
+        self.hits = {namespace: 0 for namespace in NAMESPACES}
+        self.misses = {namespace: 0 for namespace in NAMESPACES}
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        entries = {namespace: {} for namespace in NAMESPACES}
+        if not self._path.exists():
+            return entries
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[BLOSM] Service cache load error: {e}")
+            return entries
+        if isinstance(data, dict):
+            for namespace in NAMESPACES:
+                stored = data.get(namespace)
+                if isinstance(stored, dict):
+                    entries[namespace] = stored
+        return entries
+
+    def _save_locked(self) -> None:
+        tmp_path = self._path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": "1.0", **self._entries}, f)
+            os.replace(tmp_path, self._path)
+            self._dirty = False
+        except IOError as e:
+            print(f"[BLOSM] Service cache save error: {e}")
+
+    def _evict_locked(self, namespace: str) -> None:
+        entries = self._entries[namespace]
+        if self.max_entries <= 0 or len(entries) <= self.max_entries:
+            return
+        excess = len(entries) - self.max_entries
+        for key in sorted(entries, key=lambda k: entries[k].get("last_access", 0.0))[:excess]:
+            del entries[key]
+
+    def get(self, namespace: str, key: str) -> Optional[dict]:
+        """Return the cached value for ``key`` or None on a miss."""
+        with self._lock:
+            entry = self._entries[namespace].get(key)
+            ttl_s = self.ttl_s.get(namespace, 0.0)
+            if entry is not None and ttl_s > 0 and time.time() - entry.get("created", 0.0) > ttl_s:
+                del self._entries[namespace][key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses[namespace] += 1
+                return None
+            entry["last_access"] = time.time()
+            self.hits[namespace] += 1
+            return dict(entry["value"])
+
+    def put(self, namespace: str, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries[namespace][key] = {"value": value, "created": now, "last_access": now}
+            self._evict_locked(namespace)
+            self._dirty = True
+
+    def invalidate(self, namespace: str, key: str) -> bool:
+        """Drop a single entry, e.g. an address that geocoded to the wrong place."""
+        with self._lock:
+            removed = self._entries[namespace].pop(key, None) is not None
+            if removed:
+                self._save_locked()
+        return removed
+
+    def flush(self) -> None:
+        """Persist the entries if anything changed since the last write."""
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """Remove all entries of ``namespace`` (or of every namespace); returns the count removed."""
+        with self._lock:
+            namespaces = NAMESPACES if namespace is None else (namespace,)
+            removed = 0
+            for name in namespaces:
+                removed += len(self._entries[name])
+                self._entries[name] = {}
+            self._save_locked()
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                namespace: {
+                    "entries": len(self._entries[namespace]),
+                    "hits": self.hits[namespace],
+                    "misses": self.misses[namespace],
+                }
+                for namespace in NAMESPACES
+            }
+
+
+_default_cache: Optional[ServiceCache] = None
+
+
+def get_default_cache() -> Optional[ServiceCache]:
+    """Get the shared service cache, or None when caching is disabled in the config."""
+    global _default_cache
+    api = DEFAULT_CONFIG.api
+    if not api.service_cache_enabled:
+        return None
+    if _default_cache is None:
+        try:
+            _default_cache = ServiceCache(
+                ttl_s={GEOCODE: api.geocode_cache_ttl_s, ROUTE: api.route_cache_ttl_s},
+                max_entries=api.service_cache_max_entries,
+            )
+        except OSError as e:
+            print(f"[BLOSM] Service cache unavailable: {e}")
+            return None
+        atexit.register(_default_cache.flush)
+    return _default_cache
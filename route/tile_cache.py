@@ -0,0 +1,227 @@
+"""
+Persistent on-disk cache for Overpass tile payloads.
+
+Tile payloads are stored gzip-compressed in the addon data directory
+(``~/.blosm/overpass_cache``, next to the performance history). Each layer
+(roads, buildings, water) of a tile is a separate entry keyed on the tile
+bbox, the layer name and a hash of the Overpass query text, so layers are
+fetched, evicted and expired independently and any change to
+``OverpassFetcher._build_query`` invalidates the affected entries
+automatically.
+
+The cache is bounded by a byte budget with least-recently-used eviction and
+an optional time-to-live.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from .config import DEFAULT_CONFIG
+
+
+def get_cache_dir() -> Path:
+    """Get the directory holding cached Overpass tiles."""
+    cache_dir = Path.home() / ".blosm" / "overpass_cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def make_tile_key(tile: Sequence[float], layer: str, query: str) -> str:
+    """Build a cache key from a tile bbox, the layer name and the query text."""
+    bbox = ",".join(f"{coord:.7f}" for coord in tile)
+    query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    raw = f"{bbox}|{layer}|{query_hash}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class OverpassTileCache:
+    """Byte-bounded LRU cache of Overpass payloads stored on disk.
+
+    All public methods are thread-safe so the cache can be shared by the
+    concurrent tile workers of :class:`route.utils.OverpassFetcher`.
+    """
+
+    INDEX_NAME = "index.json"
+    SUFFIX = ".osm.gz"
+
+    def __init__(self, directory=None, max_bytes: int = 0, ttl_s: float = 0.0):
+        self._dir = Path(directory) if directory else get_cache_dir()
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_s = max(0.0, float(ttl_s))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = self._load_index()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.get("size", 0) for entry in self._entries.values())
+
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}{self.SUFFIX}"
+
+    def _load_index(self) -> Dict[str, dict]:
+        index_file = self._dir / self.INDEX_NAME
+        if not index_file.exists():
+            return {}
+        try:
+            with open(index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[BLOSM] Tile cache index load error: {e}")
+            return {}
+        entries = data.get("entries", {}) if isinstance(data, dict) else {}
+        # Drop index entries whose payload file disappeared
+        return {key: entry for key, entry in entries.items() if self._path(key).exists()}
+
+    def _save_index_locked(self) -> None:
+        index_file = self._dir / self.INDEX_NAME
+        tmp_file = index_file.with_suffix(".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": "1.0", "entries": self._entries}, f)
+            os.replace(tmp_file, index_file)
+            self._dirty = False
+        except IOError as e:
+            print(f"[BLOSM] Tile cache index save error: {e}")
+
+    def _remove_locked(self, key: str) -> None:
+        self._entries.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+        self._dirty = True
+
+    def _evict_locked(self) -> None:
+        if self.max_bytes <= 0:
+            return
+        total = sum(entry.get("size", 0) for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._entries, key=lambda k: self._entries[k].get("last_access", 0.0)):
+            if total <= self.max_bytes:
+                break
+            total -= self._entries[key].get("size", 0)
+            self._remove_locked(key)
+            self.evictions += 1
+
+    def contains(self, key: str) -> bool:
+        """True if ``key`` has an unexpired entry; doesn't count as a hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            return not (self.ttl_s > 0 and time.time() - entry.get("created", 0.0) > self.ttl_s)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached payload for ``key`` or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_s > 0 and time.time() - entry.get("created", 0.0) > self.ttl_s:
+                self._remove_locked(key)
+                self.misses += 1
+                return None
+            entry["last_access"] = time.time()
+            self._dirty = True
+        try:
+            with gzip.open(self._path(key), "rb") as f:
+                payload = f.read()
+        except (OSError, EOFError) as e:
+            print(f"[BLOSM] Tile cache read error, dropping entry: {e}")
+            with self._lock:
+                self._remove_locked(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: bytes) -> None:
+        """Store ``payload`` under ``key`` and evict old entries over budget.
+
+        The index is written by :meth:`flush` once the download is done.
+        """
+        path = self._path(key)
+        tmp_path = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp_path, "wb", compresslevel=5) as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            print(f"[BLOSM] Tile cache write error: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {"size": size, "created": now, "last_access": now}
+            self._dirty = True
+            self._evict_locked()
+
+    def flush(self) -> None:
+        """Persist access times collected since the last write."""
+        with self._lock:
+            if self._dirty:
+                self._save_index_locked()
+
+    def clear(self) -> int:
+        """Remove every cached payload; returns the number of entries removed."""
+        with self._lock:
+            keys = list(self._entries)
+            for key in keys:
+                self._remove_locked(key)
+            self._save_index_locked()
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "total_bytes": sum(entry.get("size", 0) for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_default_cache: Optional[OverpassTileCache] = None
+
+
+def get_default_cache() -> Optional[OverpassTileCache]:
+    """Get the shared tile cache, or None when caching is disabled in the config."""
+    global _default_cache
+    api = DEFAULT_CONFIG.api
+    if not api.overpass_cache_enabled:
+        return None
+    if _default_cache is None:
+        try:
+            _default_cache = OverpassTileCache(
+                max_bytes=int(api.overpass_cache_max_mb * 1024 * 1024),
+                ttl_s=api.overpass_cache_ttl_s,
+            )
+        except OSError as e:
+            print(f"[BLOSM] Tile cache unavailable: {e}")
+            return None
+    return _default_cache
@@ -0,0 +1,107 @@
+"""
+Observed OSM data density per global grid tile.
+
+Every Overpass payload received by :class:`route.utils.OverpassFetcher` is
+recorded as bytes per km² for each layer of the grid tiles it covers. The
+adaptive tiling uses these figures to split tiles known to be dense before
+fetching them and to merge runs of sparse tiles into a single request.
+
+Densities are stored in ``~/.blosm/tile_density.json`` (next to the
+performance history) keyed on ``"row,col"`` grid keys.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .config import DEFAULT_CONFIG
+
+
+def get_density_file_path() -> Path:
+    """Get the path to the tile density JSON file."""
+    blosm_dir = Path.home() / ".blosm"
+    blosm_dir.mkdir(exist_ok=True)
+    return blosm_dir / "tile_density.json"
+
+
+class TileDensity:
+    """Per grid tile and layer payload density (bytes per km²). Thread-safe."""
+
+    def __init__(self, path=None, alpha: float = 0.5):
+        self._path = Path(path) if path else get_density_file_path()
+        self.alpha = min(1.0, max(0.01, float(alpha)))
+        self._lock = threading.Lock()
+        self._tiles: Dict[str, Dict[str, float]] = self._load()
+        self._dirty = False
+
+    @staticmethod
+    def _key(grid_key: Tuple[int, int]) -> str:
+        return f"{grid_key[0]},{grid_key[1]}"
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if not self._path.exists():
+            return {}
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"[BLOSM] Tile density load error: {e}")
+            return {}
+        tiles = data.get("tiles", {}) if isinstance(data, dict) else {}
+        return {key: value for key, value in tiles.items() if isinstance(value, dict)}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self._path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": "1.0", "tiles": self._tiles}, f)
+                os.replace(tmp_path, self._path)
+                self._dirty = False
+            except IOError as e:
+                print(f"[BLOSM] Tile density save error: {e}")
+
+    def record(self, grid_keys: Iterable[Tuple[int, int]], layer: str, bytes_per_km2: float) -> None:
+        """Blend an observed density into the figures of every grid tile in ``grid_keys``."""
+        a = self.alpha
+        with self._lock:
+            for grid_key in grid_keys:
+                layers = self._tiles.setdefault(self._key(grid_key), {})
+                previous = layers.get(layer)
+                layers[layer] = bytes_per_km2 if previous is None else (1.0 - a) * previous + a * bytes_per_km2
+            self._dirty = True
+
+    def predict(self, grid_key: Tuple[int, int], layers: Iterable[str]) -> Optional[float]:
+        """Summed density of ``layers`` for a grid tile, or None if any layer was never fetched."""
+        with self._lock:
+            known = self._tiles.get(self._key(grid_key))
+            if not known:
+                return None
+            total = 0.0
+            for layer in layers:
+                value = known.get(layer)
+                if value is None:
+                    return None
+                total += value
+            return total
+
+
+_default_density: Optional[TileDensity] = None
+
+
+def get_default_density() -> Optional[TileDensity]:
+    """Get the shared density store, or None when adaptive tiling is disabled."""
+    global _default_density
+    if not DEFAULT_CONFIG.api.overpass_adaptive_tiles:
+        return None
+    if _default_density is None:
+        try:
+            _default_density = TileDensity()
+        except OSError as e:
+            print(f"[BLOSM] Tile density unavailable: {e}")
+            return None
+    return _default_density
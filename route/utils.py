@@ -2,25 +2,37 @@
 
 from __future__ import annotations
 
+import base64
 import json
-import gzip
+import io
+import os
+import shutil
+import tempfile
+import weakref
 import xml.etree.ElementTree as ET
-from http.client import IncompleteRead
+from http.client import HTTPException, IncompleteRead
 import math
 import time
 import random
+import threading
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from typing import List, Sequence, Tuple
-from urllib import error, parse, request
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib import error, parse
 
 # Import configuration
 from .config import DEFAULT_CONFIG
+from . import endpoint_health, http_pool, service_cache, tile_cache, tile_density
 
 # Module-level constants from config (for backward compatibility)
 MIN_NOMINATIM_INTERVAL = DEFAULT_CONFIG.api.nominatim_min_interval_s
 EARTH_RADIUS_M = DEFAULT_CONFIG.geography.earth_radius_m
 _METERS_PER_DEGREE_LAT = DEFAULT_CONFIG.geography.meters_per_degree_lat
 _OVERPASS_TILE_MAX_M = DEFAULT_CONFIG.api.overpass_tile_max_m
+_OVERPASS_TILE_MODE = DEFAULT_CONFIG.api.overpass_tile_mode
 _OVERPASS_INTERVAL = DEFAULT_CONFIG.api.nominatim_min_interval_s
 _OVERPASS_TIMEOUT = DEFAULT_CONFIG.api.overpass_query_timeout
 _MAX_OVERPASS_ATTEMPTS = DEFAULT_CONFIG.api.overpass_max_retries
@@ -31,6 +43,14 @@ class RouteServiceError(RuntimeError):
     """Raised when external geocoding or routing fails."""
 
 
+class RouteImportCancelled(RouteServiceError):
+    """Raised when a running route import is cancelled by the user."""
+
+
+class OverpassQueryTooLarge(RouteServiceError):
+    """Raised when Overpass reports a runtime error (query timeout or out of memory) for a tile; the tile should be split."""
+
+
 @dataclass(frozen=True)
 class GeocodeResult:
     address: str
@@ -73,15 +93,15 @@ def _request_json(url: str, user_agent: str, timeout: float = 30.0, throttle: bo
     if throttle:
         _throttle_nominatim()
     headers = {"User-Agent": user_agent or "BLOSM Route Import"}
-    req = request.Request(url, headers=headers)
     try:
-        with request.urlopen(req, timeout=timeout) as resp:
-            status = getattr(resp, "status", 200)
-            if status != 200:
-                raise RouteServiceError(f"HTTP {status} from {url}")
-            payload = resp.read().decode("utf-8")
+        resp = http_pool.get_default_pool().request("GET", url, headers=headers, timeout=timeout)
     except error.URLError as exc:  # includes HTTPError
         raise RouteServiceError(f"Request error for {url}: {exc}") from exc
+    except (HTTPException, TimeoutError) as exc:
+        raise RouteServiceError(f"Request error for {url}: {exc}") from exc
+    if resp.status != 200:
+        raise RouteServiceError(f"HTTP {resp.status} from {url}")
+    payload = resp.data.decode("utf-8")
     try:
         return json.loads(payload)
     except json.JSONDecodeError as exc:
@@ -97,11 +117,23 @@ def geocode(address: str, user_agent: str) -> GeocodeResult:
     """
     if not address or not address.strip():
         raise RouteServiceError("Address is empty. Please enter an address.")
+    country_codes = DEFAULT_CONFIG.api.nominatim_country_codes
+    cache = service_cache.get_default_cache()
+    cache_key = service_cache.make_geocode_key(address, country_codes)
+    if cache is not None:
+        cached = cache.get(service_cache.GEOCODE, cache_key)
+        if cached is not None:
+            return GeocodeResult(
+                address=address,
+                lat=cached["lat"],
+                lon=cached["lon"],
+                display_name=cached.get("display_name", address),
+            )
     query = parse.urlencode({
         "q": address,
         "format": "json",
         "limit": 1,
-        "countrycodes": DEFAULT_CONFIG.api.nominatim_country_codes
+        "countrycodes": country_codes
     })
     url = f"https://nominatim.openstreetmap.org/search?{query}"
     data = _request_json(url, user_agent, throttle=True)
@@ -118,7 +150,10 @@ def geocode(address: str, user_agent: str) -> GeocodeResult:
         raise RouteServiceError(
             f"Could not read geocoding result for \"{address}\". Please adjust and try again."
         ) from exc
-    return GeocodeResult(address=address, lat=lat, lon=lon, display_name=entry.get("display_name", address))
+    display_name = entry.get("display_name", address)
+    if cache is not None:
+        cache.put(service_cache.GEOCODE, cache_key, {"lat": lat, "lon": lon, "display_name": display_name})
+    return GeocodeResult(address=address, lat=lat, lon=lon, display_name=display_name)
 
 
 def decode_polyline(value: str, precision: int = 5) -> List[Tuple[float, float]]:
@@ -167,13 +202,21 @@ def decode_polyline(value: str, precision: int = 5) -> List[Tuple[float, float]]
 
 def fetch_route(start: GeocodeResult, end: GeocodeResult, user_agent: str, waypoints: List[GeocodeResult] = None) -> RouteResult:
     """Fetch driving route from start to end, optionally passing through waypoints"""
+    stops = [start] + list(waypoints or []) + [end]
+    cache = service_cache.get_default_cache()
+    cache_key = service_cache.make_route_key(
+        DEFAULT_CONFIG.api.osrm_base_url, [(stop.lat, stop.lon) for stop in stops]
+    )
+    if cache is not None:
+        cached = cache.get(service_cache.ROUTE, cache_key)
+        if cached is not None:
+            return RouteResult(
+                points=decode_polyline(cached["geometry"]),
+                distance_m=cached["distance_m"],
+                duration_s=cached["duration_s"],
+            )
     # Build coordinate string: start;waypoint1;waypoint2;...;end
-    coord_list = [f"{start.lon},{start.lat}"]
-    if waypoints:
-        for wp in waypoints:
-            coord_list.append(f"{wp.lon},{wp.lat}")
-    coord_list.append(f"{end.lon},{end.lat}")
-    coords = ";".join(coord_list)
+    coords = ";".join(f"{stop.lon},{stop.lat}" for stop in stops)
 
     url = f"{DEFAULT_CONFIG.api.osrm_base_url}/route/v1/driving/{coords}?overview=full&geometries=polyline"
     data = _request_json(url, user_agent, throttle=False)
@@ -196,6 +239,12 @@ def fetch_route(start: GeocodeResult, end: GeocodeResult, user_agent: str, waypo
         )
     distance = float(route_data.get("distance", 0.0))
     duration = float(route_data.get("duration", 0.0))
+    if cache is not None:
+        cache.put(service_cache.ROUTE, cache_key, {
+            "geometry": geometry,
+            "distance_m": distance,
+            "duration_s": duration,
+        })
     return RouteResult(points=points, distance_m=distance, duration_s=duration)
 
 
@@ -246,11 +295,23 @@ def bbox_size(bbox: Tuple[float, float, float, float]) -> Tuple[float, float]:
     return width, height
 
 
-def prepare_route(start_address: str, end_address: str, padding_m: float, user_agent: str, waypoint_addresses: List[str] = None) -> RouteContext:
+def prepare_route(
+    start_address: str,
+    end_address: str,
+    padding_m: float,
+    user_agent: str,
+    waypoint_addresses: List[str] = None,
+    corridor_padding_m: Optional[float] = None,
+    endpoint_padding_m: float = 0.0,
+) -> RouteContext:
     """Prepare route context with optional waypoints.
 
     Wraps geocoding with explicit error messages so the operator can surface
     clear warnings (e.g., which address failed) instead of failing silently.
+
+    When ``corridor_padding_m`` is given, only the tiles within that distance
+    of the route polyline (or within ``endpoint_padding_m`` of the start and
+    end points) are kept instead of every tile of the padded bbox.
     """
     # Geocode start/end with targeted messages
     try:
@@ -280,12 +341,19 @@ def prepare_route(start_address: str, end_address: str, padding_m: float, user_a
 
     # Fetch route with waypoints
     route = fetch_route(start, end, user_agent, waypoints=waypoints if waypoints else None)
+    # Lookups only mark the service cache dirty; write it once per prepared route
+    cache = service_cache.get_default_cache()
+    if cache is not None:
+        cache.flush()
 
     bbox = compute_bbox(route.points)
     padded_bbox = pad_bbox(bbox, padding_m)
     width_m, height_m = bbox_size(padded_bbox)
     bbox_area_km2 = (width_m * height_m) / 1_000_000.0
-    tiles = _tile_bbox(*padded_bbox)
+    if corridor_padding_m is not None:
+        tiles = _corridor_tiles(route.points, corridor_padding_m, endpoint_padding_m)
+    else:
+        tiles = _tiles_for_bbox(*padded_bbox)
     tile_count = len(tiles)
     return RouteContext(
         start=start,
@@ -341,6 +409,275 @@ def _tile_bbox(south: float, west: float, north: float, east: float) -> List[Tup
     return tiles
 
 
+# Global tile grid
+#
+# Rows are fixed latitude bands of ``_OVERPASS_TILE_MAX_M`` anchored at the
+# equator; each row uses its own longitude step derived from the row's
+# mid-latitude, anchored at the prime meridian. A tile is identified by its
+# integer ``(row, col)`` key and its bounds depend only on that key, so
+# overlapping routes produce identical tiles that can be cached and diffed.
+
+_GRID_MAX_LAT = 85.0
+
+
+def _grid_lat_step() -> float:
+    return _meters_to_lat_delta(_OVERPASS_TILE_MAX_M)
+
+
+def _grid_lon_step(row: int) -> float:
+    lat_step = _grid_lat_step()
+    mid_lat = (row + 0.5) * lat_step
+    return min(360.0, _meters_to_lon_delta(_OVERPASS_TILE_MAX_M, mid_lat))
+
+
+def _grid_tile_key(lat: float, lon: float) -> Tuple[int, int]:
+    """Return the ``(row, col)`` grid key of the tile containing a point."""
+    lat = max(-_GRID_MAX_LAT, min(_GRID_MAX_LAT, lat))
+    row = math.floor(lat / _grid_lat_step())
+    col = math.floor(lon / _grid_lon_step(row))
+    return row, col
+
+
+def _grid_tile_bounds(key: Tuple[int, int]) -> Tuple[float, float, float, float]:
+    """Return ``(south, west, north, east)`` of a grid tile."""
+    row, col = key
+    lat_step = _grid_lat_step()
+    lon_step = _grid_lon_step(row)
+    return (row * lat_step, col * lon_step, (row + 1) * lat_step, (col + 1) * lon_step)
+
+
+def _grid_tile_keys(south: float, west: float, north: float, east: float) -> List[Tuple[int, int]]:
+    """Return the keys of all grid tiles intersecting a bbox, row by row from the south."""
+    first_row, _ = _grid_tile_key(south, west)
+    last_row, _ = _grid_tile_key(north, west)
+    # A bbox edge lying exactly on a grid line doesn't pull in the next tile
+    if last_row > first_row and last_row * _grid_lat_step() >= north:
+        last_row -= 1
+    keys: List[Tuple[int, int]] = []
+    for row in range(first_row, last_row + 1):
+        lon_step = _grid_lon_step(row)
+        first_col = math.floor(west / lon_step)
+        last_col = math.floor(east / lon_step)
+        if last_col > first_col and last_col * lon_step >= east:
+            last_col -= 1
+        keys.extend((row, col) for col in range(first_col, last_col + 1))
+    return keys
+
+
+def _split_tile(tile: Sequence[float]) -> List[Tuple[float, float, float, float]]:
+    """Split a tile into its four quadrants (SW, SE, NW, NE)."""
+    south, west, north, east = tile
+    mid_lat = (south + north) * 0.5
+    mid_lon = (west + east) * 0.5
+    return [
+        (south, west, mid_lat, mid_lon),
+        (south, mid_lon, mid_lat, east),
+        (mid_lat, west, north, mid_lon),
+        (mid_lat, mid_lon, north, east),
+    ]
+
+
+def _tile_area_km2(tile: Sequence[float]) -> float:
+    width_m, height_m = bbox_size(tuple(tile))
+    return width_m * height_m / 1e6
+
+
+def _tile_key(tile: Sequence[float]) -> Tuple:
+    """Identity of a tile for set arithmetic (grid key, or rounded bbox in bbox mode)."""
+    if _OVERPASS_TILE_MODE == "grid":
+        south, west, north, east = tile
+        return _grid_tile_key((south + north) * 0.5, (west + east) * 0.5)
+    return tuple(round(coord, 7) for coord in tile)
+
+
+def _tiles_for_bbox(south: float, west: float, north: float, east: float) -> List[Tuple[float, float, float, float]]:
+    """Tile a bbox according to ``APIConfig.overpass_tile_mode``.
+
+    In ``grid`` mode the tiles are snapped outwards to the global grid, so
+    they may extend slightly beyond the requested bbox.
+    """
+    if _OVERPASS_TILE_MODE == "grid":
+        return [_grid_tile_bounds(key) for key in _grid_tile_keys(south, west, north, east)]
+    return _tile_bbox(south, west, north, east)
+
+
+def _rect_segment_distance_m(
+    rect: Tuple[float, float, float, float],
+    a: Tuple[float, float],
+    b: Tuple[float, float],
+) -> float:
+    """Distance in meters between an axis-aligned rect and a segment (local x/y meters)."""
+    min_x, min_y, max_x, max_y = rect
+    ax, ay = a
+    bx, by = b
+    # Liang-Barsky clip: zero distance when the segment touches the rect
+    t0, t1 = 0.0, 1.0
+    dx, dy = bx - ax, by - ay
+    inside = True
+    for p, q in ((-dx, ax - min_x), (dx, max_x - ax), (-dy, ay - min_y), (dy, max_y - ay)):
+        if p == 0.0:
+            if q < 0.0:
+                inside = False
+                break
+            continue
+        r = q / p
+        if p < 0.0:
+            t0 = max(t0, r)
+        else:
+            t1 = min(t1, r)
+        if t0 > t1:
+            inside = False
+            break
+    if inside:
+        return 0.0
+
+    def _point_rect(px: float, py: float) -> float:
+        cx = min(max(px, min_x), max_x)
+        cy = min(max(py, min_y), max_y)
+        return math.hypot(px - cx, py - cy)
+
+    def _point_segment(px: float, py: float) -> float:
+        length_sq = dx * dx + dy * dy
+        if length_sq <= 0.0:
+            return math.hypot(px - ax, py - ay)
+        t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+        return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+    return min(
+        _point_rect(ax, ay),
+        _point_rect(bx, by),
+        _point_segment(min_x, min_y),
+        _point_segment(min_x, max_y),
+        _point_segment(max_x, min_y),
+        _point_segment(max_x, max_y),
+    )
+
+
+def _corridor_tiles(
+    points: Sequence[Tuple[float, float]],
+    padding_m: float,
+    endpoint_padding_m: float = 0.0,
+) -> List[Tuple[float, float, float, float]]:
+    """Tiles intersecting the route polyline buffered by ``padding_m``.
+
+    Tiles within ``endpoint_padding_m`` of the first or last route point are
+    kept as well, so the start and end markers get a wider ring of context.
+    """
+    if not points:
+        raise RouteServiceError("Route has no points for corridor tiling")
+    padding_m = max(0.0, float(padding_m))
+    endpoint_padding_m = max(padding_m, float(endpoint_padding_m or 0.0))
+    candidates = _tiles_for_bbox(*pad_bbox(compute_bbox(points), endpoint_padding_m))
+
+    # Local equirectangular frame around the route is plenty accurate at tile scale
+    lat0 = sum(lat for lat, _ in points) / len(points)
+    lon0 = sum(lon for _, lon in points) / len(points)
+    x_scale = _METERS_PER_DEGREE_LAT * math.cos(math.radians(lat0))
+
+    def _xy(lat: float, lon: float) -> Tuple[float, float]:
+        return (lon - lon0) * x_scale, (lat - lat0) * _METERS_PER_DEGREE_LAT
+
+    coords = [_xy(lat, lon) for lat, lon in points]
+    segments = list(zip(coords, coords[1:])) or [(coords[0], coords[0])]
+    endpoints = (coords[0], coords[-1])
+
+    tiles: List[Tuple[float, float, float, float]] = []
+    for tile in candidates:
+        south, west, north, east = tile
+        min_x, min_y = _xy(south, west)
+        max_x, max_y = _xy(north, east)
+        rect = (min_x, min_y, max_x, max_y)
+        if any(
+            _rect_segment_distance_m(rect, point, point) <= endpoint_padding_m
+            for point in endpoints
+        ):
+            tiles.append(tile)
+            continue
+        grown = (min_x - padding_m, min_y - padding_m, max_x + padding_m, max_y + padding_m)
+        for a, b in segments:
+            # Cheap reject on the segment's own bounds before the exact test
+            if (max(a[0], b[0]) < grown[0] or min(a[0], b[0]) > grown[2]
+                    or max(a[1], b[1]) < grown[1] or min(a[1], b[1]) > grown[3]):
+                continue
+            if _rect_segment_distance_m(rect, a, b) <= padding_m:
+                tiles.append(tile)
+                break
+    return tiles
+
+
+
+def pack_osm_ids(ids) -> str:
+    """Pack OSM ids into a short string (zlib-compressed 64-bit deltas in base64).
+
+    Used to keep the ids of an imported map in a scene property for Extend City.
+    """
+    deltas = array("q")
+    previous = 0
+    for osm_id in sorted(ids):
+        deltas.append(osm_id - previous)
+        previous = osm_id
+    return base64.b64encode(zlib.compress(deltas.tobytes())).decode("ascii")
+
+
+def unpack_osm_ids(value) -> set:
+    """Inverse of :func:`pack_osm_ids`; an invalid value gives no ids."""
+    deltas = array("q")
+    try:
+        deltas.frombytes(zlib.decompress(base64.b64decode(value)))
+    except (TypeError, ValueError, zlib.error):
+        return set()
+    return set(accumulate(deltas))
+
+
+
+class _TileSpill:
+    """Raw tile payloads spilled to a temporary directory.
+
+    Behaves like the list of ``(bbox, payload)`` pairs returned by
+    :meth:`OverpassFetcher.get_cached_tiles`, but payloads are read back from
+    disk one at a time while iterating. The directory is removed when the
+    spill is garbage collected or :meth:`close` is called.
+    """
+
+    def __init__(self):
+        self._dir = tempfile.mkdtemp(prefix="blosm_tiles_")
+        self._entries: List[Tuple[Tuple[float, float, float, float], str]] = []
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._dir, True)
+
+    def append(self, tile: Tuple[float, float, float, float], payload: bytes) -> None:
+        path = os.path.join(self._dir, f"tile_{len(self._entries):05d}.osm")
+        with open(path, "wb") as f:
+            f.write(payload)
+        self._entries.append((tile, path))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        for tile, path in self._entries:
+            with open(path, "rb") as f:
+                yield tile, f.read()
+
+    def close(self) -> None:
+        self._entries = []
+        self._finalizer()
+
+
+
+@dataclass(frozen=True)
+class _TileRequest:
+    """One Overpass request of a download.
+
+    ``tiles`` are the tiles the request stands for: a single tile, a run of
+    sparse grid tiles merged into ``bbox``, or a dense grid tile fetched as
+    quadrants (``split``). Payloads are cached and checkpointed per tile of
+    ``tiles``, so they are found again whatever the plan of a later import.
+    """
+    bbox: Tuple[float, float, float, float]
+    tiles: Tuple[Tuple[float, float, float, float], ...]
+    split: bool = False
+
+
 
 class OverpassFetcher:
     """Fetches OSM data for roads/buildings using Overpass with tiling and retries."""
@@ -361,8 +698,17 @@ class OverpassFetcher:
         logger=None,
         progress=None,
         store_tiles: bool = False,
+        max_workers: int = 1,
+        use_cache: bool = True,
+        tiles: Optional[Sequence[Tuple[float, float, float, float]]] = None,
+        pipelined: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+        checkpoint=None,
+        exclude_ids: Optional[Dict[str, Iterable[int]]] = None,
+        include_shoreline: bool = False,
+        city_pack=None,
     ):
-        if not include_roads and not include_buildings and not include_water:
+        if not include_roads and not include_buildings and not include_water and not include_shoreline:
             raise RouteServiceError("No layers selected for Overpass fetch")
         self.user_agent = (user_agent or "BLOSM Route Import").strip() or "BLOSM Route Import"
         self.include_roads = include_roads
@@ -371,10 +717,18 @@ class OverpassFetcher:
         self._logger = logger
         self._progress = progress
         self._store_tiles = bool(store_tiles)
-        self._tile_payloads: List[bytes] = []
-        self._tile_bboxes: List[Tuple[float, float, float, float]] = []
+        self._tile_spill: Optional[_TileSpill] = None
         self._server_index = 0
-        self._last_request = 0.0
+        # Politeness budget is tracked per endpoint so concurrent workers
+        # hitting different servers don't throttle each other.
+        self._server_last_request: Dict[str, float] = {}
+        self._server_lock = threading.Lock()
+        self._max_workers = max(1, int(max_workers))
+        # Explicit tile plan (e.g. route corridor) used by write() instead of tiling the bbox
+        self._tile_plan = list(tiles) if tiles else None
+        # When set, the importer parses tiles via iter_write() while later tiles download
+        self.pipelined = bool(pipelined)
+        self._cancel_event = cancel_event
         self._min_interval_s = max(0.0, min_interval_ms / 1000.0)
         self._timeout_s = max(1.0, float(timeout_s))
         self._max_retries = max(0, int(max_retries))
@@ -382,6 +736,40 @@ class OverpassFetcher:
         self._total_start = 0.0
         self._total_elapsed_s = 0.0
         self._cache_ready = False
+        # Persistent tile cache shared across imports (None when disabled)
+        self._tile_cache = tile_cache.get_default_cache() if use_cache else None
+        # Each layer is queried and cached separately, so toggling a layer
+        # only downloads that layer
+        self._layers = tuple(
+            layer for layer, enabled in (
+                ("buildings", include_buildings),
+                ("roads", include_roads),
+                ("water", include_water),
+                # Raw water/coastline profile stitched by route.water_manager
+                ("shoreline", include_shoreline),
+            ) if enabled
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Observed data density per grid tile for adaptive split/merge (None: fixed tiles)
+        self._density = tile_density.get_default_density() if _OVERPASS_TILE_MODE == "grid" else None
+        self._split_max_depth = (
+            max(0, int(DEFAULT_CONFIG.api.overpass_split_max_depth))
+            if DEFAULT_CONFIG.api.overpass_adaptive_tiles else 0
+        )
+        # Rolling per-endpoint latency/error scores used to dispatch requests (None: round-robin)
+        self._health = endpoint_health.get_default_tracker()
+        # Per-job tile checkpoint (route.checkpoint.TileCheckpoint) so a failed download can resume
+        self._checkpoint = checkpoint
+        self.resumed_tiles = 0
+        # Offline store (route.city_pack.CityPack) answering the tiles inside its bounds
+        self._city_pack = city_pack
+        if city_pack is not None:
+            self._log(f"City pack {city_pack.path.name}: tiles inside its bounds are read from disk")
+        # Way/relation ids already in the scene (Extend City); skipped when merging
+        self._exclude_ids = exclude_ids or {}
+        # Way/relation ids of the merged file plus ``exclude_ids``, set once a write completes
+        self.merged_ids: Optional[Dict[str, set]] = None
 
     @property
     def average_tile_ms(self) -> float:
@@ -391,14 +779,42 @@ class OverpassFetcher:
     def total_elapsed_s(self) -> float:
         return self._total_elapsed_s
 
-    def _sleep_until_ready(self) -> None:
+    @property
+    def effective_tile_ms(self) -> float:
+        """Wall-clock time per tile; lower than ``average_tile_ms`` when fetching concurrently."""
+        if not self._tile_times:
+            return 0.0
+        return (self._total_elapsed_s * 1000.0) / len(self._tile_times)
+
+    def _sleep_until_ready(self, server: str) -> None:
         if self._min_interval_s <= 0:
             return
-        now = time.monotonic()
-        wait = self._min_interval_s - (now - self._last_request)
+        # Reserve the next slot for this server under the lock, then sleep
+        # outside of it so workers on other servers are not blocked.
+        with self._server_lock:
+            now = time.monotonic()
+            last = self._server_last_request.get(server, 0.0)
+            ready_at = max(now, last + self._min_interval_s)
+            self._server_last_request[server] = ready_at
+        wait = ready_at - now
         if wait > 0:
             time.sleep(wait)
 
+    def _politeness_waits(self) -> Dict[str, float]:
+        """Seconds until each endpoint may be queried again."""
+        if self._min_interval_s <= 0:
+            return {}
+        now = time.monotonic()
+        with self._server_lock:
+            return {
+                server: max(0.0, last + self._min_interval_s - now)
+                for server, last in self._server_last_request.items()
+            }
+
+    def _mark_request_done(self, server: str) -> None:
+        with self._server_lock:
+            self._server_last_request[server] = time.monotonic()
+
     def _log(self, message: str) -> None:
         if self._logger:
             self._logger(message)
@@ -420,26 +836,47 @@ class OverpassFetcher:
         Extend City operator so callers can control exactly which tiles
         are fetched (for example, only the tiles that extend the current
         city instead of the full bbox again).
+
+        Tiles are merged as they arrive: each payload is parsed incrementally,
+        deduplicated against integer id sets and written straight to
+        ``filepath``, so memory use does not grow with the number of tiles.
+        """
+        for _ in self._merge_tiles(filepath, tiles, collect=False):
+            pass
+
+    def iter_write(self, filepath: str, south: float, west: float, north: float, east: float):
+        """Pipelined variant of :meth:`write`.
+
+        Yields, tile by tile, the lists of OSM elements that were newly added
+        to ``filepath`` (the ``<bounds>`` element comes first). Concatenated,
+        they are exactly the children of the merged file, so a consumer can
+        parse tile ``k`` while tile ``k + 1`` is still downloading in the
+        background. The file is complete once the generator is exhausted.
         """
-        total_tiles = len(tiles)
+        tiles = self._tile_plan or _tiles_for_bbox(south, west, north, east)
+        return self._merge_tiles(filepath, tiles, collect=True)
+
+    def _merge_tiles(self, filepath: str, tiles, collect: bool):
+        requests = self._plan_requests(tiles)
+        total_tiles = len(requests)
         if self._store_tiles:
-            self._tile_payloads = []
-            self._tile_bboxes = []
+            if self._tile_spill is not None:
+                self._tile_spill.close()
+            self._tile_spill = _TileSpill()
         if self._progress:
             try:
                 self._progress.begin(total_tiles)
             except Exception:
                 pass
-        self._log(f"Overpass fetching {len(tiles)} tile(s)")
-        root = ET.Element("osm", attrib={"version": "0.6", "generator": "BLOSM Route"})
-        if tiles:
-            south = min(t[0] for t in tiles)
-            west = min(t[1] for t in tiles)
-            north = max(t[2] for t in tiles)
-            east = max(t[3] for t in tiles)
+        self._log(f"Overpass fetching {len(requests)} tile(s)")
+        if requests:
+            south = min(r.bbox[0] for r in requests)
+            west = min(r.bbox[1] for r in requests)
+            north = max(r.bbox[2] for r in requests)
+            east = max(r.bbox[3] for r in requests)
         else:
             south = west = north = east = 0.0
-        ET.SubElement(root, "bounds", attrib={
+        bounds = ET.Element("bounds", attrib={
             "minlat": f"{south:.7f}",
             "minlon": f"{west:.7f}",
             "maxlat": f"{north:.7f}",
@@ -447,86 +884,411 @@ class OverpassFetcher:
         })
         seen = {
             "node": set(),
-            "way": set(),
-            "relation": set(),
+            "way": set(self._exclude_ids.get("way", ())),
+            "relation": set(self._exclude_ids.get("relation", ())),
         }
         totals = {"node": 0, "way": 0, "relation": 0}
         self._tile_times = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.resumed_tiles = 0
+        http_before = http_pool.get_default_pool().stats()
         self._total_start = time.perf_counter()
+        part_path = f"{filepath}.part"
+        completed = False
         try:
-            for index, tile in enumerate(tiles, 1):
-                tile_start = time.perf_counter()
-                retries = 0
-                while True:
-                    try:
-                        xml_bytes = self._fetch_tile(tile)
-                        break
-                    except RouteServiceError as exc:
-                        retries += 1
-                        if retries > self._max_retries:
-                            raise
-                        backoff = min(5.0, 2 ** (retries - 1)) + random.uniform(0.0, 0.25)
-                        self._log(f"Retry {retries}/{self._max_retries} for tile {index}: {exc} (waiting {backoff:.2f}s)")
-                        time.sleep(backoff)
-                added = self._merge_xml(root, seen, xml_bytes)
-                for key, value in added.items():
-                    totals[key] += value
-                tile_ms = (time.perf_counter() - tile_start) * 1000.0
-                self._tile_times.append(tile_ms)
-                elapsed = time.perf_counter() - self._total_start
-                avg_ms = self.average_tile_ms or tile_ms
-                percent = (index / len(tiles)) * 100.0 if tiles else 0.0
-                self._emit_progress(
-                    f"Tiles {index}/{len(tiles)} ({percent:.0f}%), last={tile_ms:.0f} ms, avg={avg_ms:.0f} ms, elapsed={elapsed:.1f} s, retries={retries}"
-                )
-                if self._store_tiles:
-                    self._tile_payloads.append(xml_bytes)
-                    self._tile_bboxes.append(tile)
-                if self._progress:
-                    try:
-                        self._progress.update(index, total_tiles)
-                    except Exception:
-                        pass
+            with open(part_path, "wb") as out:
+                out.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+                out.write(b'<osm version="0.6" generator="BLOSM Route">')
+                out.write(ET.tostring(bounds, encoding="utf-8"))
+                if collect:
+                    yield [bounds]
+                for index, request, payloads, retries, tile_ms in self._iter_fetched_tiles(requests, background=collect):
+                    elements = [] if collect else None
+                    # Layers are fetched separately; merging them here also
+                    # drops the nodes shared by e.g. roads and buildings.
+                    for xml_bytes in payloads:
+                        added = self._stream_merge(out, seen, xml_bytes, elements)
+                        for key, value in added.items():
+                            totals[key] += value
+                    self._tile_times.append(tile_ms)
+                    elapsed = time.perf_counter() - self._total_start
+                    avg_ms = self.average_tile_ms or tile_ms
+                    percent = (index / len(requests)) * 100.0 if requests else 0.0
+                    self._emit_progress(
+                        f"Tiles {index}/{len(requests)} ({percent:.0f}%), last={tile_ms:.0f} ms, avg={avg_ms:.0f} ms, elapsed={elapsed:.1f} s, retries={retries}"
+                    )
+                    if self._store_tiles:
+                        self._tile_spill.append(request.bbox, self._combine_payloads(payloads))
+                    del payloads
+                    if self._progress:
+                        try:
+                            self._progress.update(index, total_tiles)
+                        except Exception:
+                            pass
+                    if collect:
+                        yield elements
+                out.write(b"</osm>")
+            os.replace(part_path, filepath)
+            completed = True
         finally:
+            if os.path.exists(part_path):
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+            if self._tile_cache is not None:
+                self._tile_cache.flush()
+            if self._health is not None:
+                self._health.save()
+            if self._density is not None:
+                self._density.save()
+            if self._checkpoint is not None:
+                if completed:
+                    self._checkpoint.discard()
+                else:
+                    self._log(
+                        f"Download incomplete: {self._checkpoint.count()} layer payload(s) kept in checkpoint "
+                        f"{self._checkpoint.job_id} for resume"
+                    )
             if self._progress:
                 try:
                     self._progress.end()
                 except Exception:
                     pass
         self._total_elapsed_s = time.perf_counter() - self._total_start
-        ET.ElementTree(root).write(filepath, encoding="utf-8", xml_declaration=True)
         self._log(
             f"Overpass totals: nodes {totals['node']}, ways {totals['way']}, relations {totals['relation']}"
         )
+        if self._tile_cache is not None:
+            self._log(f"Tile cache: {self.cache_hits} hit(s), {self.cache_misses} miss(es)")
+        if self.resumed_tiles:
+            self._log(f"Resumed {self.resumed_tiles} tile(s) from checkpoint")
+        http_after = http_pool.get_default_pool().stats()
+        requests_made = http_after["requests"] - http_before["requests"]
+        if requests_made:
+            received_mb = (http_after["bytes_transferred"] - http_before["bytes_transferred"]) / 1048576.0
+            decoded_mb = (http_after["bytes_decoded"] - http_before["bytes_decoded"]) / 1048576.0
+            opened = http_after["connections_opened"] - http_before["connections_opened"]
+            self._log(
+                f"HTTP: {requests_made} request(s) on {opened} new connection(s), "
+                f"{received_mb:.1f} MB received ({decoded_mb:.1f} MB decoded)"
+            )
+        self.merged_ids = {"way": seen["way"], "relation": seen["relation"]}
         self._cache_ready = True
 
+    def _cache_key(self, tile, layer: str) -> str:
+        return tile_cache.make_tile_key(tile, layer, self._build_query(layer, *tile))
+
+    def _is_stored(self, tile) -> bool:
+        """True when every layer of ``tile`` is in the tile cache or the checkpoint."""
+        for layer in self._layers:
+            if self._checkpoint is not None and self._checkpoint.contains(tile, layer):
+                continue
+            if self._tile_cache is not None and self._tile_cache.contains(self._cache_key(tile, layer)):
+                continue
+            return False
+        return True
+
+    def _plan_requests(self, tiles) -> List[_TileRequest]:
+        """Turn the tile list into requests adapted to the data density seen by earlier imports.
+
+        Grid tiles predicted to exceed ``overpass_dense_tile_mb`` are fetched
+        as quadrants; runs of neighbouring tiles in a grid row whose predicted
+        total stays below ``overpass_sparse_tile_kb`` are fetched as one
+        request. Tiles already in the tile cache or checkpoint are requested
+        on their own so their stored payloads are reused.
+        """
+        tiles = [tuple(tile) for tile in tiles]
+        if self._density is None or self._store_tiles or self._city_pack is not None or not tiles:
+            return [_TileRequest(tile, (tile,)) for tile in tiles]
+        api = DEFAULT_CONFIG.api
+        dense_bytes = api.overpass_dense_tile_mb * 1024.0 * 1024.0
+        sparse_bytes = api.overpass_sparse_tile_kb * 1024.0
+        merge_max = max(1, int(api.overpass_merge_max_tiles))
+        planned = []
+        run = []  # (grid key, tile, predicted bytes) of the current sparse run
+        merged = split = 0
+
+        def flush_run():
+            nonlocal merged
+            if len(run) == 1:
+                planned.append(_TileRequest(run[0][1], (run[0][1],)))
+            elif run:
+                bbox = (
+                    min(tile[0] for _, tile, _ in run),
+                    min(tile[1] for _, tile, _ in run),
+                    max(tile[2] for _, tile, _ in run),
+                    max(tile[3] for _, tile, _ in run),
+                )
+                planned.append(_TileRequest(bbox, tuple(tile for _, tile, _ in run)))
+                merged += len(run)
+            run.clear()
+
+        for tile in tiles:
+            key = _tile_key(tile)
+            predicted = None
+            if not self._is_stored(tile):
+                density = self._density.predict(key, self._layers)
+                if density is not None:
+                    predicted = density * _tile_area_km2(tile)
+            if predicted is None:
+                flush_run()
+                planned.append(_TileRequest(tile, (tile,)))
+            elif predicted > dense_bytes and self._split_max_depth > 0:
+                flush_run()
+                planned.append(_TileRequest(tile, (tile,), split=True))
+                split += 1
+            elif predicted < sparse_bytes:
+                extends_run = (
+                    run
+                    and len(run) < merge_max
+                    and run[-1][0] == (key[0], key[1] - 1)
+                    and sum(size for _, _, size in run) + predicted < sparse_bytes
+                )
+                if not extends_run:
+                    flush_run()
+                run.append((key, tile, predicted))
+            else:
+                flush_run()
+                planned.append(_TileRequest(tile, (tile,)))
+        flush_run()
+        if merged or split:
+            self._log(
+                f"Adaptive tiling: {len(tiles)} grid tile(s) -> {len(planned)} request(s) "
+                f"({merged} merged, {split} pre-split)"
+            )
+        return planned
+
+    def _record_density(self, request: _TileRequest, layer: str, size: int) -> None:
+        if self._density is None:
+            return
+        area_km2 = _tile_area_km2(request.bbox)
+        if area_km2 > 0.0:
+            self._density.record([_tile_key(tile) for tile in request.tiles], layer, size / area_km2)
+
+    def _load_stored(self, request: _TileRequest, layer: str):
+        """Return ``(payload, from_checkpoint)`` when every tile of ``request`` has ``layer`` stored, else None."""
+        payloads = []
+        from_checkpoint = True
+        for tile in request.tiles:
+            xml_bytes = self._checkpoint.load(tile, layer) if self._checkpoint is not None else None
+            if xml_bytes is None and self._tile_cache is not None:
+                xml_bytes = self._tile_cache.get(self._cache_key(tile, layer))
+                with self._server_lock:
+                    if xml_bytes is not None:
+                        self.cache_hits += 1
+                    else:
+                        self.cache_misses += 1
+                if xml_bytes is not None:
+                    south, west, north, east = tile
+                    self._log(f"Tile cache hit ({layer}) lat {south:.6f}-{north:.6f}, lon {west:.6f}-{east:.6f}")
+                from_checkpoint = False
+            if xml_bytes is None:
+                return None
+            payloads.append(xml_bytes)
+        return self._combine_payloads(payloads), from_checkpoint
+
+    def _store(self, request: _TileRequest, layer: str, xml_bytes: bytes) -> None:
+        # A merged request is stored whole under each of its tiles: the payload
+        # is small by construction and any later import can reuse each tile
+        for tile in request.tiles:
+            if self._tile_cache is not None:
+                self._tile_cache.put(self._cache_key(tile, layer), xml_bytes)
+            if self._checkpoint is not None:
+                self._checkpoint.save(tile, layer, xml_bytes)
+
+    def _raise_if_cancelled(self) -> None:
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise RouteImportCancelled("Overpass download cancelled")
+
+    def _fetch_tile_with_retries(self, index: int, request: _TileRequest, server_index: Optional[int] = None):
+        """Fetch every enabled layer of a request; returns ``(payloads, retries, tile_ms)``."""
+        tile_start = time.perf_counter()
+        payloads = []
+        retries = 0
+        resumed = 0
+        for layer in self._layers:
+            xml_bytes, layer_retries, from_checkpoint = self._fetch_layer_with_retries(
+                index, request, layer, server_index
+            )
+            payloads.append(xml_bytes)
+            retries += layer_retries
+            resumed += from_checkpoint
+        if resumed == len(self._layers):
+            with self._server_lock:
+                self.resumed_tiles += 1
+        tile_ms = (time.perf_counter() - tile_start) * 1000.0
+        return payloads, retries, tile_ms
+
+    def _fetch_layer_with_retries(self, index: int, request: _TileRequest, layer: str, server_index: Optional[int] = None):
+        """Fetch one layer of a request; returns ``(payload, retries, from_checkpoint)``.
+
+        The payload is taken from the checkpoint or the tile cache when all
+        tiles of the request are stored. Otherwise it is downloaded, and only
+        the payload of the whole request is recorded, cached and checkpointed.
+        """
+        if self._city_pack is not None and self._city_pack.covers(request.bbox):
+            return self._city_pack.query(layer, request.bbox), 0, False
+        stored = self._load_stored(request, layer)
+        if stored is not None:
+            xml_bytes, from_checkpoint = stored
+            return xml_bytes, 0, from_checkpoint
+        if request.split:
+            xml_bytes, retries = self._fetch_quadrants(index, request.bbox, layer, server_index, 1)
+        else:
+            xml_bytes, retries = self._fetch_bbox_with_retries(index, request.bbox, layer, server_index, 0)
+        self._record_density(request, layer, len(xml_bytes))
+        self._store(request, layer, xml_bytes)
+        return xml_bytes, retries, False
+
+    def _fetch_bbox_with_retries(self, index: int, bbox, layer: str, server_index: Optional[int], depth: int):
+        """Download one layer of ``bbox``; returns ``(payload, retries)``.
+
+        A bbox too large for one Overpass query is split into quadrants (up
+        to ``overpass_split_max_depth`` levels) whose payloads are combined.
+        Below that depth it is retried like any other failed request.
+        """
+        retries = 0
+        while True:
+            self._raise_if_cancelled()
+            try:
+                return self._fetch_tile(bbox, layer, server_index), retries
+            except RouteImportCancelled:
+                raise
+            except OverpassQueryTooLarge as exc:
+                if depth >= self._split_max_depth:
+                    retries = self._wait_before_retry(index, layer, retries, exc)
+                    continue
+                self._log(f"Tile {index} ({layer}) too large for one query ({exc}); splitting into 4")
+                xml_bytes, split_retries = self._fetch_quadrants(index, bbox, layer, server_index, depth + 1)
+                return xml_bytes, retries + split_retries
+            except RouteServiceError as exc:
+                retries = self._wait_before_retry(index, layer, retries, exc)
+
+    def _fetch_quadrants(self, index: int, bbox, layer: str, server_index: Optional[int], depth: int):
+        parts = []
+        retries = 0
+        for child in _split_tile(bbox):
+            child_bytes, child_retries = self._fetch_bbox_with_retries(index, child, layer, server_index, depth)
+            parts.append(child_bytes)
+            retries += child_retries
+        return self._combine_payloads(parts), retries
+
+    def _wait_before_retry(self, index: int, layer: str, retries: int, exc: RouteServiceError) -> int:
+        """Back off before the next attempt at a layer; re-raises ``exc`` once retries are exhausted."""
+        retries += 1
+        if retries > self._max_retries:
+            raise exc
+        backoff = min(5.0, 2 ** (retries - 1)) + random.uniform(0.0, 0.25)
+        self._log(f"Retry {retries}/{self._max_retries} for tile {index} ({layer}): {exc} (waiting {backoff:.2f}s)")
+        time.sleep(backoff)
+        return retries
+
+    def _iter_fetched_tiles(self, requests, background: bool = False):
+        """Yield ``(index, request, payloads, retries, tile_ms)`` in request order.
+
+        With ``max_workers > 1`` the requests are downloaded by a bounded thread
+        pool, each request starting on a different entry of ``SERVERS``. Results
+        are still yielded strictly in request order so the merged output is
+        deterministic and progress is reported from the calling thread.
+        ``background`` uses the pool even for a single worker, so downloads
+        keep going while the caller processes the previous tile.
+        """
+        workers = min(self._max_workers, len(requests))
+        if workers <= 1 and not (background and requests):
+            for index, request in enumerate(requests, 1):
+                payloads, retries, tile_ms = self._fetch_tile_with_retries(index, request)
+                yield index, request, payloads, retries, tile_ms
+            return
+        total_servers = len(self.SERVERS)
+        workers = max(1, workers)
+        self._log(f"Concurrent fetch: {workers} worker(s) across {total_servers} endpoint(s)")
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blosm-overpass")
+        try:
+            futures = [
+                pool.submit(self._fetch_tile_with_retries, index, request, (index - 1) % total_servers)
+                for index, request in enumerate(requests, 1)
+            ]
+            for index, (request, future) in enumerate(zip(requests, futures), 1):
+                while True:
+                    self._raise_if_cancelled()
+                    try:
+                        payloads, retries, tile_ms = future.result(timeout=0.25)
+                        break
+                    except FutureTimeoutError:
+                        continue
+                yield index, request, payloads, retries, tile_ms
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
     def write(self, filepath: str, south: float, west: float, north: float, east: float) -> None:
         """Backward-compatible entry point that tiles a bbox.
 
         Existing callers pass a geographic bbox; internally we derive the tile
-        list and forward to :meth:`write_tiles` so that other callers (like the
-        Extend City operator) can supply their own tile sets.
+        list (snapped to the global grid by default) and forward to
+        :meth:`write_tiles` so that other callers (like the Extend City
+        operator) can supply their own tile sets. A tile plan passed to the
+        constructor (such as a route corridor) takes precedence over the bbox.
         """
-        tiles = _tile_bbox(south, west, north, east)
+        tiles = self._tile_plan or _tiles_for_bbox(south, west, north, east)
         self.write_tiles(filepath, tiles)
 
-    def _fetch_tile(self, tile: Tuple[float, float, float, float]) -> bytes:
+    def _fetch_tile(self, tile: Tuple[float, float, float, float], layer: str, server_index: Optional[int] = None) -> bytes:
+        """Fetch one layer of one tile, switching endpoints on failure.
+
+        With endpoint health scoring enabled, every attempt goes to the
+        endpoint with the best expected completion time that hasn't been
+        tried for this request yet. Otherwise ``server_index`` pins the first
+        endpoint to try (used by concurrent workers); when omitted the shared
+        round-robin position is used and advanced on failure as before.
+        Tiles inside the bounds of a city pack are answered from the pack.
+        The tile cache is handled by :meth:`_fetch_layer_with_retries`.
+        """
         south, west, north, east = tile
-        query = self._build_query(south, west, north, east)
+        if self._city_pack is not None and self._city_pack.covers(tile):
+            return self._city_pack.query(layer, tile)
+        query = self._build_query(layer, south, west, north, east)
         attempts = 0
         total_servers = len(self.SERVERS)
+        index = self._server_index if server_index is None else server_index % total_servers
+        tried: List[str] = []
         while True:
-            server = self.SERVERS[self._server_index]
+            self._raise_if_cancelled()
+            if self._health is not None:
+                server = self._health.acquire(self.SERVERS, tried, self._politeness_waits())
+            else:
+                server = self.SERVERS[index]
+            tried.append(server)
+            request_start = None
             try:
-                self._sleep_until_ready()
-                data = self._request_overpass(server, query)
+                try:
+                    self._sleep_until_ready(server)
+                    request_start = time.perf_counter()
+                    data = self._request_overpass(server, query)
+                finally:
+                    if self._health is not None:
+                        self._health.end_request(server)
+                if self._health is not None:
+                    self._health.record_success(server, time.perf_counter() - request_start)
                 self._log(
-                    f"Fetched tile lat {south:.6f}-{north:.6f}, lon {west:.6f}-{east:.6f} from {server}"
+                    f"Fetched {layer} lat {south:.6f}-{north:.6f}, lon {west:.6f}-{east:.6f} from {server}"
                 )
                 return data
+            except OverpassQueryTooLarge as exc:
+                # Another endpoint would fail on the same query; the caller splits the tile.
+                # A query timeout still counts against the endpoint, since a loaded mirror
+                # times out queries that others answer; running out of memory doesn't.
+                if self._health is not None and request_start is not None and "timed out" in str(exc):
+                    self._health.record_failure(server, time.perf_counter() - request_start)
+                raise
             except RouteServiceError as exc:
+                if self._health is not None and request_start is not None:
+                    self._health.record_failure(server, time.perf_counter() - request_start)
                 attempts += 1
-                self._server_index = (self._server_index + 1) % total_servers
+                index = (index + 1) % total_servers
+                if server_index is None:
+                    self._server_index = index
                 if attempts > self._max_retries:
                     raise RouteServiceError(f"Overpass request failed after retries: {exc}")
                 backoff = min(5.0, 2 ** (attempts - 1)) + random.uniform(0.0, 0.25)
@@ -535,85 +1297,126 @@ class OverpassFetcher:
 
     def _request_overpass(self, server: str, query: str) -> bytes:
         url = f"{server}/api/interpreter"
-        self._last_request = time.monotonic()
-        req = request.Request(
-            url,
-            data=query.encode("utf-8"),
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded; charset=utf-8",
-                "User-Agent": self.user_agent,
-            },
-        )
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded; charset=utf-8",
+            "User-Agent": self.user_agent,
+        }
         try:
-            with request.urlopen(req, timeout=self._timeout_s) as resp:
-                raw = resp.read()
-                headers = resp.headers if resp.headers else {}
-                encoding = headers.get("Content-Encoding")
-                if encoding == "gzip":
-                    raw = gzip.decompress(raw)
-                content_length = headers.get("Content-Length")
-                if content_length and len(raw) < int(content_length):
-                    raise RouteServiceError("Overpass response truncated")
+            # Keep-alive connection per endpoint; gzip is decoded (and the
+            # body checked for truncation) by the pool
+            raw = http_pool.get_default_pool().request(
+                "POST", url, body=query.encode("utf-8"), headers=headers, timeout=self._timeout_s
+            ).data
         except error.HTTPError as exc:
             retry_after = exc.headers.get("Retry-After") if exc.headers else None
             if retry_after:
                 try:
                     wait_time = float(retry_after)
-                    self._log(f"Retry-After received: waiting {wait_time:.2f}s")
-                    time.sleep(min(wait_time, 10.0))
+                    if self._health is not None:
+                        # Other endpoints take over while this one backs off
+                        self._log(f"Retry-After received: {server} deferred for {wait_time:.2f}s")
+                        self._health.defer(server, wait_time)
+                    else:
+                        self._log(f"Retry-After received: waiting {wait_time:.2f}s")
+                        time.sleep(min(wait_time, 10.0))
                 except ValueError:
                     pass
             raise RouteServiceError(f"Overpass HTTP error {exc.code}") from exc
         except IncompleteRead as exc:
             raise RouteServiceError("Overpass incomplete read") from exc
+        except HTTPException as exc:
+            raise RouteServiceError(f"Overpass response error: {exc}") from exc
         except error.URLError as exc:
             raise RouteServiceError(f"Overpass connection error: {exc}") from exc
+        except TimeoutError as exc:
+            # A client-side read timeout says nothing about the query; a slow or
+            # hung endpoint is handled like any other failed request
+            raise RouteServiceError("Overpass read timed out") from exc
         finally:
-            self._last_request = time.monotonic()
+            self._mark_request_done(server)
         stripped = raw.strip()
         if not stripped.startswith(b"<?xml") and not stripped.startswith(b"<osm"):
             raise RouteServiceError("Overpass returned unexpected payload")
         if b"</osm>" not in stripped:
             raise RouteServiceError("Overpass response incomplete (missing </osm>)")
+        # Timeouts and memory exhaustion are reported in a remark after the partial data
+        tail = stripped[-4096:]
+        remark_start = tail.rfind(b"<remark>")
+        if remark_start >= 0 and b"runtime error" in tail[remark_start:]:
+            remark = tail[remark_start + len(b"<remark>"):].split(b"</remark>")[0]
+            raise OverpassQueryTooLarge(remark.decode("utf-8", "replace").strip())
         return raw
 
-    def _merge_xml(self, root: ET.Element, seen, xml_bytes: bytes) -> dict:
+    def _stream_merge(self, out, seen, xml_bytes: bytes, collect: Optional[list] = None) -> dict:
+        """Write the top-level elements of one tile not yet in ``seen`` to ``out``.
+
+        ``seen`` maps element types to sets of integer ids. Each element is
+        serialised as soon as it is complete and then dropped from the parse
+        tree, so only one element of the tile is held at a time, unless the
+        new elements are also appended to ``collect`` for a pipelined parse.
+        """
+        added = {"node": 0, "way": 0, "relation": 0}
+        root = None
+        depth = 0
         try:
-            doc = ET.fromstring(xml_bytes)
-        except ET.ParseError as exc:
+            for event, elem in ET.iterparse(io.BytesIO(xml_bytes), events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        if elem.tag != "osm":
+                            raise RouteServiceError("Unexpected Overpass root element")
+                        root = elem
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+                ids = seen.get(elem.tag)
+                element_id = elem.get("id")
+                if ids is not None and element_id:
+                    key = int(element_id)
+                    if key not in ids:
+                        ids.add(key)
+                        elem.tail = None
+                        out.write(ET.tostring(elem, encoding="utf-8"))
+                        added[elem.tag] += 1
+                        if collect is not None:
+                            collect.append(elem)
+                root.clear()
+        except (ET.ParseError, ValueError) as exc:
             raise RouteServiceError(f"Unable to parse Overpass XML: {exc}") from exc
-        if doc.tag != "osm":
-            raise RouteServiceError("Unexpected Overpass root element")
-        added = {"node": 0, "way": 0, "relation": 0}
-        for child in doc:
-            tag = child.tag
-            if tag not in seen:
-                continue
-            element_id = child.get("id")
-            if not element_id:
-                continue
-            key = (tag, element_id)
-            if key in seen[tag]:
-                continue
-            seen[tag].add(key)
-            child.tail = None
-            root.append(child)
-            added[tag] += 1
         return added
 
+    def _combine_payloads(self, payloads: List[bytes]) -> bytes:
+        """Merge several payloads (layers of a tile or split sub-tiles) into one OSM document."""
+        if len(payloads) == 1:
+            return payloads[0]
+        out = io.BytesIO()
+        out.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+        out.write(b'<osm version="0.6" generator="BLOSM Route">')
+        seen = {"node": set(), "way": set(), "relation": set()}
+        for xml_bytes in payloads:
+            self._stream_merge(out, seen, xml_bytes)
+        out.write(b"</osm>")
+        return out.getvalue()
+
     def get_cached_tiles(self):
-        if not self._store_tiles or not self._tile_payloads:
+        if not self._store_tiles or not self._tile_spill:
             return []
-        return list(zip(self._tile_bboxes, self._tile_payloads))
+        return self._tile_spill
 
-    def _build_query(self, south: float, west: float, north: float, east: float) -> str:
+    def _build_query(self, layer: str, south: float, west: float, north: float, east: float) -> str:
+        """Overpass query for one layer (``buildings``, ``roads``, ``water`` or ``shoreline``) of a tile."""
         parts = []
-        if self.include_buildings:
+        if layer == "buildings":
             parts.append(f'way["building"]({south},{west},{north},{east});')
             parts.append(f'relation["building"]({south},{west},{north},{east});')
-        if self.include_roads:
+        elif layer == "roads":
             parts.append(f'way["highway"]({south},{west},{north},{east});')
-        if self.include_water:
+        elif layer == "shoreline":
+            for key in ('"natural"="water"', '"water"', '"waterway"', '"natural"="coastline"'):
+                parts.append(f'way[{key}]({south},{west},{north},{east});')
+                parts.append(f'relation[{key}]({south},{west},{north},{east});')
+        elif layer == "water":
             # Smart water import: compact bbox for nearby features, expanded bbox for large water relations
 
             # Nearby water features in main (compact) bbox - 500m padding area
@@ -663,8 +1466,11 @@ class OverpassFetcher:
             parts.append(f'relation["place"="island"]["natural"~"land|ground|grass|forest|wood|scrub|wetland|sand|rock|stone"]({expanded_south},{expanded_west},{expanded_north},{expanded_east});')
             parts.append(f'way["place"="island"]["natural"~"land|ground|grass|forest|wood|scrub|wetland|sand|rock|stone"]({expanded_south},{expanded_west},{expanded_north},{expanded_east});')
         body = "\n        ".join(parts)
+        settings = "[out:xml][timeout:180]"
+        if DEFAULT_CONFIG.api.overpass_adaptive_tiles:
+            settings += f"[maxsize:{int(DEFAULT_CONFIG.api.overpass_query_max_mb) * 1024 * 1024}]"
         return (
-            "[out:xml][timeout:180];\n"
+            f"{settings};\n"
             "(\n"
             f"        {body}\n"
             ");\n"
@@ -8,12 +8,17 @@ import bpy
 import bmesh
 import os
 import sys
+import tempfile
 import xml.etree.ElementTree as ET
 import math # Added for math.radians
 from mathutils import Vector
 from pathlib import Path
 from types import SimpleNamespace
 from ..app import blender as blenderApp
+from ..util.transverse_mercator import projectBatch
+from .config import DEFAULT_CONFIG
+from .city_pack import open_pack
+from .utils import OverpassFetcher, RouteImportCancelled, RouteServiceError
 
 try:
     from ..asset_manager.registry import AssetRegistry
@@ -403,10 +408,6 @@ def _apply_island_template_style(island_mesh: bpy.types.Object) -> None:
 
     print("[BLOSM] Applied ASSET_ISLAND material and modifiers to Islands_Mesh")
 
-def get_projected_co(lat, lon, projection):
-    x, y, z = projection.fromGeographic(lat, lon)
-    return Vector((x, y, 0))
-
 def stitch_ways(ways_data):
     if not ways_data: return []
     pool = [list(w) for w in ways_data if len(w) > 1]
@@ -447,41 +448,68 @@ def get_raw_content_bounds():
         
     return min_v.x, min_v.y, max_v.x, max_v.y, True
 
-def fetch_raw_water_data(minLat, minLon, maxLat, maxLon):
-    print(f"[BLOSM] Fetching Raw Water Data for {minLat},{minLon} to {maxLat},{maxLon}")
-    osm_file = os.path.join(bpy.app.tempdir, "water_import_raw.osm")
-    
-    query = f"""
-    [out:xml][timeout:25];
-    (
-      way["natural"="water"]({minLat},{minLon},{maxLat},{maxLon});
-      relation["natural"="water"]({minLat},{minLon},{maxLat},{maxLon});
-      way["water"]({minLat},{minLon},{maxLat},{maxLon});
-      relation["water"]({minLat},{minLon},{maxLat},{maxLon});
-      way["waterway"]({minLat},{minLon},{maxLat},{maxLon});
-      relation["waterway"]({minLat},{minLon},{maxLat},{maxLon});
-      way["natural"="coastline"]({minLat},{minLon},{maxLat},{maxLon});
-      relation["natural"="coastline"]({minLat},{minLon},{maxLat},{maxLon});
-    );
-    (._;>;);
-    out body;
+def water_fetch_bounds(bounds):
+    """Route bounds expanded so the shoreline south of the CN Tower is always included."""
+    minLat, minLon, maxLat, maxLon = bounds
+    minLat = min(minLat, CN_TOWER_LAT - WATER_LAT_MARGIN)
+    maxLat = max(maxLat, CN_TOWER_LAT + WATER_LAT_MARGIN)
+    minLon = min(minLon, CN_TOWER_LON - WATER_LON_MARGIN)
+    maxLon = max(maxLon, CN_TOWER_LON + WATER_LON_MARGIN)
+    return minLat, minLon, maxLat, maxLon
+
+def fetch_raw_water_data(minLat, minLon, maxLat, maxLon, osm_file=None, user_agent=None, cancel_event=None, city_pack=None):
+    """Download raw water data; safe to call from a worker thread.
+
+    The bbox is fetched in grid tiles through the shared Overpass fetcher, so
+    tiles come from the Overpass tile cache when an earlier import or Extend
+    City already downloaded them, or from <city_pack> (route.city_pack.CityPack)
+    when the scene imports from one. Without <osm_file> the data is written to a
+    new temporary file, which the caller removes. Returns the file path, or
+    None if the download failed.
     """
-    import urllib.request
-    import urllib.parse
-    
-    url = "https://overpass-api.de/api/interpreter"
-    data = urllib.parse.urlencode({'data': query}).encode('utf-8')
+    print(f"[BLOSM] Fetching Raw Water Data for {minLat},{minLon} to {maxLat},{maxLon}")
+    api = DEFAULT_CONFIG.api
+    created = osm_file is None
+    if created:
+        fd, osm_file = tempfile.mkstemp(prefix="blosm_water_", suffix=".osm")
+        os.close(fd)
     try:
-        req = urllib.request.Request(url, data=data)
-        with urllib.request.urlopen(req) as response:
-            with open(osm_file, 'wb') as f: f.write(response.read())
+        fetcher = OverpassFetcher(
+            user_agent or api.nominatim_user_agent,
+            include_roads=False,
+            include_buildings=False,
+            include_shoreline=True,
+            min_interval_ms=api.overpass_min_interval_ms,
+            timeout_s=api.overpass_timeout_s,
+            max_retries=api.overpass_max_retries,
+            max_workers=api.overpass_max_workers,
+            cancel_event=cancel_event,
+            city_pack=city_pack,
+        )
+        fetcher.write(osm_file, minLat, minLon, maxLat, maxLon)
         return osm_file
-    except Exception as e:
+    except RouteImportCancelled:
+        if created:
+            _remove_file(osm_file)
+        raise
+    except RouteServiceError as e:
         print(f"[BLOSM] Water Download failed: {e}")
+        if created:
+            _remove_file(osm_file)
         return None
 
-def process(context, bounds=None):
-    """Main entry point called by fetch_operator"""
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def process(context, bounds=None, osm_file=None):
+    """Main entry point called by fetch_operator
+
+    <osm_file> is raw water data already downloaded for <water_fetch_bounds(bounds)>,
+    e.g. by the background stage of the modal route import; the caller owns it.
+    """
     addon = _resolve_route_properties(context.scene)
     if not addon.route_import_water:
         return
@@ -504,14 +532,7 @@ def process(context, bounds=None):
 
     # Expand bounds to ensure shoreline south of CN Tower is included
     if use_route_bounds:
-        if minLat > CN_TOWER_LAT - WATER_LAT_MARGIN:
-            minLat = CN_TOWER_LAT - WATER_LAT_MARGIN
-        if maxLat < CN_TOWER_LAT + WATER_LAT_MARGIN:
-            maxLat = CN_TOWER_LAT + WATER_LAT_MARGIN
-        if minLon > CN_TOWER_LON - WATER_LON_MARGIN:
-            minLon = CN_TOWER_LON - WATER_LON_MARGIN
-        if maxLon < CN_TOWER_LON + WATER_LON_MARGIN:
-            maxLon = CN_TOWER_LON + WATER_LON_MARGIN
+        minLat, minLon, maxLat, maxLon = water_fetch_bounds((minLat, minLon, maxLat, maxLon))
     
     # Ensure Projection (reuse stored origin if available for consistent XY positioning)
     stored_origin = None
@@ -527,20 +548,37 @@ def process(context, bounds=None):
     blenderApp.app.setProjection(center_lat, center_lon)
     projection = blenderApp.app.projection
     
-    # 2. Fetch Raw Data
-    osm_file = fetch_raw_water_data(minLat, minLon, maxLat, maxLon)
+    # 2. Fetch Raw Data (unless prefetched)
+    fetched_file = None
+    if not (osm_file and os.path.isfile(osm_file)):
+        pack_path = getattr(addon, "route_city_pack", "")
+        osm_file = fetched_file = fetch_raw_water_data(
+            minLat, minLon, maxLat, maxLon,
+            city_pack=open_pack(bpy.path.abspath(pack_path)) if pack_path else None,
+        )
     stitched_outer = []
     stitched_inner = []
 
     if osm_file:
         # 3. Parse
         print("[BLOSM] Parsing Water Geometry...")
-        tree = ET.parse(osm_file)
+        try:
+            tree = ET.parse(osm_file)
+        finally:
+            if fetched_file:
+                _remove_file(fetched_file)
         root = tree.getroot()
         
-        nodes = {} 
+        node_ids = []
+        lats = []
+        lons = []
         for node in root.findall('node'):
-            nodes[node.get('id')] = (float(node.get('lat')), float(node.get('lon')))
+            node_ids.append(node.get('id'))
+            lats.append(float(node.get('lat')))
+            lons.append(float(node.get('lon')))
+        # Project all nodes in one pass
+        xs, ys = projectBatch(projection, lats, lons)
+        nodes = {node_id: (x, y) for node_id, x, y in zip(node_ids, xs, ys)}
             
         ways = {}
         for way in root.findall('way'):
@@ -548,7 +586,8 @@ def process(context, bounds=None):
             coords = []
             for nid in nd_refs:
                 if nid in nodes:
-                    coords.append(get_projected_co(nodes[nid][0], nodes[nid][1], projection))
+                    x, y = nodes[nid]
+                    coords.append(Vector((x, y, 0)))
             ways[way.get('id')] = coords
             
         outer_segments = []
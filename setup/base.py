@@ -1,4 +1,5 @@
 from ..parse.osm.relation.building import Building
+from ..parse.osm.condition import TagCondition
 
 from ..manager import BaseManager, Linestring, Polygon, PolygonAcceptBroken, WayManager
 from ..building.gn_2d import GnBldg2dManager
@@ -118,7 +119,7 @@ def setup(app, osm):
     if app.buildings:
         if app.mode is app.twoD:
             osm.addCondition(
-                lambda tags, e: "building" in tags,
+                TagCondition({"building": None}),
                 "buildings",
                 GnBldg2dManager(app)
             )
@@ -135,12 +136,12 @@ def setup(app, osm):
                 buildingRelations
             )
             osm.addCondition(
-                lambda tags, e: "building" in tags,
+                TagCondition({"building": None}),
                 "buildings",
                 buildings
             )
             osm.addCondition(
-                lambda tags, e: "building:part" in tags,
+                TagCondition({"building:part": None}),
                 None,
                 buildingParts
             )
@@ -156,95 +157,95 @@ def setup(app, osm):
 
     if app.highways:
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("motorway", "motorway_link"),
+            TagCondition({"highway": ("motorway", "motorway_link")}),
             "roads_motorway",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("trunk", "trunk_link"),
+            TagCondition({"highway": ("trunk", "trunk_link")}),
             "roads_trunk",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("primary", "primary_link"),
+            TagCondition({"highway": ("primary", "primary_link")}),
             "roads_primary",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("secondary", "secondary_link"),
+            TagCondition({"highway": ("secondary", "secondary_link")}),
             "roads_secondary",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("tertiary", "tertiary_link"),
+            TagCondition({"highway": ("tertiary", "tertiary_link")}),
             "roads_tertiary",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "unclassified",
+            TagCondition({"highway": "unclassified"}),
             "roads_unclassified",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("residential", "living_street"),
+            TagCondition({"highway": ("residential", "living_street")}),
             "roads_residential",
             wayManager
         )
         # footway to optimize the walk through conditions
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("footway", "path"),
+            TagCondition({"highway": ("footway", "path")}),
             "paths_footway",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "service",
+            TagCondition({"highway": "service"}),
             "roads_service",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "pedestrian",
+            TagCondition({"highway": "pedestrian"}),
             "roads_pedestrian",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "track",
+            TagCondition({"highway": "track"}),
             "roads_track",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "steps",
+            TagCondition({"highway": "steps"}),
             "paths_steps",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "cycleway",
+            TagCondition({"highway": "cycleway"}),
             "paths_cycleway",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") == "bridleway",
+            TagCondition({"highway": "bridleway"}),
             "paths_bridleway",
             wayManager
         )
         osm.addCondition(
-            lambda tags, e: tags.get("highway") in ("road", "escape", "raceway"),
+            TagCondition({"highway": ("road", "escape", "raceway")}),
             "roads_other",
             wayManager
         )
     if app.railways:
         osm.addCondition(
-            lambda tags, e: "railway" in tags,
+            TagCondition({"railway": None}),
             "railways",
             wayManager
         )
     if app.water:
         osm.addCondition(
-            lambda tags, e: tags.get("natural") == "water" or tags.get("waterway") == "riverbank" or tags.get("landuse") == "reservoir",
+            TagCondition({"natural": "water", "waterway": "riverbank", "landuse": "reservoir"}),
             "water",
             polygonAcceptBroken
         )
         osm.addCondition(
-            lambda tags, e: tags.get("natural") == "coastline",
+            TagCondition({"natural": "coastline"}),
             "coastlines",
             linestring
         )
@@ -262,13 +263,13 @@ def setup(app, osm):
         )
     if app.forests:
         osm.addCondition(
-            lambda tags, e: tags.get("natural") == "wood" or tags.get("landuse") == "forest",
+            TagCondition({"natural": "wood", "landuse": "forest"}),
             "forest",
             polygon
         )
     if app.vegetation:
         osm.addCondition(
-            lambda tags, e: ("landuse" in tags and tags["landuse"] in ("grass", "meadow", "farmland")) or ("natural" in tags and tags["natural"] in ("scrub", "grassland", "heath")),
+            TagCondition({"landuse": ("grass", "meadow", "farmland"), "natural": ("scrub", "grassland", "heath")}),
             "vegetation",
             polygon
         )
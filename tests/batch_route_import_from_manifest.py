@@ -25,10 +25,88 @@ Each entry produces an individual .blend file named:
 
 import bpy
 import sys
+import time
 from pathlib import Path
 from typing import List, Optional, Tuple
 
 
+# Attempts per route; later attempts resume the Overpass download from its checkpoint
+FETCH_ATTEMPTS = 3
+
+
+# -----------------------------------------------------------------------------
+# Memory report
+# -----------------------------------------------------------------------------
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None if it can't be read."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / (1048576.0 if sys.platform == "darwin" else 1024.0)
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        psapi = ctypes.WinDLL("psapi")
+        kernel32 = ctypes.WinDLL("kernel32")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / 1048576.0
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+def _peak_worker_rss_mb() -> Optional[float]:
+    """Peak resident set size in MB of the largest finished child process (e.g. an OSM decoding worker).
+
+    None if there was none or it can't be read. Worker processes have their own
+    memory, which isn't included in ``_peak_rss_mb``.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if not peak:
+        return None
+    return peak / (1048576.0 if sys.platform == "darwin" else 1024.0)
+
+
+def _report_memory(label: str) -> Optional[float]:
+    peak = _peak_rss_mb()
+    if peak is None:
+        print(f"[BATCH] {label}: peak RSS unavailable on this platform")
+        return peak
+    worker_peak = _peak_worker_rss_mb()
+    if worker_peak is None:
+        print(f"[BATCH] {label}: peak RSS {peak:.0f} MB (main process only)")
+    else:
+        print(f"[BATCH] {label}: peak RSS {peak:.0f} MB, largest worker process {worker_peak:.0f} MB")
+    return peak
+
+
 # -----------------------------------------------------------------------------
 # Parsing helpers
 # -----------------------------------------------------------------------------
@@ -160,13 +238,22 @@ def _run_single_route(task_id: str, pickup: str, dropoff: str, out_path: Path):
     except Exception:
         pass
 
-    # Run Fetch Route & Map
-    print("[BATCH] Invoking BLOSM_OT_FetchRouteMap")
-    try:
-        res = bpy.ops.blosm.fetch_route_map("EXEC_DEFAULT")
-        print(f"[BATCH] fetch_route_map result: {res}")
-    except Exception as exc:
-        print(f"[BATCH] ERROR running fetch_route_map: {exc}")
+    # Run Fetch Route & Map. Downloaded tiles are checkpointed on disk, so a
+    # retry after a failed download only fetches the tiles that are missing.
+    addon.route_resume_downloads = True
+    res = None
+    for attempt in range(1, FETCH_ATTEMPTS + 1):
+        print(f"[BATCH] Invoking BLOSM_OT_FetchRouteMap (attempt {attempt}/{FETCH_ATTEMPTS})")
+        try:
+            res = bpy.ops.blosm.fetch_route_map("EXEC_DEFAULT")
+            print(f"[BATCH] fetch_route_map result: {res}")
+        except Exception as exc:
+            print(f"[BATCH] ERROR running fetch_route_map: {exc}")
+            res = None
+        if res is not None and 'FINISHED' in res:
+            break
+    else:
+        print(f"[BATCH] ERROR: fetch_route_map failed after {FETCH_ATTEMPTS} attempt(s)")
         return
 
     # Run finalizer + keyframes
@@ -232,13 +319,21 @@ def main():
     print(f"[BATCH] Found {len(entries)} route entries")
 
     _load_addon_from_this_folder()
+    _report_memory("Before routes")
 
+    # The peak only grows, so a route that raises it is the one to look at
+    previous_peak = None
     for task_id, pickup, dropoff in entries:
         pickup_slug = _slugify(pickup)
         dropoff_slug = _slugify(dropoff)
         filename = f"{task_id}_{pickup_slug}_to_{dropoff_slug}.blend"
         out_path = output_dir / filename
+        start = time.perf_counter()
         _run_single_route(task_id, pickup, dropoff, out_path)
+        peak = _report_memory(f"{task_id} done in {time.perf_counter() - start:.1f}s")
+        if peak is not None and previous_peak is not None and peak > previous_peak:
+            print(f"[BATCH] {task_id} raised the peak RSS by {peak - previous_peak:.0f} MB")
+        previous_peak = peak
 
 
 if __name__ == "__main__":
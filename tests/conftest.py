@@ -0,0 +1,215 @@
+"""
+Setup of the tests running with pytest outside of Blender.
+
+The addon folder is registered as the package <cash_cab_addon> without executing its <__init__.py>,
+which registers the Blender operators and panels, so the pure Python modules of the addon
+(e.g. <cash_cab_addon.route.utils>) can be imported by the tests.
+The scripts in this folder that need Blender aren't collected if <bpy> isn't available.
+
+The fixture <makeOsm> creates an <Osm> instance with a minimal application and a manager
+recording the elements passed to it, so the results of different parsing paths can be compared.
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+ADDON_NAME = "cash_cab_addon"
+
+testsDir = Path(__file__).resolve().parent
+addonDir = testsDir.parent
+
+
+def _registerPackage(name, path):
+    package = types.ModuleType(name)
+    package.__path__ = [str(path)]
+    sys.modules[name] = package
+    return package
+
+
+if not ADDON_NAME in sys.modules:
+    _registerPackage(ADDON_NAME, addonDir)
+    # <util/__init__.py> imports <mathutils> of Blender, the pure Python modules of <util> don't
+    if importlib.util.find_spec("mathutils") is None:
+        _registerPackage(ADDON_NAME + ".util", addonDir / "util")
+    # <route/__init__.py> imports the operators, the download code in <route.utils> doesn't need Blender
+    if importlib.util.find_spec("bpy") is None:
+        _registerPackage(ADDON_NAME + ".route", addonDir / "route")
+
+
+collect_ignore = []
+if importlib.util.find_spec("bpy") is None:
+    collect_ignore.extend(
+        path.name for path in testsDir.glob("*.py")
+        if path.name != "conftest.py" and "import bpy" in path.read_text(encoding="utf-8", errors="ignore")
+    )
+
+
+class OsmApp:
+    """
+    The attributes and methods of <app.BaseApp> used by <Osm> while parsing
+    """
+
+    projection = None
+    loadMissingMembers = False
+
+    def __init__(self, **attrs):
+        self.incompleteRelations = []
+        self.missingWays = set()
+        self.__dict__.update(attrs)
+
+    def setProjection(self, lat, lon):
+        from cash_cab_addon.util.transverse_mercator import TransverseMercator
+        self.projection = TransverseMercator(lat=lat, lon=lon)
+
+
+class RecordingManager:
+    """
+    A manager recording the OSM elements that satisfied its conditions
+    """
+
+    acceptBroken = False
+
+    def __init__(self):
+        self.log = []
+
+    def parseNode(self, element, elementId):
+        self.log.append(("node", elementId, element.l, sorted(element.tags.items())))
+
+    def parseWay(self, element, elementId):
+        self.log.append(("way", elementId, element.l, sorted(element.tags.items()), element.valid))
+
+    def parseRelation(self, element, elementId):
+        self.log.append(("relation", elementId, element.l, sorted(element.tags.items())))
+
+    def result(self, osm):
+        """
+        Everything a parse of <osm> left for the managers, to compare the results of different parsing paths
+        """
+        return (
+            self.log,
+            sorted(osm.ways),
+            sorted(osm.relations),
+            [(_id, node.lat, node.lon, node.tags) for _id, node in osm.nodes.items()],
+            [(r[1], r[2], sorted(r[3].items())) for r in osm.app.incompleteRelations],
+            (osm.minLat, osm.minLon, osm.maxLat, osm.maxLon),
+            [tuple(osm.nodes.getData(_id, osm)) for _id in osm.nodes] if osm.projection else None
+        )
+
+
+def isMultipolygon(tags, e):
+    return tags.get("type") == "multipolygon"
+
+
+@pytest.fixture
+def makeOsm():
+    """
+    Returns a function creating a tuple (osm, manager) for the keyword arguments setting the attributes of the app
+    """
+    from cash_cab_addon.parse.osm import Osm
+    from cash_cab_addon.parse.osm.condition import TagCondition
+
+    def make(**attrs):
+        osm = Osm(OsmApp(**attrs))
+        manager = RecordingManager()
+        osm.addCondition(TagCondition({"building": None}), "buildings", manager)
+        osm.addCondition(isMultipolygon, "multipolygons", manager)
+        osm.addCondition(TagCondition({"highway": ("primary", "residential")}), "roads", manager)
+        osm.addNodeCondition(TagCondition({"amenity": None}), "amenities", manager)
+        return osm, manager
+
+    return make
+
+
+# A small OSM document: the bounds (minLat, minLon, maxLat, maxLon), the nodes (id, lat, lon, tags),
+# the ways (id, node ids, tags) and the relations (id, members (type, id, role), tags)
+SAMPLE_OSM = dict(
+    bounds=(43.65, -79.40, 43.66, -79.38),
+    nodes=[
+        (1, 43.6501, -79.3901, None),
+        (2, 43.6502, -79.3899, None),
+        (3, 43.6512, -79.3898, None),
+        (4, 43.6511, -79.3902, {"amenity": "cafe", "name": "Café"}),
+        (5, 43.6550, -79.3850, {"highway": "traffic_signals"}),
+        (6, 43.6560, -79.3840, None),
+        (-7, 43.6570, -79.3830, None),
+        (8, 43.6515, -79.3901, None),
+        (9, 43.6518, -79.3899, None),
+    ],
+    ways=[
+        (100, [1, 2, 3, 4, 1], {"building": "yes", "height": "12"}),
+        (101, [5, 6, -7], {"highway": "residential", "name": "Front Street"}),
+        (102, [5, 6], {"highway": "service"}),
+        (103, [8, 9, 3, 8], None),
+        (104, [3, 8, 9, 3], {"building": "yes"}),
+    ],
+    relations=[
+        (200, [("way", 103, "outer"), ("node", 4, "")], {"type": "multipolygon", "landuse": "grass"}),
+        (201, [("way", 999, "outer")], {"type": "multipolygon", "natural": "water"}),
+        (202, [("way", 101, "")], {"type": "route", "route": "bus"}),
+    ],
+)
+
+
+def _xmlTags(tags):
+    return "".join('<tag k="%s" v="%s"/>' % item for item in (tags or {}).items())
+
+
+def writeOsmXml(path, data=SAMPLE_OSM):
+    minLat, minLon, maxLat, maxLon = data["bounds"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        f.write('<bounds minlat="%s" minlon="%s" maxlat="%s" maxlon="%s"/>\n' % (minLat, minLon, maxLat, maxLon))
+        for _id, lat, lon, tags in data["nodes"]:
+            f.write('<node id="%s" lat="%s" lon="%s">%s</node>\n' % (_id, lat, lon, _xmlTags(tags)))
+        for _id, refs, tags in data["ways"]:
+            f.write('<way id="%s">%s%s</way>\n' % (_id, "".join('<nd ref="%s"/>' % ref for ref in refs), _xmlTags(tags)))
+        for _id, members, tags in data["relations"]:
+            f.write('<relation id="%s">%s%s</relation>\n' % (
+                _id,
+                "".join('<member type="%s" ref="%s" role="%s"/>' % member for member in members),
+                _xmlTags(tags)
+            ))
+        f.write("</osm>\n")
+    return str(path)
+
+
+@pytest.fixture
+def blosmHome(tmp_path, monkeypatch):
+    """
+    A temporary home directory for the files kept in <~/.blosm> (tile cache, tile densities, endpoint health, ...)
+    """
+    from cash_cab_addon.route import endpoint_health, tile_cache, tile_density
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    # the shared instances are created again in the temporary home directory
+    monkeypatch.setattr(tile_cache, "_default_cache", None)
+    monkeypatch.setattr(tile_density, "_default_density", None)
+    monkeypatch.setattr(endpoint_health, "_default_tracker", None)
+    return home
+
+
+@pytest.fixture
+def sampleOsm():
+    return SAMPLE_OSM
+
+
+@pytest.fixture
+def sampleOsmFile(tmp_path):
+    """
+    The path to <SAMPLE_OSM> written as an OSM XML file
+    """
+    return writeOsmXml(tmp_path / "sample.osm")
+
+
+@pytest.fixture
+def writeOsm(tmp_path):
+    """
+    Returns a function writing OSM data in the format of <SAMPLE_OSM> to the file <name> in a temporary directory
+    """
+    return lambda name, data: writeOsmXml(tmp_path / name, data)
@@ -0,0 +1,118 @@
+"""
+Tests of <parse.osm.parallel>, run with pytest (see <conftest.py>)
+"""
+
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+from cash_cab_addon.parse.osm import parallel
+
+
+def increment(item):
+    return item + 1
+
+
+def incrementOrDie(item):
+    # a worker process exits abruptly, so the process pool gets broken;
+    # the item is processed normally in the calling process
+    if item == 0 and multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return item + 1
+
+
+def workerState(item):
+    # a spawned worker process doesn't inherit the modules of the calling process, e.g. <conftest>
+    return multiprocessing.parent_process() is not None, "conftest" in sys.modules
+
+
+def test_imapOrdered_keepsOrder():
+    assert list(parallel.imapOrdered(increment, range(20), 2, "test")) == list(range(1, 21))
+
+
+def test_imapOrdered_inProcess():
+    assert list(parallel.imapOrdered(increment, range(5), 0, "test")) == list(range(1, 6))
+
+
+def test_imapOrdered_spawnsWorkers():
+    assert set(parallel.imapOrdered(workerState, range(4), 2, "test")) == {(True, False)}
+
+
+def test_imapOrdered_brokenPool():
+    # no item may be lost when the process pool breaks
+    assert list(parallel.imapOrdered(incrementOrDie, range(6), 2, "test")) == list(range(1, 7))
+
+
+def test_splitFile(tmp_path):
+    filepath = tmp_path / "test.osm"
+    filepath.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n' +
+        '<bounds minlat="1" minlon="2" maxlat="3" maxlon="4"/>\n' +
+        "".join(
+            '<node id="%s" lat="1.5" lon="2.5"><tag k="n" v="%s"/></node>\n' % (i, i) for i in range(1, 31)
+        ) +
+        '<way id="100"><nd ref="1"/><nd ref="2"/><tag k="building" v="yes"/></way>\n' +
+        '<relation id="200"><member type="way" ref="100" role="outer"/><tag k="type" v="multipolygon"/></relation>\n' +
+        "</osm>\n"
+    )
+    whole = parallel.decodeTile(filepath.read_bytes())
+    tiles = [parallel.decodeTile(span) for span in parallel.splitFile(str(filepath), 4)]
+    assert len(tiles) == 4
+    assert list(whole.bounds) == [1., 2., 3., 4.]
+    assert sum((list(tile.kinds) for tile in tiles), []) == list(whole.kinds)
+    assert sum((list(tile.nodeIds) for tile in tiles), []) == list(range(1, 31))
+    assert list(tiles[-1].wayIds) == [100] and list(tiles[-1].wayRefs) == [1, 2]
+    assert tiles[-1].relations == [("200", [("way", "100", "outer")], {"type": "multipolygon"})]
+
+
+@pytest.mark.parametrize("workers", (0, 2))
+def test_parseTiles_matchesParse(makeOsm, sampleOsmFile, workers):
+    """
+    An OSM file decoded in chunks (in worker processes for <workers> > 0) gives the same result as a serial parse
+    """
+    osm, manager = makeOsm()
+    osm.parse(sampleOsmFile, workers=0)
+    parsed = manager.result(osm)
+
+    osm, manager = makeOsm()
+    osm.parseTiles(parallel.splitFile(sampleOsmFile, 5), workers=workers)
+    assert manager.result(osm) == parsed
+
+
+def test_parseTiles_overlappingTiles(makeOsm, sampleOsm, sampleOsmFile, writeOsm):
+    """
+    The elements repeated in overlapping tiles (e.g. Overpass tiles) are taken from their first occurrence
+    """
+    osm, manager = makeOsm()
+    osm.parse(sampleOsmFile, workers=0)
+    parsed = manager.result(osm)
+
+    # two tiles sharing the nodes of the building and the building itself
+    nodes = sampleOsm["nodes"]
+    ways = sampleOsm["ways"]
+    first = dict(sampleOsm, nodes=nodes[:7], ways=ways[:2], relations=[])
+    second = dict(sampleOsm, nodes=nodes[:4] + nodes[7:], ways=ways[:1] + ways[2:])
+    sources = []
+    for i, data in enumerate((first, second)):
+        with open(writeOsm("tile%s.osm" % i, data), "rb") as f:
+            sources.append(f.read())
+    osm, manager = makeOsm()
+    osm.parseTiles(sources, workers=0)
+    assert manager.result(osm) == parsed
+
+
+@pytest.mark.parametrize("parallelDecode", (False, True))
+def test_parseFile_parallelDecodeOptIn(makeOsm, sampleOsmFile, monkeypatch, parallelDecode):
+    """
+    Worker processes decode an OSM file only if <app.osmParallelDecode> is set
+    """
+    monkeypatch.setattr(parallel, "defaultWorkers", lambda size=None, minBytes=0: 2)
+    osm, manager = makeOsm(osmParallelDecode=parallelDecode)
+    chunked = []
+    parseTiles = osm.parseTiles
+    monkeypatch.setattr(osm, "parseTiles", lambda sources, **kwargs: (chunked.append(True), parseTiles(sources, **kwargs)))
+    osm.parseFile(sampleOsmFile)
+    assert bool(chunked) == parallelDecode
+    assert len(osm.ways) == 5
@@ -0,0 +1,241 @@
+"""
+Tests of the .osm.pbf reader <parse.osm.pbf>, run with pytest (see <conftest.py>).
+The PBF data is encoded here with a minimal protobuf writer.
+"""
+
+import lzma
+import struct
+import zlib
+
+import pytest
+
+from cash_cab_addon.parse.osm import pbf
+
+
+def varint(value):
+    if value < 0:
+        value += 1 << 64
+    out = bytearray()
+    while True:
+        b = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def intField(field, value):
+    return varint(field << 3) + varint(value)
+
+
+def bytesField(field, data):
+    return varint((field << 3) | 2) + varint(len(data)) + data
+
+
+def packed(field, values):
+    return bytesField(field, b"".join(varint(v) for v in values))
+
+
+def deltas(field, values):
+    previous = 0
+    coded = []
+    for value in values:
+        coded.append(zigzag(value - previous))
+        previous = value
+    return packed(field, coded)
+
+
+def blob(data, compression="zlib"):
+    if compression == "raw":
+        return bytesField(1, data)
+    if compression == "zlib":
+        return intField(2, len(data)) + bytesField(3, zlib.compress(data))
+    return intField(2, len(data)) + bytesField(4, lzma.compress(data))
+
+
+def fileBlob(blobType, data):
+    data = blob(data)
+    header = bytesField(1, blobType.encode()) + intField(3, len(data))
+    return struct.pack(">I", len(header)) + header + data
+
+
+class StringTable:
+
+    def __init__(self):
+        self.strings = [""]
+        self.indices = {}
+
+    def __call__(self, s):
+        if not s in self.indices:
+            self.indices[s] = len(self.strings)
+            self.strings.append(s)
+        return self.indices[s]
+
+    def encode(self):
+        return bytesField(1, b"".join(bytesField(1, s.encode()) for s in self.strings))
+
+
+def header(bounds=None, features=("OsmSchema-V0.6", "DenseNodes")):
+    data = b""
+    if bounds:
+        minLat, minLon, maxLat, maxLon = bounds
+        # left, right, top, bottom in nanodegrees
+        data += bytesField(1,
+            intField(1, zigzag(round(minLon * 1e9))) + intField(2, zigzag(round(maxLon * 1e9))) +
+            intField(3, zigzag(round(maxLat * 1e9))) + intField(4, zigzag(round(minLat * 1e9)))
+        )
+    return data + b"".join(bytesField(4, feature.encode()) for feature in features)
+
+
+def block(nodes=(), ways=(), relations=(), dense=True, granularity=100, latOffset=0, lonOffset=0):
+    """
+    An <OSMData> primitive block with the elements in the format of <pbf.decodeBlock(..)>
+    """
+    s = StringTable()
+    group = b""
+    if nodes:
+        if dense:
+            keysVals = []
+            for _, _, _, tags in nodes:
+                for k, v in (tags or {}).items():
+                    keysVals += (s(k), s(v))
+                keysVals.append(0)
+            group += bytesField(2,
+                deltas(1, [n[0] for n in nodes]) +
+                deltas(8, [round((n[1] * 1e9 - latOffset) / granularity) for n in nodes]) +
+                deltas(9, [round((n[2] * 1e9 - lonOffset) / granularity) for n in nodes]) +
+                packed(10, keysVals)
+            )
+        else:
+            for _id, lat, lon, tags in nodes:
+                tags = tags or {}
+                group += bytesField(1,
+                    intField(1, zigzag(_id)) +
+                    packed(2, [s(k) for k in tags]) + packed(3, [s(v) for v in tags.values()]) +
+                    intField(8, zigzag(round((lat * 1e9 - latOffset) / granularity))) +
+                    intField(9, zigzag(round((lon * 1e9 - lonOffset) / granularity)))
+                )
+    for _id, refs, tags in ways:
+        tags = tags or {}
+        group += bytesField(3,
+            intField(1, _id) +
+            packed(2, [s(k) for k in tags]) + packed(3, [s(v) for v in tags.values()]) +
+            deltas(8, refs)
+        )
+    for _id, members, tags in relations:
+        tags = tags or {}
+        group += bytesField(4,
+            intField(1, _id) +
+            packed(2, [s(k) for k in tags]) + packed(3, [s(v) for v in tags.values()]) +
+            packed(8, [s(role) for _, _, role in members]) +
+            deltas(9, [memberId for _, memberId, _ in members]) +
+            packed(10, [pbf.MEMBER_TYPES.index(memberType) for memberType, _, _ in members])
+        )
+    data = s.encode() + bytesField(2, group) + intField(17, granularity)
+    if latOffset:
+        data += intField(19, latOffset)
+    if lonOffset:
+        data += intField(20, lonOffset)
+    return data
+
+
+def writePbf(path, data):
+    with open(path, "wb") as f:
+        f.write(fileBlob("OSMHeader", header(data["bounds"])))
+        f.write(fileBlob("OSMData", block(nodes=data["nodes"])))
+        f.write(fileBlob("OSMData", block(ways=data["ways"], relations=data["relations"])))
+    return str(path)
+
+
+NODES = [
+    (10, 43.6532, -79.3832, None),
+    (-3, -33.8688, 151.2093, {"amenity": "cafe", "name": "Café"}),
+    (12, 0., 0., None),
+    (11, 89.9999999, -179.9999999, {"natural": "peak"}),
+]
+
+
+def test_decodeHeader():
+    bbox, required = pbf.decodeHeader(blob(header((43.65, -79.40, 43.66, -79.38))))
+    assert bbox == pytest.approx((43.65, -79.40, 43.66, -79.38))
+    assert required == ["OsmSchema-V0.6", "DenseNodes"]
+    assert pbf.decodeHeader(blob(header()))[0] is None
+
+
+@pytest.mark.parametrize("dense", (True, False))
+def test_decodeBlock_nodes(dense):
+    nodes, ways, relations = pbf.decodeBlock(blob(block(nodes=NODES, dense=dense)))
+    assert nodes == NODES
+    assert ways == [] and relations == []
+
+
+def test_decodeBlock_offsetsAndGranularity():
+    nodes, _, _ = pbf.decodeBlock(blob(block(
+        nodes=NODES[:2], granularity=1000, latOffset=40_000_000_000, lonOffset=-80_000_000_000
+    )))
+    assert [n[0] for n in nodes] == [10, -3]
+    assert [n[1:3] for n in nodes] == pytest.approx([n[1:3] for n in NODES[:2]])
+    assert nodes[1][3] == NODES[1][3]
+
+
+def test_decodeBlock_waysAndRelations():
+    ways = [(100, [1, 2, 3, 1], {"building": "yes"}), (101, [5, -7, 6], None)]
+    relations = [(200, [("way", 100, "outer"), ("node", -7, ""), ("relation", 201, "subarea")], {"type": "multipolygon"})]
+    _, decodedWays, decodedRelations = pbf.decodeBlock(blob(block(ways=ways, relations=relations)))
+    assert [(_id, list(refs), tags) for _id, refs, tags in decodedWays] == ways
+    assert decodedRelations == relations
+
+
+@pytest.mark.parametrize("compression", ("raw", "zlib", "lzma"))
+def test_blobCompression(compression):
+    assert pbf.decodeBlock(blob(block(nodes=NODES), compression))[0] == NODES
+
+
+def test_unsupportedCompression():
+    with pytest.raises(ValueError):
+        pbf.decodeBlock(intField(2, 10) + bytesField(5, b"\0" * 10))
+
+
+def test_PbfFile(tmp_path):
+    path = tmp_path / "test.osm.pbf"
+    with open(path, "wb") as f:
+        f.write(fileBlob("OSMHeader", header((1., 2., 3., 4.))))
+        f.write(fileBlob("OSMData", block(nodes=NODES)))
+        f.write(fileBlob("OSMData", block(ways=[(100, [10, 12], None)])))
+    pbfFile = pbf.PbfFile(str(path))
+    assert pbfFile.bbox == pytest.approx((1., 2., 3., 4.))
+    blocks = list(pbfFile.blocks(workers=0))
+    assert len(blocks) == 2
+    assert blocks[0][0] == NODES
+    assert [(_id, list(refs)) for _id, refs, _ in blocks[1][1]] == [(100, [10, 12])]
+
+
+def test_PbfFile_unsupportedFeature(tmp_path):
+    path = tmp_path / "test.osm.pbf"
+    path.write_bytes(fileBlob("OSMHeader", header(features=("OsmSchema-V0.6", "HistoricalInformation"))))
+    with pytest.raises(ValueError, match="HistoricalInformation"):
+        pbf.PbfFile(str(path))
+
+
+def test_PbfFile_truncated(tmp_path):
+    path = tmp_path / "test.osm.pbf"
+    path.write_bytes(fileBlob("OSMHeader", header()) + fileBlob("OSMData", block(nodes=NODES))[:-5])
+    with pytest.raises(ValueError, match="Truncated"):
+        list(pbf.PbfFile(str(path)).blocks(workers=0))
+
+
+def test_parsePbf_matchesXml(tmp_path, makeOsm, sampleOsm, sampleOsmFile):
+    """
+    The same OSM data parsed from a PBF file and from an XML file gives the same result
+    """
+    xmlOsm, xmlManager = makeOsm()
+    xmlOsm.parse(sampleOsmFile, workers=0)
+    pbfOsm, pbfManager = makeOsm()
+    pbfOsm.parse(writePbf(tmp_path / "sample.osm.pbf", sampleOsm), workers=0)
+    assert pbfManager.result(pbfOsm) == xmlManager.result(xmlOsm)
@@ -0,0 +1,101 @@
+"""
+Tests of the binary snapshots of parsed OSM files <parse.osm.snapshot>, run with pytest (see <conftest.py>)
+"""
+
+import os
+
+import pytest
+
+from cash_cab_addon.parse.osm import snapshot
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """
+    A temporary home directory, so the snapshots go to a temporary <~/.blosm/osm_snapshots>
+    """
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))
+    return home
+
+
+def recordSnapshot(makeOsm, filepath, path):
+    osm, manager = makeOsm()
+    osm.recorder = snapshot.SnapshotRecorder(osm)
+    osm.parse(filepath, workers=0)
+    osm.recorder.write(path)
+    osm.recorder = None
+    return manager.result(osm)
+
+
+def test_writeLoad(tmp_path, makeOsm, sampleOsmFile):
+    path = tmp_path / ("sample" + snapshot.SUFFIX)
+    recorded = recordSnapshot(makeOsm, sampleOsmFile, path)
+
+    osm, manager = makeOsm()
+    assert snapshot.load(osm, path)
+    osm.finishParse()
+    assert manager.result(osm) == recorded
+
+
+def test_replayMatchesParse(home, makeOsm, sampleOsmFile, capsys):
+    osm, manager = makeOsm()
+    osm.parse(sampleOsmFile, workers=0)
+    parsed = manager.result(osm)
+
+    osm, manager = makeOsm(osmSnapshots=True)
+    osm.parse(sampleOsmFile, workers=0)
+    assert manager.result(osm) == parsed
+    assert len(list(snapshot.getSnapshotDir().glob("*" + snapshot.SUFFIX))) == 1
+    capsys.readouterr()
+
+    osm, manager = makeOsm(osmSnapshots=True)
+    osm.parse(sampleOsmFile, workers=0)
+    assert "Loaded the OSM snapshot" in capsys.readouterr().out
+    assert manager.result(osm) == parsed
+
+
+def test_snapshotPath(home, tmp_path, makeOsm, sampleOsmFile):
+    osm, _ = makeOsm()
+    path = snapshot.getSnapshotPath(sampleOsmFile, osm)
+    assert snapshot.getSnapshotPath(sampleOsmFile, makeOsm()[0]) == path
+
+    # other conditions
+    osm.addCondition(lambda tags, e: "waterway" in tags, "waterways", None)
+    assert snapshot.getSnapshotPath(sampleOsmFile, osm) != path
+
+    # other contents of the file
+    with open(sampleOsmFile, "a") as f:
+        f.write("\n")
+    assert snapshot.getSnapshotPath(sampleOsmFile, makeOsm()[0]) != path
+
+
+def test_loadRejectsInvalidFiles(tmp_path, makeOsm, sampleOsmFile):
+    path = tmp_path / ("sample" + snapshot.SUFFIX)
+    recordSnapshot(makeOsm, sampleOsmFile, path)
+    data = path.read_bytes()
+    invalid = {
+        "empty": b"",
+        "other": b"<osm></osm>",
+        "magic": snapshot.MAGIC,
+        "header": data[:len(snapshot.MAGIC) + 10],
+        "sections": data[:len(data) // 2],
+        "version": data.replace(b'"version": %d' % snapshot.VERSION, b'"version": %d' % (snapshot.VERSION + 1)),
+    }
+    for name, contents in invalid.items():
+        path.write_bytes(contents)
+        osm, manager = makeOsm()
+        assert snapshot.load(osm, path) is False, name
+        assert not osm.ways and not manager.log, name
+
+
+def test_pruneSnapshots(home):
+    snapshotDir = snapshot.getSnapshotDir()
+    for i in range(5):
+        path = snapshotDir / ("%s%s" % (i, snapshot.SUFFIX))
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+    snapshot.pruneSnapshots(keep=2)
+    assert sorted(p.name for p in snapshotDir.iterdir()) == ["3" + snapshot.SUFFIX, "4" + snapshot.SUFFIX]
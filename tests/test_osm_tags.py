@@ -0,0 +1,81 @@
+"""
+Tests of the interned tags of OSM elements <parse.osm.tags>, run with pytest (see <conftest.py>)
+"""
+
+from cash_cab_addon.parse.osm.tags import TagTable, Tags
+
+
+def test_wrap():
+    table = TagTable()
+    tags = table.wrap({"building": "yes", "height": "12", "id": "100"})
+    assert isinstance(tags, Tags)
+    assert tags == {"building": "yes", "height": "12", "id": "100"}
+    assert tags["id"] == "100" and tags.get("id") == "100" and "id" in tags
+    assert sorted(tags) == ["building", "height", "id"]
+    assert len(tags) == 3
+    assert not "id" in tags.shared
+
+
+def test_sharing():
+    table = TagTable()
+    # equal strings that aren't the same objects
+    value = "".join(("y", "es"))
+    tags1 = table.wrap({"building": "yes", "id": "1"})
+    tags2 = table.wrap({"building": value, "id": "2"})
+    tags3 = table.wrap({"building": "no", "id": "3"})
+    assert tags1.shared is tags2.shared
+    assert tags1.shared is not tags3.shared
+    assert tags1["id"] == "1" and tags2["id"] == "2"
+    keys = [next(iter(tags.shared)) for tags in (tags1, tags3)]
+    assert keys[0] is keys[1]
+
+
+def test_withoutId():
+    tags = TagTable().wrap({"amenity": "cafe"})
+    assert tags.id is None
+    assert not "id" in tags
+    assert tags.get("id") is None
+    assert list(tags) == ["amenity"] and len(tags) == 1
+    assert dict(tags.items()) == {"amenity": "cafe"}
+
+
+def test_setitem():
+    table = TagTable()
+    tags1 = table.wrap({"building": "yes", "id": "1"})
+    tags2 = table.wrap({"building": "yes", "id": "2"})
+    shared = dict(tags1.shared)
+
+    tags1["height"] = "6"
+    tags1["building"] = "house"
+    assert tags1 == {"building": "house", "height": "6", "id": "1"}
+    assert len(tags1) == 3
+    assert sorted(tags1.items()) == [("building", "house"), ("height", "6"), ("id", "1")]
+    # the other element with the same tags and the shared dictionary are unchanged
+    assert tags2 == {"building": "yes", "id": "2"}
+    assert tags1.shared == shared
+
+    tags2["id"] = "20"
+    assert tags2["id"] == "20" and tags2.own is None
+
+
+def test_keep():
+    table = TagTable(keep=frozenset(("building", "height")))
+    tags = table.wrap({"building": "yes", "source": "survey", "note": "x", "id": "1"})
+    assert tags == {"building": "yes", "id": "1"}
+    # the tags differing only in the dropped keys share the dictionary
+    assert table.wrap({"building": "yes", "id": "2"}).shared is tags.shared
+
+
+def test_osmDropUnusedTags(makeOsm, sampleOsmFile):
+    osm, manager = makeOsm()
+    osm.parse(sampleOsmFile, workers=0)
+    assert osm.ways["101"].tags == {"highway": "residential", "name": "Front Street", "id": "101"}
+
+    osm, manager = makeOsm(osmDropUnusedTags=True)
+    osm.parse(sampleOsmFile, workers=0)
+    assert isinstance(osm.ways["100"].tags, Tags)
+    # <name> is one of the used keys, <height> too
+    assert osm.ways["100"].tags == {"building": "yes", "height": "12", "id": "100"}
+    # the keys of the conditions are kept
+    assert osm.ways["102"].tags == {"highway": "service", "id": "102"}
+    assert osm.nodes[4].tags == {"amenity": "cafe", "name": "Café"}
@@ -0,0 +1,65 @@
+"""
+Tests of <route.endpoint_health>, run with pytest (see <conftest.py>)
+"""
+
+from cash_cab_addon.route.endpoint_health import EndpointHealth
+
+
+SERVERS = ("https://a.example", "https://b.example", "https://c.example")
+
+
+def test_choose_fastest(tmp_path):
+    health = EndpointHealth(tmp_path / "health.json")
+    for _ in range(3):
+        health.record_success(SERVERS[0], 4.)
+        health.record_success(SERVERS[1], 0.5)
+        health.record_success(SERVERS[2], 1.)
+    assert health.choose(SERVERS) == SERVERS[1]
+    # the endpoints already tried for a request are skipped until all of them were tried
+    assert health.choose(SERVERS, exclude=SERVERS[1:2]) == SERVERS[2]
+    assert health.choose(SERVERS, exclude=SERVERS) == SERVERS[1]
+
+
+def test_choose_avoidsErrors(tmp_path):
+    health = EndpointHealth(tmp_path / "health.json")
+    for _ in range(5):
+        health.record_success(SERVERS[0], 1.)
+        health.record_failure(SERVERS[1], 0.5)
+    assert health.choose(SERVERS[:2]) == SERVERS[0]
+
+
+def test_choose_triesUnknownEndpoint(tmp_path):
+    # an endpoint without samples is assumed to be reasonably fast
+    health = EndpointHealth(tmp_path / "health.json")
+    health.record_success(SERVERS[0], 10.)
+    assert health.choose(SERVERS[:2]) == SERVERS[1]
+
+
+def test_acquire_spreadsRequests(tmp_path):
+    health = EndpointHealth(tmp_path / "health.json")
+    for server in SERVERS:
+        health.record_success(server, 1.)
+    acquired = [health.acquire(SERVERS) for _ in SERVERS]
+    assert sorted(acquired) == sorted(SERVERS)
+    for server in acquired:
+        health.end_request(server)
+    assert health.summary()[SERVERS[0]]["expected_s"] == health.expected_completion_s(SERVERS[0])
+
+
+def test_defer_retryAfter(tmp_path):
+    health = EndpointHealth(tmp_path / "health.json")
+    health.record_success(SERVERS[0], 0.5)
+    health.record_success(SERVERS[1], 1.)
+    health.defer(SERVERS[0], 60.)
+    assert health.choose(SERVERS[:2]) == SERVERS[1]
+    # a politeness delay of the caller counts as well
+    assert health.choose(SERVERS[1:], wait_s={SERVERS[1]: 30.}) == SERVERS[2]
+
+
+def test_save_load(tmp_path):
+    path = tmp_path / "health.json"
+    health = EndpointHealth(path, stale_s=3600.)
+    health.record_success(SERVERS[0], 0.5)
+    health.record_success(SERVERS[1], 2.)
+    health.save()
+    assert EndpointHealth(path, stale_s=3600.).choose(SERVERS[:2]) == SERVERS[0]
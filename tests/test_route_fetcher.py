@@ -0,0 +1,434 @@
+"""
+Tests of <route.utils.OverpassFetcher> against a fake Overpass API, run with pytest (see <conftest.py>)
+"""
+
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cash_cab_addon.parse.osm import parallel
+from cash_cab_addon.route import utils
+from cash_cab_addon.route.utils import OverpassFetcher, OverpassQueryTooLarge, RouteServiceError
+
+
+# a bbox covering a row of three grid tiles
+SOUTH, WEST = 43.651, -79.400
+NORTH, EAST = 43.655, -79.352
+
+
+class FakeOverpass:
+    """
+    Answers Overpass queries from a lattice of buildings and east-west roads,
+    returning the ways with a node inside the bbox of the query together with all their nodes,
+    like the queries of <OverpassFetcher> do
+    """
+
+    step = 0.003
+
+    def __init__(self, south=SOUTH - 0.02, west=WEST - 0.02, north=NORTH + 0.02, east=EAST + 0.02):
+        self.nodes = {}
+        self.buildings = {}
+        self.roads = {}
+        # the bboxes of the queries answered and the servers they were sent to
+        self.requests = []
+        self.servers = []
+        # a function raising an exception for the bbox of a query
+        self.fail = None
+        self.lock = threading.Lock()
+        rows = int((north - south) / self.step)
+        cols = int((east - west) / self.step)
+        for row in range(rows):
+            lat = south + row * self.step
+            for col in range(cols):
+                lon = west + col * self.step
+                base = 10 * (row * cols + col) + 1
+                refs = []
+                for i, (dlat, dlon) in enumerate(((0., 0.), (0., .001), (.001, .001), (.001, 0.))):
+                    self.nodes[base + i] = (lat + dlat, lon + dlon)
+                    refs.append(base + i)
+                self.buildings[base] = refs + refs[:1]
+            # a road along the row made of one node per building, crossing the grid tiles
+            self.roads[100000 + row] = [10 * (row * cols + col) + 1 for col in range(cols)]
+
+    def answer(self, server, query):
+        south, west, north, east = (float(coord) for coord in re.search(
+            r"\(([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+)\)", query
+        ).groups())
+        bbox = (south, west, north, east)
+        with self.lock:
+            self.requests.append(bbox)
+            self.servers.append(server)
+        if self.fail:
+            self.fail(bbox)
+        ways = {}
+        if "building" in query:
+            ways.update(self.buildings)
+        if "highway" in query:
+            ways.update(self.roads)
+        ways = {
+            _id: refs for _id, refs in ways.items()
+            if any(south <= self.nodes[ref][0] <= north and west <= self.nodes[ref][1] <= east for ref in refs)
+        }
+        nodeIds = sorted(set(ref for refs in ways.values() for ref in refs))
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">' +
+            "".join('<node id="%s" lat="%.7f" lon="%.7f"/>' % ((_id,) + self.nodes[_id]) for _id in nodeIds) +
+            "".join(
+                '<way id="%s">%s<tag k="%s" v="%s"/></way>' % (
+                    (_id, "".join('<nd ref="%s"/>' % ref for ref in refs)) +
+                    (("building", "yes") if _id in self.buildings else ("highway", "residential"))
+                )
+                for _id, refs in sorted(ways.items())
+            ) +
+            "</osm>"
+        ).encode("utf-8")
+
+
+@pytest.fixture
+def overpass(monkeypatch, blosmHome):
+    return patchOverpass(monkeypatch, FakeOverpass())
+
+
+def patchOverpass(monkeypatch, fake):
+    monkeypatch.setattr(OverpassFetcher, "_request_overpass", lambda fetcher, server, query: fake.answer(server, query))
+    return fake
+
+
+def makeFetcher(**kwargs):
+    kwargs.setdefault("min_interval_ms", 0)
+    kwargs.setdefault("max_retries", 0)
+    return OverpassFetcher("test", True, True, **kwargs)
+
+
+def readIds(filepath):
+    """
+    The sets of the ids of the nodes and ways of an OSM file, a merged file has no duplicates
+    """
+    root = ET.parse(filepath).getroot()
+    nodes = [int(e.get("id")) for e in root.iter("node")]
+    ways = [int(e.get("id")) for e in root.iter("way")]
+    assert len(set(nodes)) == len(nodes) and len(set(ways)) == len(ways)
+    return set(nodes), set(ways)
+
+
+def gridTiles():
+    return utils._tiles_for_bbox(SOUTH, WEST, NORTH, EAST)
+
+
+def test_gridTiles():
+    assert len(gridTiles()) == 3
+
+
+def test_concurrentFetch_matchesSerial(overpass, monkeypatch, tmp_path):
+    """
+    Tiles downloaded concurrently from several servers are merged in tile order, whatever order they arrive in
+    """
+    from cash_cab_addon.route import tile_density
+    # the densities recorded by one fetch would merge the tiles of the next one
+    monkeypatch.setattr(tile_density, "get_default_density", lambda: None)
+    tiles = gridTiles()
+    # the first tile arrives last
+    overpass.fail = lambda bbox: time.sleep(0.2 if bbox[1] < tiles[1][1] - 1e-9 else 0.)
+    makeFetcher(use_cache=False, max_workers=3).write_tiles(str(tmp_path / "concurrent.osm"), tiles)
+    assert len(set(overpass.servers)) > 1
+
+    overpass.fail = None
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "serial.osm"), tiles)
+    assert (tmp_path / "concurrent.osm").read_bytes() == (tmp_path / "serial.osm").read_bytes()
+    readIds(tmp_path / "concurrent.osm")
+
+
+@pytest.mark.parametrize("decode", (False, True))
+def test_iterWrite_matchesWrite(overpass, makeOsm, tmp_path, decode):
+    """
+    Parsing the tiles while the next ones download gives the same result as parsing the merged file,
+    also if the tiles are decoded on the downloading thread first as in the background import
+    """
+    fetcher = makeFetcher(tiles=gridTiles(), use_cache=False, max_workers=2)
+    tileStream = fetcher.iter_write(str(tmp_path / "streamed.osm"), SOUTH, WEST, NORTH, EAST)
+    if decode:
+        tileStream = [parallel.decodeElements(elements) for elements in tileStream]
+    osm, manager = makeOsm()
+    osm.parseStream(tileStream)
+    streamed = manager.result(osm)
+    assert len(osm.ways) > 0
+
+    osm, manager = makeOsm()
+    osm.parseFile(str(tmp_path / "streamed.osm"), workers=0)
+    assert streamed == manager.result(osm)
+
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "merged.osm"), gridTiles())
+    assert readIds(tmp_path / "streamed.osm") == readIds(tmp_path / "merged.osm")
+
+
+def test_layerToggle_fetchesMissingLayer(overpass, tmp_path):
+    """
+    Enabling a layer after an import downloads only that layer, the others come from the tile cache
+    """
+    tiles = gridTiles()
+    makeFetcher().write_tiles(str(tmp_path / "first.osm"), tiles)
+    assert len(overpass.requests) == 2 * len(tiles)
+
+    overpass.requests.clear()
+    fetcher = makeFetcher(include_water=True)
+    fetcher.write_tiles(str(tmp_path / "water.osm"), tiles)
+    assert len(overpass.requests) == len(tiles)
+    assert (fetcher.cache_hits, fetcher.cache_misses) == (2 * len(tiles), len(tiles))
+    assert readIds(tmp_path / "water.osm") == readIds(tmp_path / "first.osm")
+
+
+def test_resume_skipsSavedTiles(overpass, tmp_path):
+    """
+    A download failing part-way is resumed from the tiles saved in its checkpoint
+    """
+    from cash_cab_addon.route import checkpoint
+    tiles = gridTiles()
+    root = tmp_path / "checkpoints"
+
+    def fail(bbox):
+        if bbox[1] >= tiles[1][1] - 1e-9:
+            raise RouteServiceError("Overpass HTTP error 504")
+    overpass.fail = fail
+    fetcher = makeFetcher(use_cache=False, checkpoint=checkpoint.TileCheckpoint("job", root=root))
+    with pytest.raises(RouteServiceError):
+        fetcher.write_tiles(str(tmp_path / "resumed.osm"), tiles)
+    assert checkpoint.TileCheckpoint("job", root=root).count() == 2
+
+    overpass.fail = None
+    overpass.requests.clear()
+    fetcher = makeFetcher(use_cache=False, checkpoint=checkpoint.TileCheckpoint("job", root=root))
+    fetcher.write_tiles(str(tmp_path / "resumed.osm"), tiles)
+    assert fetcher.resumed_tiles == 1
+    assert sorted(overpass.requests) == sorted(tiles[1:] * 2)
+    assert not root.joinpath("job").exists()
+
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "whole.osm"), tiles)
+    assert readIds(tmp_path / "resumed.osm") == readIds(tmp_path / "whole.osm")
+
+
+def test_plan_storesMergedRunPerGridTile(overpass, tmp_path):
+    """
+    A run of sparse grid tiles fetched with one request is found in the tile cache by a route covering one of them
+    """
+    tiles = gridTiles()
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "first.osm"), tiles)
+    assert len(overpass.requests) == 2 * len(tiles)
+
+    # the densities seen by the first import make the grid tiles sparse, so they are merged
+    overpass.requests.clear()
+    makeFetcher().write_tiles(str(tmp_path / "merged.osm"), tiles)
+    assert len(overpass.requests) == 2
+    assert readIds(tmp_path / "merged.osm") == readIds(tmp_path / "first.osm")
+
+    overpass.requests.clear()
+    fetcher = makeFetcher()
+    fetcher.write_tiles(str(tmp_path / "middle.osm"), tiles[1:2])
+    assert overpass.requests == []
+    assert fetcher.cache_hits == 2
+
+
+def test_plan_mergesRunsWithinRows(blosmHome):
+    """
+    Runs of sparse neighbouring tiles are merged within a grid row, up to <overpass_merge_max_tiles> tiles
+    """
+    from cash_cab_addon.route import tile_density
+    from cash_cab_addon.route.config import DEFAULT_CONFIG
+    # two rows of more tiles than can be merged into one request
+    tiles = utils._tiles_for_bbox(SOUTH, WEST, SOUTH + 0.02, WEST + 0.2)
+    rows = sorted(set(utils._tile_key(tile)[0] for tile in tiles))
+    assert len(rows) == 2
+    # a tile without known density is requested on its own and breaks the run
+    unknown = tiles[2]
+    density = tile_density.get_default_density()
+    for tile in tiles:
+        if tile != unknown:
+            for layer in ("buildings", "roads"):
+                density.record([utils._tile_key(tile)], layer, 1.)
+
+    requests = makeFetcher(use_cache=False)._plan_requests(tiles)
+    assert [tile for request in requests for tile in request.tiles] == tiles
+    mergeMax = DEFAULT_CONFIG.api.overpass_merge_max_tiles
+    for request in requests:
+        assert len(request.tiles) <= mergeMax and not request.split
+        assert len(set(utils._tile_key(tile)[0] for tile in request.tiles)) == 1
+        assert request.bbox == (
+            request.tiles[0][0], request.tiles[0][1], request.tiles[-1][2], request.tiles[-1][3]
+        )
+    assert [request.tiles for request in requests if unknown in request.tiles] == [(unknown,)]
+    assert any(len(request.tiles) == mergeMax for request in requests)
+
+
+def test_plan_splitsDenseTile(overpass, monkeypatch, tmp_path):
+    """
+    A grid tile known to be dense is fetched as quadrants, it's recorded, cached and checkpointed as a single tile
+    """
+    from cash_cab_addon.route import checkpoint, tile_density
+    tiles = gridTiles()
+    density = tile_density.get_default_density()
+    dense = 1e9
+    density.record([utils._tile_key(tiles[0])], "buildings", dense)
+    density.record([utils._tile_key(tiles[0])], "roads", dense)
+    samples = []
+    record = density.record
+    monkeypatch.setattr(density, "record", lambda keys, layer, value: (samples.append(list(keys)), record(keys, layer, value)))
+
+    tileCheckpoint = checkpoint.TileCheckpoint("test", root=tmp_path / "checkpoints")
+    saved = []
+    save = tileCheckpoint.save
+    monkeypatch.setattr(tileCheckpoint, "save", lambda tile, layer, payload: (saved.append(tile), save(tile, layer, payload)))
+
+    fetcher = makeFetcher(checkpoint=tileCheckpoint)
+    requests = fetcher._plan_requests(tiles)
+    assert [request.split for request in requests] == [True, False, False]
+    fetcher.write_tiles(str(tmp_path / "split.osm"), tiles)
+    # 4 quadrants of the first tile and 2 other tiles for 2 layers
+    assert len(overpass.requests) == 2 * 6
+    assert samples == [[utils._tile_key(tile)] for tile in tiles for _ in range(2)]
+    assert saved == [tile for tile in tiles for _ in range(2)]
+    assert all(fetcher._is_stored(tile) for tile in tiles)
+    assert len(fetcher._tile_cache._entries) == 2 * len(tiles)
+
+    overpass.requests.clear()
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "whole.osm"), tiles)
+    assert readIds(tmp_path / "split.osm") == readIds(tmp_path / "whole.osm")
+
+
+def test_tooLargeQuery_splitsTile(overpass, monkeypatch, tmp_path):
+    """
+    A query reported as too large by Overpass is split into quadrants, only the tile is recorded and stored
+    """
+    from cash_cab_addon.route import tile_density
+    tiles = gridTiles()[:1]
+    tileHeight = tiles[0][2] - tiles[0][0]
+
+    def fail(bbox):
+        if bbox[2] - bbox[0] > 0.6 * tileHeight:
+            raise OverpassQueryTooLarge("runtime error: Query timed out")
+    overpass.fail = fail
+
+    density = tile_density.get_default_density()
+    samples = []
+    record = density.record
+    monkeypatch.setattr(density, "record", lambda keys, layer, value: (samples.append(list(keys)), record(keys, layer, value)))
+
+    fetcher = makeFetcher()
+    fetcher.write_tiles(str(tmp_path / "split.osm"), tiles)
+    assert len(overpass.requests) == 2 * 5
+    assert samples == [[utils._tile_key(tiles[0])]] * 2
+    assert len(fetcher._tile_cache._entries) == 2
+
+    overpass.fail = None
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "whole.osm"), tiles)
+    assert readIds(tmp_path / "split.osm") == readIds(tmp_path / "whole.osm")
+
+
+def test_resume_afterPlanChange(overpass, tmp_path):
+    """
+    The tiles saved by a failed download are reused by the next attempt even though the densities
+    recorded by the failed download change the plan of the requests
+    """
+    from cash_cab_addon.route import checkpoint, tile_density
+    tiles = gridTiles()
+    root = tmp_path / "checkpoints"
+    # the first two tiles are expected to be dense, so they are fetched as quadrants
+    density = tile_density.get_default_density()
+    for tile in tiles[:2]:
+        for layer in ("buildings", "roads"):
+            density.record([utils._tile_key(tile)], layer, 1e9)
+
+    def fail(bbox):
+        if bbox[1] >= tiles[2][1] - 1e-9:
+            raise RouteServiceError("Overpass HTTP error 504")
+    overpass.fail = fail
+    fetcher = makeFetcher(use_cache=False, checkpoint=checkpoint.TileCheckpoint("job", root=root))
+    with pytest.raises(RouteServiceError):
+        fetcher.write_tiles(str(tmp_path / "resumed.osm"), tiles)
+    assert len(overpass.requests) == 2 * 8 + 1
+
+    # the densities recorded by the failed download no longer split the first two tiles
+    overpass.fail = None
+    overpass.requests.clear()
+    fetcher = makeFetcher(use_cache=False, checkpoint=checkpoint.TileCheckpoint("job", root=root))
+    assert not any(request.split for request in fetcher._plan_requests(tiles))
+    fetcher.write_tiles(str(tmp_path / "resumed.osm"), tiles)
+    assert fetcher.resumed_tiles == 2
+    assert overpass.requests == [tiles[2]] * 2
+
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "whole.osm"), tiles)
+    assert readIds(tmp_path / "resumed.osm") == readIds(tmp_path / "whole.osm")
+
+
+def test_excludeIds_extendsMap(overpass, tmp_path):
+    """
+    Extending a map downloads only the ways missing from it; the ids kept in the scene survive packing
+    """
+    tiles = gridTiles()
+    fetcher = makeFetcher(use_cache=False)
+    fetcher.write_tiles(str(tmp_path / "map.osm"), tiles[:2])
+    packed = {kind: utils.pack_osm_ids(ids) for kind, ids in fetcher.merged_ids.items()}
+    known = {kind: utils.unpack_osm_ids(value) for kind, value in packed.items()}
+    assert known == fetcher.merged_ids and known["way"]
+
+    extension = makeFetcher(use_cache=False, exclude_ids=known)
+    extension.write_tiles(str(tmp_path / "extension.osm"), tiles[1:])
+    _, ways = readIds(tmp_path / "extension.osm")
+    assert ways and not ways & known["way"]
+    assert extension.merged_ids["way"] == known["way"] | ways
+    assert utils.unpack_osm_ids("not packed") == set()
+
+
+def writeExtract(fake, filepath, bounds):
+    """
+    Writes the area <bounds> of <fake> as an OSM extract, with a way and a node no layer asks for
+    """
+    world = fake.answer(None, "building highway (%s,%s,%s,%s)" % bounds).decode("utf-8")
+    head, body = world.split('<osm version="0.6">')
+    filepath.write_text(
+        head + '<osm version="0.6"><bounds minlat="%s" minlon="%s" maxlat="%s" maxlon="%s"/>' % bounds +
+        '<node id="999999" lat="%s" lon="%s"><tag k="amenity" v="bench"/></node>' % bounds[:2] +
+        body.replace("</osm>", '<way id="999999"><nd ref="1"/><nd ref="2"/><tag k="barrier" v="fence"/></way></osm>'),
+        encoding="utf-8"
+    )
+    return filepath
+
+
+def test_cityPack_matchesOverpass(monkeypatch, blosmHome, tmp_path):
+    """
+    A city pack built from a local extract answers the tiles inside it like Overpass, without any request
+    """
+    from cash_cab_addon.route import city_pack
+    tiles = gridTiles()
+    bounds = (
+        min(tile[0] for tile in tiles) - 0.01, min(tile[1] for tile in tiles) - 0.01,
+        max(tile[2] for tile in tiles) + 0.01, max(tile[3] for tile in tiles) + 0.01
+    )
+    # the lattice is shifted off the tile edges, the extract has rounded coordinates
+    overpass = patchOverpass(monkeypatch, FakeOverpass(*(coord + 0.0005 for coord in bounds)))
+    extract = writeExtract(overpass, tmp_path / "city.osm", bounds)
+    packPath = city_pack.build_city_pack(extract, log=lambda message: None)
+    assert packPath == tmp_path / ("city" + city_pack.PACK_SUFFIX)
+    pack = city_pack.CityPack(packPath)
+    assert pack.bounds == bounds
+    # the bench and the fence aren't in any layer
+    assert pack.counts == {
+        "node": len(overpass.nodes), "way": len(overpass.buildings) + len(overpass.roads), "relation": 0
+    }
+    assert pack.covers(tiles[0]) and not pack.covers((bounds[0] - 0.1,) + bounds[1:])
+
+    for layer, query in (("buildings", "building"), ("roads", "highway")):
+        for tile in tiles:
+            packed = ET.fromstring(pack.query(layer, tile))
+            live = ET.fromstring(overpass.answer(None, "%s (%s,%s,%s,%s)" % ((query,) + tile)))
+            for kind in ("node", "way"):
+                assert [e.get("id") for e in packed.iter(kind)] == [e.get("id") for e in live.iter(kind)]
+
+    overpass.requests.clear()
+    fetcher = makeFetcher(use_cache=False, city_pack=pack)
+    fetcher.write_tiles(str(tmp_path / "packed.osm"), tiles)
+    assert overpass.requests == []
+    makeFetcher(use_cache=False).write_tiles(str(tmp_path / "live.osm"), tiles)
+    assert readIds(tmp_path / "packed.osm") == readIds(tmp_path / "live.osm")
+    pack.close()
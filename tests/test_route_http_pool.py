@@ -0,0 +1,107 @@
+"""
+Tests of <route.http_pool> against a local HTTP server, run with pytest (see <conftest.py>)
+"""
+
+import gzip
+import threading
+from http.client import IncompleteRead
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import error
+
+import pytest
+
+from cash_cab_addon.route.http_pool import HTTPPool
+
+
+BODY = b'<?xml version="1.0" encoding="UTF-8"?><osm version="0.6">' + b'<node id="1" lat="43.65" lon="-79.38"/>' * 2000 + b"</osm>"
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        compressed = gzip.compress(BODY)
+        if self.path == "/plain":
+            self.send(200, BODY)
+        elif self.path == "/gzip":
+            assert "gzip" in self.headers.get("Accept-Encoding", "")
+            self.send(200, compressed, {"Content-Encoding": "gzip"})
+        elif self.path == "/gzip-truncated":
+            # a complete HTTP response carrying an incomplete gzip stream
+            self.send(200, compressed[:len(compressed) // 2], {"Content-Encoding": "gzip"})
+        elif self.path == "/closed-early":
+            # the connection is closed before the announced length was sent
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY[:len(BODY) // 2])
+            self.close_connection = True
+        else:
+            self.send(404, b"not found")
+
+    def send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%s" % httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_gzip(server):
+    pool = HTTPPool()
+    response = pool.request("GET", server + "/gzip")
+    assert response.data == BODY
+    assert response.transferred < len(BODY) / 5
+    stats = pool.stats()
+    assert (stats["bytes_transferred"], stats["bytes_decoded"]) == (response.transferred, len(BODY))
+
+
+def test_keepAlive(server):
+    pool = HTTPPool()
+    for path in ("/plain", "/gzip", "/plain"):
+        pool.request("GET", server + path)
+    assert pool.stats()["connections_opened"] == 1
+    assert pool.stats()["requests"] == 3
+    pool.close()
+    assert pool.stats()["idle"] == 0
+
+
+def test_noKeepAlive(server):
+    pool = HTTPPool(max_idle_per_host=0)
+    for _ in range(2):
+        assert pool.request("GET", server + "/plain").data == BODY
+    assert pool.stats()["connections_opened"] == 2
+
+
+@pytest.mark.parametrize("path", ("/gzip-truncated", "/closed-early"))
+def test_truncatedBody(server, path):
+    pool = HTTPPool()
+    with pytest.raises(IncompleteRead):
+        pool.request("GET", server + path)
+    # the broken connection isn't reused
+    assert pool.stats()["idle"] == 0
+    assert pool.request("GET", server + "/plain").data == BODY
+
+
+def test_httpError(server):
+    with pytest.raises(error.HTTPError) as info:
+        HTTPPool().request("GET", server + "/missing")
+    assert info.value.code == 404
+    assert info.value.read() == b"not found"
@@ -0,0 +1,93 @@
+"""
+Tests of <route.service_cache>, run with pytest (see <conftest.py>)
+"""
+
+import json
+import types
+
+import pytest
+
+from cash_cab_addon.route import service_cache
+from cash_cab_addon.route.service_cache import GEOCODE, ROUTE, ServiceCache
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.
+
+    def time(self):
+        self.now += 1.
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(service_cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_keys():
+    assert service_cache.make_geocode_key("  100 Queen St W,Toronto ", "CA") == \
+        service_cache.make_geocode_key("100 queen st w, toronto", "ca")
+    server = "https://router.project-osrm.org"
+    # coordinates are rounded to about a meter
+    assert service_cache.make_route_key(server, [(43.653201, -79.383202), (43.6426, -79.3871)]) == \
+        service_cache.make_route_key(server, [(43.6532012, -79.3832018), (43.6426, -79.3871)])
+    assert service_cache.make_route_key(server, [(43.6532, -79.3832), (43.6426, -79.3871)]) != \
+        service_cache.make_route_key(server, [(43.6426, -79.3871), (43.6532, -79.3832)])
+
+
+def test_putGet(tmp_path, clock):
+    cache = ServiceCache(tmp_path / "cache.json")
+    assert cache.get(GEOCODE, "a") is None
+    cache.put(GEOCODE, "a", {"lat": 43.65, "lon": -79.38})
+    assert cache.get(GEOCODE, "a") == {"lat": 43.65, "lon": -79.38}
+    # the namespaces are separate
+    assert cache.get(ROUTE, "a") is None
+    assert cache.stats()[GEOCODE] == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_lruEviction(tmp_path, clock):
+    cache = ServiceCache(tmp_path / "cache.json", max_entries=2)
+    cache.put(GEOCODE, "a", {})
+    cache.put(GEOCODE, "b", {})
+    # "a" becomes the most recently used entry, so "b" is evicted
+    cache.get(GEOCODE, "a")
+    cache.put(GEOCODE, "c", {})
+    assert [key for key in "abc" if cache.get(GEOCODE, key) is not None] == ["a", "c"]
+
+
+def test_ttlExpiry(tmp_path, clock):
+    cache = ServiceCache(tmp_path / "cache.json", ttl_s={GEOCODE: 10.})
+    cache.put(GEOCODE, "a", {})
+    cache.put(ROUTE, "a", {})
+    clock.now += 10.
+    assert cache.get(GEOCODE, "a") is None
+    # a namespace without a time-to-live keeps its entries
+    assert cache.get(ROUTE, "a") == {}
+
+
+def test_flush(tmp_path, clock):
+    path = tmp_path / "cache.json"
+    cache = ServiceCache(path)
+    cache.put(ROUTE, "a", {"distance": 1200.})
+    assert not path.exists()
+    cache.flush()
+    assert ServiceCache(path).get(ROUTE, "a") == {"distance": 1200.}
+    assert json.loads(path.read_text(encoding="utf-8"))["version"] == "1.0"
+
+
+def test_invalidateClear(tmp_path, clock):
+    path = tmp_path / "cache.json"
+    cache = ServiceCache(path)
+    for key in "ab":
+        cache.put(GEOCODE, key, {})
+    cache.put(ROUTE, "a", {})
+    assert cache.invalidate(GEOCODE, "a")
+    assert not cache.invalidate(GEOCODE, "a")
+    assert ServiceCache(path).get(GEOCODE, "a") is None
+    assert cache.clear(GEOCODE) == 1
+    assert ServiceCache(path).stats()[ROUTE]["entries"] == 1
+    assert cache.clear() == 1
@@ -0,0 +1,94 @@
+"""
+Tests of <route.tile_cache>, run with pytest (see <conftest.py>)
+"""
+
+import os
+import types
+
+import pytest
+
+from cash_cab_addon.route import tile_cache
+from cash_cab_addon.route.tile_cache import OverpassTileCache
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.
+
+    def time(self):
+        self.now += 1.
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tile_cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def payload(i):
+    # random bytes don't compress, so the size of a cache entry is known
+    return b"<osm>%d</osm>" % i + os.urandom(2000)
+
+
+def test_makeTileKey():
+    tile = (43.65, -79.40, 43.66, -79.39)
+    key = tile_cache.make_tile_key(tile, "roads", "query")
+    assert key == tile_cache.make_tile_key(list(tile), "roads", "query")
+    assert key != tile_cache.make_tile_key(tile, "buildings", "query")
+    assert key != tile_cache.make_tile_key(tile, "roads", "another query")
+    assert key != tile_cache.make_tile_key((43.65, -79.40, 43.66, -79.38), "roads", "query")
+
+
+def test_putGet(tmp_path, clock):
+    cache = OverpassTileCache(tmp_path)
+    data = payload(1)
+    assert cache.get("a") is None
+    cache.put("a", data)
+    assert cache.contains("a")
+    assert cache.get("a") == data
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lruEviction(tmp_path, clock):
+    cache = OverpassTileCache(tmp_path, max_bytes=3 * 2100)
+    for key in "abc":
+        cache.put(key, payload(1))
+    # "a" becomes the most recently used entry, so "b" is evicted first
+    cache.get("a")
+    cache.put("d", payload(2))
+    assert [key for key in "abcd" if cache.contains(key)] == ["a", "c", "d"]
+    assert cache.evictions == 1
+    assert not (tmp_path / ("b" + OverpassTileCache.SUFFIX)).exists()
+    assert cache.total_bytes <= cache.max_bytes
+
+
+def test_ttlExpiry(tmp_path, clock):
+    cache = OverpassTileCache(tmp_path, ttl_s=10.)
+    cache.put("a", payload(1))
+    assert cache.get("a") is not None
+    clock.now += 10.
+    assert not cache.contains("a")
+    assert cache.get("a") is None
+    assert cache.misses == 1
+    assert not (tmp_path / ("a" + OverpassTileCache.SUFFIX)).exists()
+
+
+def test_indexWrittenOnFlush(tmp_path, clock):
+    cache = OverpassTileCache(tmp_path)
+    data = payload(1)
+    cache.put("a", data)
+    assert not (tmp_path / OverpassTileCache.INDEX_NAME).exists()
+    cache.flush()
+    assert OverpassTileCache(tmp_path).get("a") == data
+
+
+def test_clear(tmp_path, clock):
+    cache = OverpassTileCache(tmp_path)
+    for key in "ab":
+        cache.put(key, payload(1))
+    assert cache.clear() == 2
+    assert OverpassTileCache(tmp_path).total_bytes == 0
+    assert not list(tmp_path.glob("*" + OverpassTileCache.SUFFIX))
@@ -0,0 +1,107 @@
+"""
+Tests of the tiling of <route.utils> (global grid, route corridor), run with pytest (see <conftest.py>)
+"""
+
+import math
+
+import pytest
+
+from cash_cab_addon.route import utils
+
+
+def test_gridTileKey_snapsToGrid():
+    south, west, north, east = utils._grid_tile_bounds(utils._grid_tile_key(43.6532, -79.3832))
+    assert south <= 43.6532 < north and west <= -79.3832 < east
+    # every point of a tile has the key of the tile
+    key = utils._grid_tile_key(43.6532, -79.3832)
+    for lat, lon in ((south, west), (south + 1e-9, east - 1e-9), (north - 1e-9, west + 1e-9)):
+        assert utils._grid_tile_key(lat, lon) == key
+    assert utils._grid_tile_key(north, west)[0] == key[0] + 1
+    assert utils._grid_tile_key(south, east) == (key[0], key[1] + 1)
+
+
+def test_tilesForBbox_coverBbox():
+    bbox = (43.640, -79.410, 43.662, -79.361)
+    tiles = utils._tiles_for_bbox(*bbox)
+    assert len(set(tiles)) == len(tiles)
+    assert min(tile[0] for tile in tiles) <= bbox[0] and min(tile[1] for tile in tiles) <= bbox[1]
+    assert max(tile[2] for tile in tiles) >= bbox[2] and max(tile[3] for tile in tiles) >= bbox[3]
+    assert [utils._tile_key(tile) for tile in tiles] == utils._grid_tile_keys(*bbox)
+
+
+def test_tilesForBbox_overlappingBboxesShareTiles():
+    """
+    Two overlapping bboxes get identical tiles where they overlap, so the tiles can be cached and diffed
+    """
+    first = set(utils._tiles_for_bbox(43.640, -79.410, 43.662, -79.361))
+    second = set(utils._tiles_for_bbox(43.645, -79.400, 43.670, -79.350))
+    shared = set(utils._tiles_for_bbox(43.645, -79.400, 43.662, -79.361))
+    assert shared <= first & second
+    assert {utils._tile_key(tile) for tile in first & second} == {utils._tile_key(tile) for tile in shared}
+
+
+def test_tilesForBbox_edgeOnGridLine():
+    """
+    A bbox ending exactly on a grid line doesn't get the tiles beyond it
+    """
+    tile = utils._grid_tile_bounds(utils._grid_tile_key(43.6532, -79.3832))
+    assert utils._tiles_for_bbox(*tile) == [tile]
+
+
+def diagonal(steps=50):
+    # a straight route about 9 km long across a city, from south-west to north-east
+    return [(43.62 + 0.06 * i / steps, -79.45 + 0.08 * i / steps) for i in range(steps + 1)]
+
+
+def test_corridorTiles_diagonalRoute():
+    points = diagonal()
+    padding = 300.
+    bboxTiles = utils._tiles_for_bbox(*utils.pad_bbox(utils.compute_bbox(points), padding))
+    tiles = utils._corridor_tiles(points, padding)
+    assert set(tiles) <= set(bboxTiles)
+    # the tiles off the diagonal aren't downloaded
+    assert len(tiles) < 0.7 * len(bboxTiles)
+    # every tile the route runs through is kept
+    assert {utils._grid_tile_key(lat, lon) for lat, lon in points} <= {utils._tile_key(tile) for tile in tiles}
+    # the corners away from the route aren't
+    south, west, north, east = utils.compute_bbox(points)
+    assert utils._grid_tile_key(north, west) not in {utils._tile_key(tile) for tile in tiles}
+    assert utils._grid_tile_key(south, east) not in {utils._tile_key(tile) for tile in tiles}
+
+
+def distanceToTile(tile, point):
+    """
+    Approximate distance in meters from <point> to the nearest point of <tile>
+    """
+    lat = min(max(point[0], tile[0]), tile[2])
+    lon = min(max(point[1], tile[1]), tile[3])
+    return math.hypot(
+        (lat - point[0]) * utils._METERS_PER_DEGREE_LAT,
+        (lon - point[1]) * utils._METERS_PER_DEGREE_LAT * math.cos(math.radians(point[0]))
+    )
+
+
+def test_corridorTiles_endpointRing():
+    points = diagonal()
+    tiles = set(utils._corridor_tiles(points, 300.))
+    ringed = set(utils._corridor_tiles(points, 300., endpoint_padding_m=3000.))
+    assert tiles < ringed
+    # the wider ring is only around the start and the end of the route
+    for tile in ringed - tiles:
+        assert min(distanceToTile(tile, points[0]), distanceToTile(tile, points[-1])) <= 3000.
+
+
+def test_corridorTiles_singlePoint():
+    tiles = utils._corridor_tiles([(43.6532, -79.3832)], 0.)
+    assert [utils._tile_key(tile) for tile in tiles] == [utils._grid_tile_key(43.6532, -79.3832)]
+
+
+def test_splitTile():
+    tile = (43.64, -79.40, 43.66, -79.36)
+    quadrants = utils._split_tile(tile)
+    assert len(quadrants) == 4
+    assert sum(utils._tile_area_km2(quadrant) for quadrant in quadrants) == pytest.approx(utils._tile_area_km2(tile))
+    assert (min(q[0] for q in quadrants), min(q[1] for q in quadrants),
+            max(q[2] for q in quadrants), max(q[3] for q in quadrants)) == tile
+    # the quadrants share their edges and don't overlap
+    assert quadrants[0][2:] == quadrants[3][:2] == (43.65, -79.38)
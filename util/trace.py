@@ -0,0 +1,135 @@
+"""
+Tracing of the import of OSM data.
+
+Each subsystem ("parse", "import", "app", "building") has its own <Tracer> with a level:
+0 (off), 1 (messages and every <Tracer.sampleEvery>-th element) or 2 (every element).
+The levels are set with the environment variable BLOSM_TRACE before Blender is started,
+e.g. BLOSM_TRACE="parse=2,app=1" or BLOSM_TRACE="1" for all subsystems,
+or from the Python console of Blender with <setLevel(..)>.
+
+The code on a hot path tests the level of a tracer before building a message:
+
+    if tracer.level: tracer.sample("way", "way %s", _id)
+
+so a switched off tracer costs a single attribute lookup.
+"""
+
+import os
+from time import perf_counter
+
+
+OFF = 0
+INFO = 1
+DEBUG = 2
+
+SAMPLE_EVERY = 1000
+
+tracers = {}
+
+
+class Tracer:
+
+    __slots__ = ("name", "level", "sampleEvery", "counters")
+
+    def __init__(self, name, level=OFF, sampleEvery=SAMPLE_EVERY):
+        self.name = name
+        self.level = level
+        self.sampleEvery = sampleEvery
+        # the number of elements passed to <self.sample(..)> or to <self.count(..)> for each key
+        self.counters = {}
+
+    def log(self, message, *args):
+        print("[BLOSM] %s: %s" % (self.name, message % args if args else message))
+
+    def count(self, key, n=1):
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def sample(self, key, message, *args):
+        """
+        Count an element of the kind <key> and log it if it's the first one of
+        <self.sampleEvery> elements of that kind or if the level of the tracer is <DEBUG>
+        """
+        n = self.counters.get(key, 0)
+        self.counters[key] = n + 1
+        if self.level >= DEBUG or not n % self.sampleEvery:
+            self.log("#%s %s" % (n + 1, message), *args)
+
+    def reset(self):
+        self.counters.clear()
+
+
+def getTracer(name):
+    tracer = tracers.get(name)
+    if tracer is None:
+        tracer = tracers[name] = Tracer(name, _levels.get(name, _levels.get("*", OFF)))
+    return tracer
+
+
+def setLevel(name, level):
+    """
+    Set the <level> of the tracer <name>, <name> equal to "*" sets the level of all tracers
+    """
+    if name == "*":
+        _levels.clear()
+        for tracer in tracers.values():
+            tracer.level = level
+    else:
+        getTracer(name).level = level
+    _levels[name] = level
+
+
+def _parseLevels(spec):
+    levels = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, level = item.rpartition("=")
+        try:
+            levels[name or "*"] = int(level)
+        except ValueError:
+            print("[BLOSM] Ignoring the invalid item \"%s\" of BLOSM_TRACE" % item)
+    return levels
+
+
+# the levels of the tracers by their names, "*" stands for all tracers
+_levels = _parseLevels(os.environ.get("BLOSM_TRACE", ""))
+
+
+class Summary:
+    """
+    Per-stage element counts and timings of an import printed at its end
+    """
+
+    def __init__(self):
+        self.startTime = perf_counter()
+        # a list of tuples (stage name, duration in seconds, dictionary of element counts)
+        self.stages = []
+        self.stage = None
+        self.stageStartTime = 0.
+        for tracer in tracers.values():
+            tracer.reset()
+
+    def begin(self, stage):
+        self.stage = stage
+        self.stageStartTime = perf_counter()
+
+    def end(self, **counts):
+        self.stages.append((self.stage, perf_counter() - self.stageStartTime, counts))
+        self.stage = None
+
+    def report(self):
+        print("[BLOSM] Import summary:")
+        for stage, duration, counts in self.stages:
+            print("[BLOSM]   %-8s %8.2fs  %s" % (
+                stage,
+                duration,
+                ", ".join("%s: %s" % item for item in counts.items())
+            ))
+        for name, tracer in tracers.items():
+            if tracer.counters:
+                print("[BLOSM]   %-8s traced %s" % (
+                    name,
+                    ", ".join("%s: %s" % item for item in tracer.counters.items())
+                ))
+        print("[BLOSM]   %-8s %8.2fs" % ("total", perf_counter() - self.startTime))
@@ -1,4 +1,10 @@
 import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # see conversion formulas at
 # http://en.wikipedia.org/wiki/Transverse_Mercator_projection
@@ -34,4 +40,84 @@ class TransverseMercator:
 
         lon = self.lon + math.degrees(lon)
         lat = math.degrees(lat)
-        return (lat, lon)
\ No newline at end of file
+        return (lat, lon)
+
+    def fromGeographicBatch(self, lats, lons):
+        """
+        Project the sequences of latitudes <lats> and longitudes <lons>.
+        Returns a tuple (xs, ys) of <array('d')>; z is always zero.
+        """
+        kr = self.k * self.radius
+        if numpy is not None:
+            lat = numpy.radians(numpy.asarray(lats, dtype=numpy.float64))
+            lon = numpy.radians(numpy.asarray(lons, dtype=numpy.float64) - self.lon)
+            B = numpy.sin(lon) * numpy.cos(lat)
+            xs = 0.5 * kr * numpy.log((1.+B)/(1.-B))
+            ys = kr * ( numpy.arctan(numpy.tan(lat)/numpy.cos(lon)) - self.latInRadians )
+            return _toArray(xs), _toArray(ys)
+
+        radians, sin, cos, tan, log, atan = math.radians, math.sin, math.cos, math.tan, math.log, math.atan
+        lon0 = self.lon
+        latInRadians = self.latInRadians
+        xs = array("d")
+        ys = array("d")
+        appendX = xs.append
+        appendY = ys.append
+        for lat, lon in zip(lats, lons):
+            lat = radians(lat)
+            lon = radians(lon-lon0)
+            B = sin(lon) * cos(lat)
+            appendX(0.5 * kr * log((1.+B)/(1.-B)))
+            appendY(kr * ( atan(tan(lat)/cos(lon)) - latInRadians ))
+        return xs, ys
+
+    def toGeographicBatch(self, xs, ys):
+        """
+        The inverse of <self.fromGeographicBatch(..)>. Returns a tuple (lats, lons) of <array('d')>.
+        """
+        kr = self.k * self.radius
+        if numpy is not None:
+            x = numpy.asarray(xs, dtype=numpy.float64)/kr
+            D = numpy.asarray(ys, dtype=numpy.float64)/kr + self.latInRadians
+            lons = self.lon + numpy.degrees(numpy.arctan(numpy.sinh(x)/numpy.cos(D)))
+            lats = numpy.degrees(numpy.arcsin(numpy.sin(D)/numpy.cosh(x)))
+            return _toArray(lats), _toArray(lons)
+
+        degrees, sin, cos, sinh, cosh, atan, asin = \
+            math.degrees, math.sin, math.cos, math.sinh, math.cosh, math.atan, math.asin
+        lon0 = self.lon
+        latInRadians = self.latInRadians
+        lats = array("d")
+        lons = array("d")
+        appendLat = lats.append
+        appendLon = lons.append
+        for x, y in zip(xs, ys):
+            x = x/kr
+            D = y/kr + latInRadians
+            appendLon(lon0 + degrees(atan(sinh(x)/cos(D))))
+            appendLat(degrees(asin(sin(D)/cosh(x))))
+        return lats, lons
+
+
+def _toArray(values):
+    result = array("d")
+    result.frombytes(numpy.ascontiguousarray(values, dtype=numpy.float64).tobytes())
+    return result
+
+
+def projectBatch(projection, lats, lons):
+    """
+    Project the sequences of latitudes <lats> and longitudes <lons> with any projection
+    (e.g. one provided by <bpyproj>), in one call if the projection supports it.
+    Returns a tuple (xs, ys).
+    """
+    batch = getattr(projection, "fromGeographicBatch", None)
+    if batch:
+        return batch(lats, lons)
+    xs = array("d")
+    ys = array("d")
+    for lat, lon in zip(lats, lons):
+        x, y = projection.fromGeographic(lat, lon)[:2]
+        xs.append(x)
+        ys.append(y)
+    return xs, ys